@@ -0,0 +1,33 @@
+"""Add inner-product HNSW index on embeddings
+
+Revision ID: 0de10afe0833
+Revises: 52e363be6414
+Create Date: 2026-10-18 09:12:41.337201
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0de10afe0833"
+down_revision: Union[str, None] = "52e363be6414"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Embeddings are stored L2-normalized, so inner product (<#>) ranks like
+    # cosine distance. CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_embeddings_vector_ip_hnsw "
+            "ON embeddings USING hnsw (vector vector_ip_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_embeddings_vector_ip_hnsw")
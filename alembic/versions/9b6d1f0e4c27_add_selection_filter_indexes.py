@@ -0,0 +1,46 @@
+"""Add indexes for the selection-filtered vector search
+
+Revision ID: 9b6d1f0e4c27
+Revises: f26de952f83e
+Create Date: 2026-10-18 13:41:09.204517
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b6d1f0e4c27"
+down_revision: Union[str, None] = "f26de952f83e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A document can only be selected once; drop duplicates before enforcing it
+    op.execute(
+        "DELETE FROM selected_documents a USING selected_documents b "
+        "WHERE a.document_id = b.document_id AND a.id > b.id"
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "
+            "ux_selected_documents_document_id ON selected_documents (document_id)"
+        )
+        # Covering index: the semi-join probes by document_id and reads the
+        # vector from the index (index-only scan) instead of the heap
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_embeddings_document_id "
+            "ON embeddings (document_id) INCLUDE (vector)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_embeddings_document_id")
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS ux_selected_documents_document_id"
+        )
@@ -0,0 +1,61 @@
+"""Add chunks table for token-bounded document chunks
+
+Revision ID: c4e8a2d15b93
+Revises: 9b6d1f0e4c27
+Create Date: 2026-10-18 14:02:17.551930
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8a2d15b93"
+down_revision: Union[str, None] = "9b6d1f0e4c27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chunks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("document_id", sa.Integer(), nullable=False),
+        sa.Column("chunk_index", sa.Integer(), nullable=False),
+        sa.Column("start_char", sa.Integer(), nullable=False),
+        sa.Column("end_char", sa.Integer(), nullable=False),
+        sa.Column("token_count", sa.Integer(), nullable=False),
+        sa.Column("vector", pgvector.sqlalchemy.vector.VECTOR(dim=384), nullable=True),
+        sa.ForeignKeyConstraint(["document_id"], ["documents.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ux_chunks_document_id_chunk_index",
+        "chunks",
+        ["document_id", "chunk_index"],
+        unique=True,
+    )
+    # Covering index for the selection-filtered chunk search (see retrieval.py)
+    op.create_index(
+        "ix_chunks_document_id",
+        "chunks",
+        ["document_id"],
+        postgresql_include=["vector"],
+    )
+    # ANN indexes for both metrics; the table is new, so no CONCURRENTLY needed
+    op.execute(
+        "CREATE INDEX ix_chunks_vector_l2_hnsw ON chunks "
+        "USING hnsw (vector vector_l2_ops) WITH (m = 16, ef_construction = 64)"
+    )
+    op.execute(
+        "CREATE INDEX ix_chunks_vector_ip_hnsw ON chunks "
+        "USING hnsw (vector vector_ip_ops) WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("chunks")
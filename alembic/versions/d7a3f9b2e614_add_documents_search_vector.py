@@ -0,0 +1,71 @@
+"""Add generated full-text search vector to documents
+
+Revision ID: d7a3f9b2e614
+Revises: c4e8a2d15b93
+Create Date: 2026-10-18 15:12:40.284113
+
+Maintenance window required: adding a STORED generated column rewrites the
+whole documents table (computing the tsvector of every document) while holding
+an ACCESS EXCLUSIVE lock, so reads and writes of documents block until the
+upgrade finishes. This is deliberate: the column stays declared as a generated
+column in the model, so it can never drift from the content. Run the upgrade
+with the API stopped (or drained); the rewrite takes roughly as long as a full
+scan plus to_tsvector over all content. The lock is requested with a short
+lock_timeout, so the upgrade fails fast instead of queueing behind long-running
+queries and blocking everything behind it. The GIN index is then built
+CONCURRENTLY.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a3f9b2e614"
+down_revision: Union[str, None] = "c4e8a2d15b93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Generated columns need an IMMUTABLE expression, but convert_from() is only
+    # STABLE; the wrapper pins the encoding and text search config, so it is
+    # immutable in practice. Only the first 256k characters are indexed to stay
+    # well below the 1MB tsvector limit. Filename terms weigh more (A) than
+    # content terms (B) in ts_rank.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION documents_search_vector(filename text, content bytea)
+        RETURNS tsvector
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT setweight(to_tsvector('english'::regconfig, coalesce(filename, '')), 'A')
+                || setweight(
+                    to_tsvector(
+                        'english'::regconfig,
+                        coalesce(left(convert_from(content, 'UTF8'), 262144), '')
+                    ),
+                    'B'
+                )
+        $$
+    """)
+    # Rewrites the table under ACCESS EXCLUSIVE (see the docstring)
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    op.execute("""
+        ALTER TABLE documents ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (documents_search_vector(filename, content)) STORED
+    """)
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_search_vector "
+            "ON documents USING gin (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_search_vector")
+    op.execute("ALTER TABLE documents DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP FUNCTION IF EXISTS documents_search_vector(text, bytea)")
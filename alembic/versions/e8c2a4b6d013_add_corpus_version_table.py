@@ -0,0 +1,37 @@
+"""Add corpus_version table
+
+Revision ID: e8c2a4b6d013
+Revises: d7a3f9b2e614
+Create Date: 2026-10-18 17:05:12.518904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8c2a4b6d013"
+down_revision: Union[str, None] = "d7a3f9b2e614"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "corpus_version",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("documents_version", sa.BigInteger(), nullable=False),
+        sa.Column("selection_version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        "INSERT INTO corpus_version (id, documents_version, selection_version) "
+        "VALUES (1, 0, 0)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("corpus_version")
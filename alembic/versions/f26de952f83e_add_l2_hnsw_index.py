@@ -0,0 +1,34 @@
+"""Add L2 HNSW index on embeddings
+
+Revision ID: f26de952f83e
+Revises: 0de10afe0833
+Create Date: 2026-10-18 11:03:27.518846
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f26de952f83e"
+down_revision: Union[str, None] = "0de10afe0833"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Serves the default "l2" metric (<->). IVFFlat indexes need data to pick
+    # their list centroids, so they are built through the /indexes API instead.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_embeddings_vector_l2_hnsw "
+            "ON embeddings USING hnsw (vector vector_l2_ops) "
+            "WITH (m = 16, ef_construction = 64)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_embeddings_vector_l2_hnsw")
@@ -0,0 +1,196 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+import numpy as np
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after `ttl_seconds`.
+    - Reads refresh recency but not age: an entry is served for at most
+      `ttl_seconds` after it was stored.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Returns the value stored under `key`, or None if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Stores `value` under `key`, evicting the least recently used entries.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns size and hit/miss/eviction/expiration counters.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+class SemanticCache:
+    """
+    Thread-safe LRU cache looked up by vector similarity instead of equality.
+    - Entries live in partitions (e.g. the same retrieved documents); a lookup
+      only compares against vectors of its own partition.
+    - A lookup hits when the best cosine similarity is at least `threshold`.
+    - Vectors are L2-normalized on insert, so similarity is one dot product.
+    - `max_entries` and `ttl_seconds` bound the cache like `TTLCache`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300.0,
+        threshold: float = 0.95,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        # entry id -> (partition, stored_at, vector, value)
+        self._entries: OrderedDict[int, tuple[Hashable, float, np.ndarray, Any]] = (
+            OrderedDict()
+        )
+        self._partitions: dict[Hashable, set[int]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray | None:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _remove(self, entry_id: int):
+        partition = self._entries.pop(entry_id)[0]
+        ids = self._partitions[partition]
+        ids.discard(entry_id)
+        if not ids:
+            del self._partitions[partition]
+
+    def get(self, partition: Hashable, vector) -> tuple[Any, float] | None:
+        """
+        Returns (value, similarity) of the most similar entry in `partition`,
+        or None if none reaches `threshold`.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            now = time.monotonic()
+            ids = []
+            for entry_id in list(self._partitions.get(partition, ())):
+                if now - self._entries[entry_id][1] > self.ttl_seconds:
+                    self._remove(entry_id)
+                    self._expirations += 1
+                else:
+                    ids.append(entry_id)
+
+            if query is None or not ids:
+                self._misses += 1
+                return None
+
+            similarities = np.stack([self._entries[i][2] for i in ids]) @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(ids[best])
+            self._hits += 1
+            return self._entries[ids[best]][3], float(similarities[best])
+
+    def put(self, partition: Hashable, vector, value: Any):
+        """
+        Stores `value` under `vector` in `partition`, evicting the least
+        recently used entries.
+        """
+        vector = self._normalize(vector)
+        if vector is None:
+            return
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (partition, time.monotonic(), vector, value)
+            self._partitions.setdefault(partition, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._partitions.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns size, threshold and hit/miss/eviction/expiration counters.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "partitions": len(self._partitions),
+                "capacity": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
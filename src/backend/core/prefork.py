@@ -0,0 +1,145 @@
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from collections import deque
+from typing import Callable
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """
+    Opens the listening socket in the master; forked workers inherit it.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve_prefork(
+    app,
+    host: str,
+    port: int,
+    workers: int,
+    preload: Callable[[], None] | None = None,
+    after_fork: Callable[[], None] | None = None,
+    max_restarts: int = 5,
+    restart_window: float = 60.0,
+    restart_backoff: float = 0.5,
+    max_restart_backoff: float = 30.0,
+):
+    """
+    Runs `app` in `workers` forked uvicorn processes sharing one socket.
+    - `preload` runs once in the master before forking (e.g. load model
+      weights); workers then share those memory pages copy-on-write.
+      `gc.freeze()` afterwards keeps the garbage collector from writing to
+      (and so copying) every preloaded object in every worker.
+    - `after_fork` runs first in each worker, before it serves requests:
+      the place to reset state that must not cross a fork (DB pools, thread
+      pools). Startup events (DB checks) run in workers, never in the master.
+    - Workers that die are replaced after a per-slot exponential backoff
+      (`restart_backoff` doubling up to `max_restart_backoff`, reset once a
+      worker has lived for `restart_window`). A slot restarted more than
+      `max_restarts` times within `restart_window` stops all workers and
+      raises RuntimeError rather than fork-looping.
+    - SIGTERM / SIGINT stop all workers.
+    """
+    sock = bind_socket(host, port)
+    if preload is not None:
+        preload()
+        gc.freeze()
+
+    children: dict[int, int] = {}  # pid -> worker index
+    started_at: dict[int, float] = {}  # worker index -> last spawn time
+    failures: dict[int, int] = {}  # worker index -> consecutive short lives
+    restarts: dict[int, deque] = {}  # worker index -> recent restart times
+    pending: dict[int, float] = {}  # worker index -> time of its next restart
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                if after_fork is not None:
+                    after_fork()
+                server = uvicorn.Server(uvicorn.Config(app, lifespan="on"))
+                server.run(sockets=[sock])
+            except BaseException:
+                logger.exception(f"Worker {index} crashed")
+                status = 1
+            finally:
+                os._exit(status)
+        children[pid] = index
+        started_at[index] = time.monotonic()
+        logger.info(f"Started worker {index} (pid {pid})")
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index in range(workers):
+        spawn(index)
+    logger.info(f"Master {os.getpid()} serving on {host}:{port} with {workers} workers")
+
+    error = None
+    while children or (pending and not stopping):
+        now = time.monotonic()
+        for index, due in list(pending.items()):
+            if due <= now and not stopping:
+                del pending[index]
+                spawn(index)
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        except InterruptedError:
+            continue
+        if pid == 0:
+            time.sleep(0.05)  # Nothing exited; poll again (or wait for a restart)
+            continue
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+
+        now = time.monotonic()
+        if now - started_at[index] >= restart_window:
+            failures[index] = 0  # It ran long enough: not a crash loop
+        recent = restarts.setdefault(index, deque())
+        while recent and now - recent[0] > restart_window:
+            recent.popleft()
+        if len(recent) >= max_restarts:
+            error = (
+                f"Worker {index} exited ({status}) after {len(recent)} restarts "
+                f"within {restart_window:.0f}s; stopping"
+            )
+            logger.error(error)
+            stop(signal.SIGTERM, None)
+            continue
+        recent.append(now)
+        delay = min(restart_backoff * 2 ** failures.get(index, 0), max_restart_backoff)
+        failures[index] = failures.get(index, 0) + 1
+        logger.warning(
+            f"Worker {index} (pid {pid}) exited ({status}); restarting in {delay:.1f}s"
+        )
+        pending[index] = now + delay
+    sock.close()
+    if error is not None:
+        raise RuntimeError(error)
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+    - The first caller starts the computation as a task; callers arriving
+      while it runs await that task and get the same result (or exception).
+    - Callers await the task through `asyncio.shield`, so a caller that is
+      cancelled (e.g. its client disconnected) does not cancel the work the
+      other callers are waiting for.
+    - A key is forgotten as soon as its computation finishes; keeping the
+      result around is the job of a cache in front of it.
+    - With `enabled=False` every call runs on its own.
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._executions = 0
+        self._coalesced = 0
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved even if every caller went away
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the result of `fn()`, shared with concurrent calls for `key`.
+        """
+        if not self.enabled:
+            with self._lock:
+                self._executions += 1
+            return await fn()
+
+        task = self._calls.get(key)
+        with self._lock:
+            if task is None:
+                self._executions += 1
+            else:
+                self._coalesced += 1
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """
+        Returns executions, coalesced calls and computations in flight.
+        """
+        with self._lock:
+            calls = self._executions + self._coalesced
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._calls),
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "coalesced_rate": self._coalesced / calls if calls else 0.0,
+            }
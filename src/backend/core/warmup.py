@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Runs the expensive part of startup (imports, model loads) in the background.
+    - The server accepts connections right away; `ready` flips once `fn`
+      has completed, which is what a readiness probe should wait for.
+    - A failed warmup is recorded and leaves `ready` False; the models are
+      still loaded on first use, which `/ready` then accepts instead.
+    """
+
+    def __init__(self, fn: Callable[[], Awaitable[None]]):
+        self.fn = fn
+        self.state = "pending"  # pending -> warming -> ready | failed
+        self.error: str | None = None
+        self.seconds: float | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    async def run(self):
+        """
+        Runs `fn` once, recording its duration and outcome.
+        """
+        self.state = "warming"
+        started = time.perf_counter()
+        try:
+            await self.fn()
+        except Exception as e:
+            self.state, self.error = "failed", str(e)
+            logger.error(f"Warmup failed: {e}", exc_info=True)
+        else:
+            self.state = "ready"
+            logger.info(f"Warmup finished in {time.perf_counter() - started:.2f}s")
+        finally:
+            self.seconds = time.perf_counter() - started
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts `run` as a background task on the running loop (once).
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    def stats(self) -> dict:
+        return {"state": self.state, "seconds": self.seconds, "error": self.error}
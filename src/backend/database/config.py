@@ -1,16 +1,9 @@
-import os
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
+from src.backend.database.engine import create_engine
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Database URL
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-# Create async engine and session
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# The process-wide async engine and session factory (pool settings in src.config)
+engine = create_engine()
 AsyncSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, class_=AsyncSession
 )
@@ -0,0 +1,52 @@
+from typing import NamedTuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import text
+from src.backend.database.config import AsyncSessionLocal
+
+
+class CorpusState(NamedTuple):
+    """
+    Version of the searchable corpus as stored in the `corpus_version` row.
+    """
+
+    documents: int  # Bumped by ingestion
+    selection: int  # Bumped by document (de)selection
+
+
+_BUMP = text("""
+    INSERT INTO corpus_version (id, documents_version, selection_version)
+    VALUES (1, :documents, :selection)
+    ON CONFLICT (id) DO UPDATE SET
+        documents_version = corpus_version.documents_version + :documents,
+        selection_version = corpus_version.selection_version + :selection;
+""")
+
+_CURRENT = text("""
+    SELECT documents_version, selection_version FROM corpus_version WHERE id = 1;
+""")
+
+
+async def bump_corpus_version(
+    db: AsyncSession, documents: bool = False, selection: bool = False
+):
+    """
+    Bumps the corpus version inside the caller's transaction.
+    - The row stays locked until commit, and other processes only see the new
+      version together with the committed data, so a result cached under it
+      is never stale.
+    - Selection changes issue it last (shortest lock). Document writes issue
+      it first, before ids are allocated: writers then commit in id order,
+      which lets indexes fetch only ids above the largest they have seen.
+    """
+    await db.execute(_BUMP, {"documents": int(documents), "selection": int(selection)})
+
+
+async def current_corpus_version(db: AsyncSession | None = None) -> CorpusState:
+    """
+    Reads the committed corpus version (shared by all processes).
+    """
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            return await current_corpus_version(session)
+    row = (await db.execute(_CURRENT)).first()
+    return CorpusState(*row) if row is not None else CorpusState(0, 0)
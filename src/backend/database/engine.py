@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import deque
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.config import (
+    DATABASE_URL,
+    DB_ECHO,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_STATEMENT_TIMEOUT_MS,
+)  # Import database pool settings
+
+
+class PoolMetrics:
+    """
+    Checkout counters of one connection pool.
+    - `waiting` is the number of callers currently inside checkout; it stays
+      at 0 unless the pool is exhausted (or a new connection is being opened).
+    - Checkout wait times include opening a connection when the pool grows.
+    """
+
+    def __init__(self, latency_window: int = 1000):
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._max_waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._waits: deque[float] = deque(maxlen=latency_window)
+
+    def wait_started(self):
+        with self._lock:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+
+    def wait_finished(self, seconds: float, timed_out: bool):
+        with self._lock:
+            self._waiting -= 1
+            if timed_out:
+                self._timeouts += 1
+            else:
+                self._checkouts += 1
+                self._waits.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            waiting, max_waiting = self._waiting, self._max_waiting
+            checkouts, timeouts = self._checkouts, self._timeouts
+
+        def _percentile(fraction: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(int(fraction * len(waits)), len(waits) - 1)] * 1000
+
+        return {
+            "waiting": waiting,
+            "max_waiting": max_waiting,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms": {
+                "mean": sum(waits) / len(waits) * 1000 if waits else 0.0,
+                "p50": _percentile(0.50),
+                "p95": _percentile(0.95),
+                "p99": _percentile(0.99),
+                "max": waits[-1] * 1000 if waits else 0.0,
+            },
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default asyncio queue pool, recording checkout waits in `metrics`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        self.metrics.wait_started()
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.wait_finished(time.perf_counter() - started, timed_out)
+
+
+def create_engine(
+    url: str = DATABASE_URL,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle: int = DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping: bool = DB_POOL_PRE_PING,
+    statement_cache_size: int = DB_STATEMENT_CACHE_SIZE,
+    statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS,
+    echo: bool = DB_ECHO,
+) -> AsyncEngine:
+    """
+    Builds the async engine with the configured pool and asyncpg settings.
+    - `statement_cache_size` prepared statements are kept per connection
+      (SQLAlchemy's and asyncpg's caches); 0 disables both, as PgBouncer in
+      transaction mode requires.
+    - `statement_timeout_ms` is sent as a server setting when connecting,
+      so it applies to every statement (0 = no timeout). `RESET
+      statement_timeout` returns to it after a local override.
+    """
+    connect_args = {
+        "prepared_statement_cache_size": statement_cache_size,
+        "statement_cache_size": statement_cache_size,
+    }
+    if statement_timeout_ms:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(statement_timeout_ms)
+        }
+    return create_async_engine(
+        url,
+        echo=echo,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    """
+    Returns pool occupancy (checked out, idle, overflow) and checkout waits.
+    """
+    pool = engine.sync_engine.pool
+    stats = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
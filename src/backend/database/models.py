@@ -1,5 +1,14 @@
-from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Computed,
+    Integer,
+    String,
+    LargeBinary,
+    ForeignKey,
+    Index,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from pgvector.sqlalchemy import Vector
 from .config import Base
 
@@ -10,6 +19,10 @@ class Document(Base):
     """
 
     __tablename__ = "documents"
+    __table_args__ = (
+        # Full-text search over filename and content (see retrieval.py)
+        Index("ix_documents_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
@@ -17,6 +30,12 @@ class Document(Base):
     doc_metadata = Column(ARRAY(String))
     source = Column(String, nullable=False, default="upload")  # "upload" or "arxiv"
     url = Column(String, nullable=True)  # Store URL if ArXiv paper
+    # Generated by Postgres from the decoded content; documents_search_vector()
+    # is created by the migration that adds this column
+    search_vector = Column(
+        TSVECTOR,
+        Computed("documents_search_vector(filename, content)", persisted=True),
+    )
 
 
 class Embedding(Base):
@@ -25,18 +44,71 @@ class Embedding(Base):
     """
 
     __tablename__ = "embeddings"
+    __table_args__ = (
+        # Covering index for the selection-filtered search (see retrieval.py)
+        Index(
+            "ix_embeddings_document_id", "document_id", postgresql_include=["vector"]
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, nullable=False)
     vector = Column(Vector(384), nullable=True)
 
 
+class Chunk(Base):
+    """
+    Stores token-bounded chunks of documents with their embeddings.
+    - Chunk text is not duplicated: `start_char` / `end_char` slice the
+      decoded document content (end exclusive).
+    """
+
+    __tablename__ = "chunks"
+    __table_args__ = (
+        Index(
+            "ux_chunks_document_id_chunk_index",
+            "document_id",
+            "chunk_index",
+            unique=True,
+        ),
+        # Covering index for the selection-filtered chunk search
+        Index("ix_chunks_document_id", "document_id", postgresql_include=["vector"]),
+    )
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(
+        Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False
+    )
+    chunk_index = Column(Integer, nullable=False)  # Position within the document
+    start_char = Column(Integer, nullable=False)
+    end_char = Column(Integer, nullable=False)
+    token_count = Column(Integer, nullable=False)
+    vector = Column(Vector(384), nullable=True)
+
+
 class SelectedDocument(Base):
     """
     Stores user-selected documents to filter retrieval results.
     """
 
     __tablename__ = "selected_documents"
+    __table_args__ = (
+        Index("ux_selected_documents_document_id", "document_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+
+
+class CorpusVersion(Base):
+    """
+    Single-row counters bumped in the same transaction as every change to
+    searchable data, so all API processes see corpus changes at commit.
+    - `documents_version`: ingestion; `selection_version`: document selection.
+    """
+
+    __tablename__ = "corpus_version"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Always 1
+    documents_version = Column(BigInteger, nullable=False, default=0)
+    selection_version = Column(BigInteger, nullable=False, default=0)
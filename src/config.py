@@ -7,3 +7,163 @@ load_dotenv()
 # Read values from environment
 DATABASE_URL = os.getenv("DATABASE_URL")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Database engine: one pool per process, shared by all services
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(
+    os.getenv("DB_STATEMENT_CACHE_SIZE", "500")
+)  # Prepared statements per connection (0 behind PgBouncer transaction pooling)
+DB_STATEMENT_TIMEOUT_MS = int(
+    os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")
+)  # Server-side limit per statement (0 = none); index builds lift it
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"  # Log every SQL statement
+
+# Embedding model shared by ingestion and retrieval
+EMBEDDING_MODEL_NAME = os.getenv(
+    "EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2"
+)
+
+# Micro-batching of concurrent embedding requests
+EMBEDDING_BATCHING_ENABLED = (
+    os.getenv("EMBEDDING_BATCHING_ENABLED", "true").lower() == "true"
+)
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+EMBEDDING_MAX_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_MAX_BATCH_WAIT_MS", "5"))
+
+# Embedding cache: in-memory LRU plus an optional memory-mapped disk tier
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR")  # Unset = memory tier only
+EMBEDDING_CACHE_DISK_ENTRIES = int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", "100000"))
+
+# Texts per length bucket in batch embedding (each bucket is padded separately)
+EMBEDDING_BUCKET_SIZE = int(os.getenv("EMBEDDING_BUCKET_SIZE", "32"))
+
+# Inference backend for embeddings: "torch", "onnx" or "onnx-int8"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_CACHE_DIR = os.getenv(
+    "EMBEDDING_ONNX_CACHE_DIR", os.path.join("~", ".cache", "rag_qna", "onnx")
+)
+
+# L2-normalize embeddings so inner product ranks like cosine similarity
+EMBEDDING_NORMALIZE = os.getenv("EMBEDDING_NORMALIZE", "true").lower() == "true"
+
+# Dedicated inference executor: concurrent model calls, waiting jobs and CPU threads
+EMBEDDING_EXECUTOR_WORKERS = int(os.getenv("EMBEDDING_EXECUTOR_WORKERS", "2"))
+EMBEDDING_EXECUTOR_MAX_QUEUE = int(os.getenv("EMBEDDING_EXECUTOR_MAX_QUEUE", "64"))
+EMBEDDING_INTRA_OP_THREADS = int(
+    os.getenv(
+        "EMBEDDING_INTRA_OP_THREADS",
+        str(max(1, (os.cpu_count() or 1) // EMBEDDING_EXECUTOR_WORKERS)),
+    )
+)  # Threads per model call (default: cores split between executor workers)
+EMBEDDING_INTER_OP_THREADS = int(os.getenv("EMBEDDING_INTER_OP_THREADS", "1"))
+# Query texts waiting in the micro-batcher; beyond this, requests get a 503
+EMBEDDING_BATCH_MAX_QUEUE = int(
+    os.getenv("EMBEDDING_BATCH_MAX_QUEUE", str(EMBEDDING_EXECUTOR_MAX_QUEUE))
+)
+
+# Out-of-process embedding workers: >0 makes API processes clients of a worker
+# pool (python -m src.services.ingestion_service.embedding_workers) instead of
+# loading the model themselves
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+EMBEDDING_WORKER_SOCKET = os.getenv(
+    "EMBEDDING_WORKER_SOCKET", f"/tmp/rag-embedding-{os.getuid()}/embedding.sock"
+)  # Its directory must be private (created with mode 0700)
+EMBEDDING_WORKER_AUTHKEY = os.getenv(
+    "EMBEDDING_WORKER_AUTHKEY"
+)  # Shared secret; required when EMBEDDING_WORKERS > 0
+
+# Distance used for vector search: "l2", "inner_product" or "cosine"
+RETRIEVAL_DISTANCE_METRIC = os.getenv("RETRIEVAL_DISTANCE_METRIC", "l2")
+
+# Default ANN search knobs (unset = pgvector defaults: ef_search 40, probes 1)
+RETRIEVAL_HNSW_EF_SEARCH = os.getenv("RETRIEVAL_HNSW_EF_SEARCH")
+RETRIEVAL_IVFFLAT_PROBES = os.getenv("RETRIEVAL_IVFFLAT_PROBES")
+
+# Token-bounded chunking of documents before embedding (window includes [CLS]/[SEP])
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+# Documents per batch in bulk ingestion (embedding of the next batch overlaps writes)
+INGESTION_BULK_BATCH_SIZE = int(os.getenv("INGESTION_BULK_BATCH_SIZE", "256"))
+
+# Cache of search results per (question, parameters, corpus version)
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "300"))
+
+# Hybrid (vector + lexical) retrieval: fusion method "rrf" or "weighted"
+RETRIEVAL_HYBRID_FUSION = os.getenv("RETRIEVAL_HYBRID_FUSION", "rrf")
+# Lexical leg: "bm25" (in-memory index) or "postgres" (full-text, same statement)
+RETRIEVAL_HYBRID_LEXICAL = os.getenv("RETRIEVAL_HYBRID_LEXICAL", "bm25")
+RETRIEVAL_RRF_K = int(os.getenv("RETRIEVAL_RRF_K", "60"))
+RETRIEVAL_HYBRID_VECTOR_WEIGHT = float(
+    os.getenv("RETRIEVAL_HYBRID_VECTOR_WEIGHT", "0.5")
+)  # Weight of the vector leg in weighted fusion (lexical gets the rest)
+RETRIEVAL_HYBRID_CANDIDATES = int(
+    os.getenv("RETRIEVAL_HYBRID_CANDIDATES", "4")
+)  # Each leg fetches top_k * this many candidates before fusion
+
+# LLM used for answer generation: "openai" (any OpenAI-compatible API) or "stub"
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+LLM_API_BASE = os.getenv(
+    "LLM_API_BASE", os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+)
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))  # Per request
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))  # In-flight cap
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))  # Pool size
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.25"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "4"))
+LLM_HEDGE_AFTER_SECONDS = (
+    float(os.getenv("LLM_HEDGE_AFTER_SECONDS"))
+    if os.getenv("LLM_HEDGE_AFTER_SECONDS")
+    else None
+)  # Send a duplicate request if no answer after this long (unset = no hedging)
+LLM_STUB_TOKEN_DELAY_SECONDS = float(os.getenv("LLM_STUB_TOKEN_DELAY_SECONDS", "0"))
+
+# LLM context packing: token budget for retrieved text in the prompt
+QNA_CONTEXT_MAX_TOKENS = int(os.getenv("QNA_CONTEXT_MAX_TOKENS", "3000"))
+QNA_CONTEXT_MIN_PASSAGE_TOKENS = int(
+    os.getenv("QNA_CONTEXT_MIN_PASSAGE_TOKENS", "32")
+)  # Stop packing once fewer tokens than this remain
+
+# Answer cache: exact (normalized question + packed context) and semantic tiers
+QNA_ANSWER_CACHE_ENABLED = (
+    os.getenv("QNA_ANSWER_CACHE_ENABLED", "true").lower() == "true"
+)
+QNA_ANSWER_CACHE_SIZE = int(os.getenv("QNA_ANSWER_CACHE_SIZE", "1024"))
+QNA_ANSWER_CACHE_TTL_SECONDS = float(os.getenv("QNA_ANSWER_CACHE_TTL_SECONDS", "3600"))
+QNA_SEMANTIC_CACHE_ENABLED = (
+    os.getenv("QNA_SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+)
+QNA_SEMANTIC_CACHE_SIZE = int(os.getenv("QNA_SEMANTIC_CACHE_SIZE", "1024"))
+QNA_SEMANTIC_CACHE_THRESHOLD = float(
+    os.getenv("QNA_SEMANTIC_CACHE_THRESHOLD", "0.95")
+)  # Minimum cosine similarity between questions
+
+# Single-flight: concurrent identical searches / questions share one computation
+COALESCING_ENABLED = os.getenv("COALESCING_ENABLED", "true").lower() == "true"
+
+# API server processes: >1 runs a prefork master (python -m src.main); with
+# preloading the master loads the embedding model once before forking so
+# workers share its weight pages copy-on-write
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+API_PRELOAD_MODELS = os.getenv("API_PRELOAD_MODELS", "true").lower() == "true"
+# A dead worker is restarted after an exponential backoff; a worker slot that
+# restarts more than API_WORKER_MAX_RESTARTS times within the window stops the
+# server (e.g. a worker that crashes on startup) instead of fork-looping
+API_WORKER_MAX_RESTARTS = int(os.getenv("API_WORKER_MAX_RESTARTS", "5"))
+API_WORKER_RESTART_WINDOW_SECONDS = float(
+    os.getenv("API_WORKER_RESTART_WINDOW_SECONDS", "60")
+)
+
+# Load models in the background right after startup; /ready reports 200 once
+# they are warm (when disabled, once the first request has loaded them)
+API_WARMUP = os.getenv("API_WARMUP", "true").lower() == "true"
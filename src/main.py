@@ -1,21 +1,43 @@
+import asyncio  # Import asyncio to load models off the event loop
 import uvicorn  # Import ASGI server to run FastAPI
 import logging  # Import logging for debugging and monitoring
+import os  # Import os to configure tokenizers before forking
 from fastapi import FastAPI, Request  # Import FastAPI core and request handling
-from sqlalchemy.ext.asyncio import create_async_engine  # Import async SQLAlchemy engine
-from sqlalchemy.ext.asyncio import (
-    AsyncSession,
-)  # Import async session for DB interactions
-from sqlalchemy.orm import (
-    sessionmaker,
-)  # Import sessionmaker to manage database sessions
+from fastapi.responses import JSONResponse  # Import JSON error responses
 from sqlalchemy.sql import text  # Import text function to execute raw SQL queries
-from src.config import DATABASE_URL  # Import database connection URL from config
+from src.config import (
+    API_WORKERS,
+    API_PRELOAD_MODELS,
+    API_WORKER_MAX_RESTARTS,
+    API_WORKER_RESTART_WINDOW_SECONDS,
+    API_WARMUP,
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_WORKERS,
+    EMBEDDING_INTRA_OP_THREADS,
+    EMBEDDING_INTER_OP_THREADS,
+)  # Import database URL and API process settings from config
+from src.backend.core.prefork import serve_prefork  # Import prefork process runner
+from src.backend.core.warmup import Warmup  # Import background model warmup
+from src.backend.database.config import (
+    engine,
+)  # Import the shared async database engine
+from src.services.ingestion_service.model_registry import (
+    get_embedding_generator,
+    model_registry,
+)  # Import shared embedding model loader
+from src.services.qna_service.llm import close_llm_client  # Import LLM pool shutdown
+from src.services.ingestion_service.inference_executor import (
+    InferenceOverloadedError,
+)  # Import inference admission control error
 
-# Import API route modules
-from src.services.qna_service.routes import router as qna_router
+# Import API route modules (models and heavy libraries load on first use / warmup)
+from src.services.qna_service.routes import router as qna_router, get_qna_service
 from src.services.ingestion_service.routes import router as ingestion_router
 from src.services.retrieval_service.routes import router as retrieval_router
 from src.services.selection_service.routes import router as selection_router
+from src.services.monitoring_service.routes import router as monitoring_router
+from src.services.index_service.routes import router as index_router
 
 # ✅ Configure application-wide logging
 logging.basicConfig(
@@ -28,18 +50,20 @@ logger = logging.getLogger(__name__)  # Create logger instance for this module
 # ✅ Initialize FastAPI application
 app = FastAPI(title="RAG-based Q&A System")  # Set API title for documentation
 
-# ✅ Create async database engine
-engine = create_async_engine(
-    DATABASE_URL, echo=True, future=True
-)  # Enable SQL logging for debugging
-
-# ✅ Define async session factory for database transactions
-SessionLocal = sessionmaker(
-    autocommit=False,  # Disable auto-commit (transactions must be explicitly committed)
-    autoflush=False,  # Disable auto-flush (prevents unwanted DB commits)
-    bind=engine,  # Bind session to the database engine
-    class_=AsyncSession,  # Use asynchronous session class
-)
+
+async def warm_models():
+    """
+    ✅ Loads the embedding model and the Q&A service, then embeds one text.
+    - The first embedding starts the inference thread pools, so the first
+      real request does not pay for it.
+    """
+    generator = await asyncio.to_thread(get_embedding_generator)
+    get_qna_service()
+    await generator.generate_embeddings(["warmup"])
+
+
+# ✅ Background warmup; /ready waits for it
+warmup = Warmup(warm_models)
 
 
 # TODO: Cleanup I believe this event is now deprecated
@@ -48,6 +72,50 @@ async def startup():
     """✅ Ensure database connection is working when the app starts."""
     async with engine.connect() as connection:
         await connection.execute(text("SELECT 1"))  # ✅ Simple query to check DB health
+    if API_WARMUP:
+        warmup.start()  # ✅ Serve /health immediately; models load in the background
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """✅ Close pooled LLM connections when the app stops."""
+    await close_llm_client()
+
+
+@app.exception_handler(InferenceOverloadedError)
+async def inference_overloaded(request: Request, exc: InferenceOverloadedError):
+    """✅ A full inference queue is a temporary condition: 503 with Retry-After."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Embedding model is overloaded, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.get("/health")
+async def health():
+    """✅ Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """
+    ✅ Readiness: 200 once the models are warm, 503 while they are loading.
+    - Without startup warmup, or after it failed, ready once a request has
+      loaded the model.
+    """
+    is_ready = warmup.ready or (
+        (not API_WARMUP or warmup.state == "failed")
+        and EMBEDDING_MODEL_NAME in model_registry.generators()
+    )
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "status": "ready" if is_ready else "warming",
+            "warmup": warmup.stats(),
+        },
+    )
 
 
 @app.middleware("http")
@@ -72,7 +140,83 @@ app.include_router(ingestion_router, prefix="/ingestion", tags=["Document Ingest
 app.include_router(retrieval_router, prefix="/retrieval", tags=["Retrieval & Q&A"])
 app.include_router(selection_router, prefix="/selection", tags=["Document Selection"])
 app.include_router(qna_router, prefix="/qna", tags=["Q&A"])
+app.include_router(monitoring_router, prefix="/monitoring", tags=["Monitoring"])
+app.include_router(index_router, prefix="/indexes", tags=["Index Management"])
+
+
+def preload_fork_safe() -> bool:
+    """
+    Whether the configured embedding backend may be loaded before forking.
+    - Decided from config, before anything is loaded: only the in-process
+      torch backend is fork-safe. ONNX Runtime starts thread pools while
+      loading, and a worker pool client opens a socket every worker would share.
+    """
+    return EMBEDDING_BACKEND == "torch" and EMBEDDING_WORKERS == 0
+
+
+def preload_models():
+    """
+    ✅ Loads the embedding model in the prefork master so workers share its weights.
+    - Runs no inference: torch only starts its thread pools on first use, and
+      those threads would not exist in the forked workers.
+    - Backends that are not fork-safe are never loaded here; each worker
+      loads its own copy.
+    """
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    if not preload_fork_safe():
+        logger.warning(
+            f"Embedding backend {EMBEDDING_BACKEND} (workers={EMBEDDING_WORKERS}) "
+            "cannot be shared across fork; workers load their own copy"
+        )
+        return
+    generator = get_embedding_generator()
+    if not generator.fork_safe:
+        model_registry.clear()  # Must not be inherited by the workers
+        logger.warning(
+            f"Embedding backend {generator.backend.name} cannot be shared across "
+            "fork; workers load their own copy"
+        )
+        return
+    generator.freeze()
+    logger.info(
+        f"Preloaded {generator.model_name} "
+        f"({generator.memory_bytes() / 2**20:.1f} MiB of weights shared by workers)"
+    )
+
+
+def after_fork():
+    """
+    ✅ Resets per-process state in a freshly forked worker, before it serves requests.
+    - The database pool must never share connections between processes; the
+      master has not connected, but anything inherited is dropped unclosed.
+    - Torch thread settings are applied in the worker, where its pools start.
+    - Models that cannot cross a fork (thread pools, sockets) are dropped and
+      loaded again on first use.
+    """
+    from src.services.ingestion_service.inference_backends import (
+        configure_torch_threads,
+    )  # Imports torch: loaded by the preloaded model already
+
+    engine.sync_engine.dispose(close=False)
+    if any(not g.fork_safe for g in model_registry.generators().values()):
+        model_registry.clear()
+    configure_torch_threads(EMBEDDING_INTRA_OP_THREADS, EMBEDDING_INTER_OP_THREADS)
+
 
 # ✅ Start FastAPI app with Uvicorn when the script is run directly
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)  # Run API server on port 8000
+    if API_WORKERS > 1:
+        # Prefork: workers fork from this process (uvicorn --workers spawns
+        # fresh interpreters, which would each load their own model copy)
+        serve_prefork(
+            app,
+            host="0.0.0.0",
+            port=8000,
+            workers=API_WORKERS,
+            preload=preload_models if API_PRELOAD_MODELS else None,
+            after_fork=after_fork,
+            max_restarts=API_WORKER_MAX_RESTARTS,
+            restart_window=API_WORKER_RESTART_WINDOW_SECONDS,
+        )
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)  # Run API server on port 8000
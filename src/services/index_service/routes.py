@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException
+from src.services.index_service.service import (
+    IndexBuildInProgressError,
+    VectorIndexService,
+)
+from src.services.index_service.schemas import (
+    IndexCreateRequest,
+    IndexInfo,
+    IndexListResponse,
+)
+
+router = APIRouter()
+
+
+@router.get("/", response_model=IndexListResponse)
+async def list_indexes(service: VectorIndexService = Depends()):
+    """
+    Lists the ANN indexes on the chunks and embeddings tables with their size.
+    """
+    return {"indexes": await service.list_indexes()}
+
+
+@router.post("/", response_model=IndexInfo)
+async def create_index(
+    request: IndexCreateRequest, service: VectorIndexService = Depends()
+):
+    """
+    Builds an HNSW or IVFFlat index with CREATE INDEX CONCURRENTLY.
+    - An INVALID leftover of a failed build is dropped and rebuilt; 409 while
+      a build of the same index is still running.
+    """
+    try:
+        return await service.create_index(request)
+    except IndexBuildInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/{name}/rebuild", response_model=IndexInfo)
+async def rebuild_index(name: str, service: VectorIndexService = Depends()):
+    """
+    Rebuilds an ANN index with REINDEX CONCURRENTLY.
+    """
+    try:
+        return await service.rebuild_index(name)
+    except (LookupError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.delete("/{name}", response_model=dict)
+async def drop_index(name: str, service: VectorIndexService = Depends()):
+    """
+    Drops an ANN index with DROP INDEX CONCURRENTLY.
+    """
+    try:
+        return await service.drop_index(name)
+    except (LookupError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+
+
+class IndexCreateRequest(BaseModel):
+    """
+    Defines the ANN index to build on `<table>.vector`.
+    - `chunks` is what QnA and retrieval search; `embeddings` holds the
+      legacy whole-document vectors.
+    - HNSW uses `m` and `ef_construction` (at least 2 * m, otherwise the
+      build's candidate list is narrower than the graph it links); IVFFlat
+      uses `lists`.
+    """
+
+    table: Literal["chunks", "embeddings"] = "chunks"
+    method: Literal["hnsw", "ivfflat"] = "hnsw"
+    metric: Literal["l2", "inner_product", "cosine"] = "l2"
+    m: int = Field(16, ge=2, le=100)
+    ef_construction: int = Field(64, ge=4, le=1000)
+    lists: int = Field(100, ge=1, le=32768)
+
+    @model_validator(mode="after")
+    def check_ef_construction(self):
+        if self.method == "hnsw" and self.ef_construction < 2 * self.m:
+            raise ValueError(
+                f"ef_construction ({self.ef_construction}) must be at least "
+                f"2 * m ({2 * self.m})"
+            )
+        return self
+
+
+class IndexInfo(BaseModel):
+    """
+    Describes an ANN index on the chunks or embeddings table.
+    """
+
+    name: str
+    table: str
+    method: str
+    definition: str
+    size_bytes: int
+    is_valid: bool
+    build_seconds: Optional[float] = None  # Only known for builds run by this process
+
+
+class IndexListResponse(BaseModel):
+    """
+    Lists the ANN indexes on the chunks and embeddings tables.
+    """
+
+    indexes: List[IndexInfo]
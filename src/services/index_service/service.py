@@ -0,0 +1,197 @@
+import re
+import time
+from sqlalchemy.sql import text  # Import SQL utilities for executing raw queries
+from src.backend.database.config import engine  # Import async database engine
+from .schemas import IndexCreateRequest, IndexInfo  # Import request/response schemas
+
+# pgvector operator classes per distance metric (must match the search operator)
+OPERATOR_CLASSES = {
+    "l2": "vector_l2_ops",
+    "inner_product": "vector_ip_ops",
+    "cosine": "vector_cosine_ops",
+}
+
+# Short metric tags used in index names, e.g. ix_chunks_vector_ip_hnsw
+METRIC_TAGS = {"l2": "l2", "inner_product": "ip", "cosine": "cosine"}
+
+# Tables whose `vector` column has managed ANN indexes
+MANAGED_TABLES = ("chunks", "embeddings")
+
+INDEX_NAME_PATTERN = re.compile(r"^[a-z0-9_]+$")
+
+# Build durations of indexes created or rebuilt by this process
+_build_seconds: dict[str, float] = {}
+
+
+class IndexBuildInProgressError(RuntimeError):
+    """
+    The index is still being built concurrently by another session.
+    """
+
+
+def index_name(method: str, metric: str, table: str = "chunks") -> str:
+    """
+    Returns the conventional name of the ANN index for `method` and `metric`
+    on `table`.
+    """
+    if table not in MANAGED_TABLES:
+        raise ValueError(f"Unsupported table '{table}'")
+    return f"ix_{table}_vector_{METRIC_TAGS[metric]}_{method}"
+
+
+def build_create_index_sql(request: IndexCreateRequest) -> str:
+    """
+    Builds the CREATE INDEX CONCURRENTLY statement for `request`.
+    - All values come from validated enums/integers, never from free text.
+    """
+    if request.method == "hnsw":
+        options = f"m = {request.m}, ef_construction = {request.ef_construction}"
+    else:
+        options = f"lists = {request.lists}"
+
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+        f"{index_name(request.method, request.metric, request.table)} "
+        f"ON {request.table} USING {request.method} "
+        f"(vector {OPERATOR_CLASSES[request.metric]}) WITH ({options})"
+    )
+
+
+class VectorIndexService:
+    """
+    Creates, rebuilds and drops ANN indexes on `chunks.vector` and
+    `embeddings.vector`.
+    - Index DDL runs CONCURRENTLY (outside a transaction), so reads and writes
+      on the table are not blocked while an index builds.
+    - Reports index size and, for builds run by this process, build time.
+    """
+
+    async def _execute_autocommit(self, statement: str) -> float:
+        """
+        Executes `statement` outside a transaction and returns its duration.
+        - Index builds may run far longer than the pool's statement_timeout,
+          so it is lifted for this statement and reset before the connection
+          returns to the pool.
+        """
+        async with engine.connect() as connection:
+            connection = await connection.execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+            await connection.execute(text("SET statement_timeout = 0"))
+            try:
+                started = time.perf_counter()
+                await connection.execute(text(statement))
+                return time.perf_counter() - started
+            finally:
+                await connection.execute(text("RESET statement_timeout"))
+
+    async def list_indexes(self) -> list[IndexInfo]:
+        """
+        Lists HNSW and IVFFlat indexes on the managed tables with their size.
+        """
+        async with engine.connect() as connection:
+            result = await connection.execute(
+                text("""
+                    SELECT c.relname, t.relname, am.amname,
+                           pg_get_indexdef(i.indexrelid),
+                           pg_relation_size(i.indexrelid), i.indisvalid
+                    FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indexrelid
+                    JOIN pg_class t ON t.oid = i.indrelid
+                    JOIN pg_am am ON am.oid = c.relam
+                    WHERE t.relname = ANY(:tables)
+                      AND t.relnamespace = 'public'::regnamespace
+                      AND am.amname IN ('hnsw', 'ivfflat')
+                    ORDER BY c.relname;
+                """),
+                {"tables": list(MANAGED_TABLES)},
+            )
+            return [
+                IndexInfo(
+                    name=name,
+                    table=table,
+                    method=method,
+                    definition=definition,
+                    size_bytes=size_bytes,
+                    is_valid=is_valid,
+                    build_seconds=_build_seconds.get(name),
+                )
+                for name, table, method, definition, size_bytes, is_valid in result.all()
+            ]
+
+    async def get_index(self, name: str) -> IndexInfo:
+        """
+        Returns the ANN index called `name`, raising LookupError if unknown.
+        """
+        for index in await self.list_indexes():
+            if index.name == name:
+                return index
+        raise LookupError(f"Vector index '{name}' not found")
+
+    async def _require_managed_index(self, name: str):
+        """
+        Ensures `name` is a plain identifier naming an existing ANN index, since
+        it is interpolated into DDL.
+        """
+        if not INDEX_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid index name '{name}'")
+        await self.get_index(name)
+
+    async def _build_in_progress(self, name: str) -> bool:
+        """
+        Whether a CREATE INDEX / REINDEX CONCURRENTLY of `name` is running.
+        """
+        async with engine.connect() as connection:
+            result = await connection.execute(
+                text("""
+                    SELECT 1 FROM pg_stat_progress_create_index p
+                    JOIN pg_class c ON c.oid = p.index_relid
+                    WHERE c.relname = :name;
+                """),
+                {"name": name},
+            )
+            return result.first() is not None
+
+    async def create_index(self, request: IndexCreateRequest) -> IndexInfo:
+        """
+        Builds the index described by `request` (no-op if it already exists).
+        - An INVALID index left behind by a failed CONCURRENTLY build would
+          satisfy IF NOT EXISTS but is never used by the planner: it is
+          dropped and built again. One still being built raises
+          IndexBuildInProgressError instead.
+        """
+        name = index_name(request.method, request.metric, request.table)
+        try:
+            existing = await self.get_index(name)
+        except LookupError:
+            existing = None  # Not built yet
+        if existing is not None:
+            if existing.is_valid:
+                return existing
+            if await self._build_in_progress(name):
+                raise IndexBuildInProgressError(f"Index {name} is still being built")
+            await self._execute_autocommit(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+        _build_seconds[name] = await self._execute_autocommit(
+            build_create_index_sql(request)
+        )
+        return await self.get_index(name)
+
+    async def rebuild_index(self, name: str) -> IndexInfo:
+        """
+        Rebuilds an existing ANN index with REINDEX CONCURRENTLY.
+        """
+        await self._require_managed_index(name)
+        _build_seconds[name] = await self._execute_autocommit(
+            f"REINDEX INDEX CONCURRENTLY {name}"
+        )
+        return await self.get_index(name)
+
+    async def drop_index(self, name: str) -> dict:
+        """
+        Drops an existing ANN index with DROP INDEX CONCURRENTLY.
+        """
+        await self._require_managed_index(name)
+        await self._execute_autocommit(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        _build_seconds.pop(name, None)
+        return {"message": f"Index {name} dropped"}
@@ -1,4 +1,3 @@
-import feedparser
 import httpx
 from src.services.ingestion_service.service import DocumentIngestionService
 
@@ -9,6 +8,8 @@ async def fetch_arxiv_papers(question: str, max_results: int = 5):
     """
     Fetches papers from ArXiv based on a query.
     """
+    import feedparser  # Only needed here; kept off the API's import path
+
     params = {
         "search_query": question,
         "start": 0,
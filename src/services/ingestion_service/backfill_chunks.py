@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import logging
+import time
+from sqlalchemy.sql import text
+from src.backend.database.config import AsyncSessionLocal
+from src.services.ingestion_service.service import DocumentIngestionService
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_chunks(batch_size: int = 50) -> dict:
+    """
+    Chunks and embeds every stored document that has no chunks yet.
+    - Walks `documents` in primary-key order (keyset pagination), so the
+      backfill can be interrupted and resumed.
+    - Each batch is embedded in one pass and committed on its own.
+    """
+    service = DocumentIngestionService()
+    last_id = 0
+    documents = 0
+    chunks = 0
+    started = time.perf_counter()
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                rows = (
+                    await db.execute(
+                        text("""
+                            SELECT d.id, convert_from(d.content, 'UTF8') AS content
+                            FROM documents d
+                            WHERE d.id > :last_id AND d.content IS NOT NULL
+                              AND NOT EXISTS (
+                                  SELECT 1 FROM chunks c WHERE c.document_id = d.id
+                              )
+                            ORDER BY d.id
+                            LIMIT :batch_size;
+                        """),
+                        {"last_id": last_id, "batch_size": batch_size},
+                    )
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                rows = [row for row in rows if row.content.strip()]
+                chunks_per_document = [service._chunk(row.content) for row in rows]
+                all_chunks = [
+                    c for doc_chunks in chunks_per_document for c in doc_chunks
+                ]
+                embeddings = await service.embedding_generator.generate_embeddings(
+                    [chunk.text for chunk in all_chunks]
+                )
+
+                offset = 0
+                for row, doc_chunks in zip(rows, chunks_per_document):
+                    vectors = embeddings[offset : offset + len(doc_chunks)]
+                    offset += len(doc_chunks)
+                    db.add_all(service._chunk_rows(row.id, doc_chunks, vectors))
+
+                documents += len(rows)
+                chunks += len(all_chunks)
+
+        logger.info(
+            f"Chunked {documents} documents into {chunks} chunks (last id {last_id})"
+        )
+
+    elapsed = time.perf_counter() - started
+    return {"documents": documents, "chunks": chunks, "seconds": elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Chunk and embed stored documents that have no chunks yet."
+    )
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(backfill_chunks(args.batch_size)))
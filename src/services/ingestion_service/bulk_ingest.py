@@ -0,0 +1,256 @@
+import asyncio
+import io
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+import numpy as np
+from sqlalchemy.sql import text
+from src.config import INGESTION_BULK_BATCH_SIZE
+from src.backend.database.config import AsyncSessionLocal
+from src.backend.database.corpus_version import bump_corpus_version
+from src.services.retrieval_service.bm25_retrieval import index_documents
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkIngestionResult:
+    """
+    Outcome of one bulk ingestion run.
+    """
+
+    documents: int
+    chunks: int
+    batches: int
+    seconds: float
+    documents_per_second: float
+
+
+class BulkIngestionStats:
+    """
+    Keeps the last bulk ingestion result and running totals for monitoring.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.last_run: BulkIngestionResult | None = None
+        self.total_documents = 0
+        self.total_seconds = 0.0
+
+    def record(self, result: BulkIngestionResult):
+        with self._lock:
+            self.last_run = result
+            self.total_documents += result.documents
+            self.total_seconds += result.seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "last_run": asdict(self.last_run) if self.last_run else None,
+                "total_documents": self.total_documents,
+                "total_seconds": self.total_seconds,
+            }
+
+
+# ✅ Process-wide stats, exposed under /monitoring/ingestion
+bulk_ingestion_stats = BulkIngestionStats()
+
+
+def _copy_text(value: str) -> str:
+    """
+    Escapes a value for PostgreSQL COPY text format.
+    """
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_vector(vector: np.ndarray) -> str:
+    """
+    Formats a vector as a pgvector text literal.
+    """
+    return "[" + ",".join(map(str, vector.tolist())) + "]"
+
+
+def _copy_payload(rows) -> io.BytesIO:
+    """
+    Encodes tab-separated rows as a COPY text-format stream.
+    """
+    payload = "".join("\t".join(map(str, row)) + "\n" for row in rows)
+    return io.BytesIO(payload.encode("utf-8"))
+
+
+class BulkIngestionPipeline:
+    """
+    Ingests many documents with embedding and database writes overlapped.
+    - Documents are processed in batches. While batch N is written to the
+      database, batch N+1 is already being chunked and embedded in a worker
+      thread, so neither the model nor the database sits idle.
+    - Each batch is written in one transaction: document ids are reserved from
+      the sequence up front, then documents, embeddings and chunks are
+      streamed in with COPY (no per-row INSERT or flush round trips).
+    - Only one connection is held per batch write, never during model work.
+    """
+
+    def __init__(self, ingestion_service, batch_size: int = INGESTION_BULK_BATCH_SIZE):
+        self.service = ingestion_service
+        self.embedding_generator = ingestion_service.embedding_generator
+        self.batch_size = batch_size
+
+    async def _prepare(self, filenames: list[str], contents: list[str]):
+        """
+        Chunks and embeds one batch; returns (filenames, contents, chunks, vectors).
+        """
+        chunks_per_document = await asyncio.to_thread(
+            lambda: [self.service._chunk(content) for content in contents]
+        )
+        all_chunks = [chunk for chunks in chunks_per_document for chunk in chunks]
+        embeddings = self.service._validate_embeddings(
+            await self.embedding_generator.generate_embeddings(
+                [chunk.text for chunk in all_chunks]
+            ),
+            len(all_chunks),
+        )
+        boundaries = np.cumsum([len(chunks) for chunks in chunks_per_document])[:-1]
+        return (
+            filenames,
+            contents,
+            chunks_per_document,
+            np.split(embeddings, boundaries),
+        )
+
+    async def _write(self, prepared) -> int:
+        """
+        Writes one prepared batch with COPY in a single transaction.
+        """
+        filenames, contents, chunks_per_document, vectors_per_document = prepared
+
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                # ✅ The batch can change search results (all processes, at
+                # commit); locking the version first commits ids in order
+                await bump_corpus_version(db, documents=True)
+                document_ids = (
+                    (
+                        await db.execute(
+                            text("""
+                                SELECT nextval(pg_get_serial_sequence('documents', 'id'))
+                                FROM generate_series(1, :count);
+                            """),
+                            {"count": len(filenames)},
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+
+                connection = await db.connection()
+                raw_connection = await connection.get_raw_connection()
+                driver = raw_connection.driver_connection  # asyncpg connection
+
+                await driver.copy_to_table(
+                    "documents",
+                    source=_copy_payload(
+                        (
+                            document_id,
+                            _copy_text(filename),
+                            "\\\\x" + content.encode("utf-8").hex(),  # bytea hex
+                            "upload",
+                        )
+                        for document_id, filename, content in zip(
+                            document_ids, filenames, contents
+                        )
+                    ),
+                    columns=["id", "filename", "content", "source"],
+                    format="text",
+                )
+                await driver.copy_to_table(
+                    "embeddings",
+                    source=_copy_payload(
+                        (
+                            document_id,
+                            _copy_vector(
+                                np.asarray(self.service._document_vector(vectors))
+                            ),
+                        )
+                        for document_id, vectors in zip(
+                            document_ids, vectors_per_document
+                        )
+                    ),
+                    columns=["document_id", "vector"],
+                    format="text",
+                )
+                await driver.copy_to_table(
+                    "chunks",
+                    source=_copy_payload(
+                        (
+                            document_id,
+                            chunk.chunk_index,
+                            chunk.start_char,
+                            chunk.end_char,
+                            chunk.token_count,
+                            _copy_vector(vector),
+                        )
+                        for document_id, chunks, vectors in zip(
+                            document_ids, chunks_per_document, vectors_per_document
+                        )
+                        for chunk, vector in zip(chunks, vectors)
+                    ),
+                    columns=[
+                        "document_id",
+                        "chunk_index",
+                        "start_char",
+                        "end_char",
+                        "token_count",
+                        "vector",
+                    ],
+                    format="text",
+                )
+
+        await index_documents(list(zip(document_ids, contents)))  # ✅ BM25 postings
+        return sum(len(chunks) for chunks in chunks_per_document)
+
+    async def ingest(self, filenames: list[str], contents: list[str]):
+        """
+        Ingests already validated documents and returns a BulkIngestionResult.
+        """
+        started = time.perf_counter()
+        batches = [
+            (filenames[i : i + self.batch_size], contents[i : i + self.batch_size])
+            for i in range(0, len(contents), self.batch_size)
+        ]
+
+        chunks = 0
+        next_batch = (
+            asyncio.create_task(self._prepare(*batches[0])) if batches else None
+        )
+        for index in range(len(batches)):
+            prepared = await next_batch
+            if index + 1 < len(batches):
+                # ✅ Start embedding the next batch before writing this one
+                next_batch = asyncio.create_task(self._prepare(*batches[index + 1]))
+            try:
+                chunks += await self._write(prepared)
+            except BaseException:
+                if index + 1 < len(batches):
+                    next_batch.cancel()
+                raise
+
+        seconds = time.perf_counter() - started
+        result = BulkIngestionResult(
+            documents=len(contents),
+            chunks=chunks,
+            batches=len(batches),
+            seconds=seconds,
+            documents_per_second=len(contents) / seconds if seconds > 0 else 0.0,
+        )
+        bulk_ingestion_stats.record(result)
+        logger.info(
+            f"Bulk ingested {result.documents} documents ({result.chunks} chunks) "
+            f"in {result.seconds:.2f}s: {result.documents_per_second:.1f} docs/s"
+        )
+        return result
@@ -0,0 +1,106 @@
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Iterator
+from src.config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+# Characters tokenized per step; segments end on whitespace so no word is split
+SEGMENT_CHARS = 16_384
+
+# Special tokens ([CLS] / [SEP]) added around every chunk at embedding time
+SPECIAL_TOKENS = 2
+
+
+@dataclass(frozen=True)
+class TextChunk:
+    """
+    A token-bounded slice of a document.
+    - `start_char` / `end_char` are offsets into the document text (end exclusive).
+    """
+
+    chunk_index: int
+    start_char: int
+    end_char: int
+    token_count: int
+    text: str
+
+
+class TokenChunker:
+    """
+    Splits text into overlapping chunks that fit the embedding model's window.
+    - Text is tokenized segment by segment, and chunks are yielded as soon as
+      a full window of tokens is available, so long documents are never
+      tokenized in one piece.
+    - Consecutive chunks share `overlap_tokens` tokens, so a sentence cut at a
+      chunk boundary is still seen whole by one of the two chunks.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        max_tokens: int = CHUNK_MAX_TOKENS,
+        overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+        lock=None,
+    ):
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("TokenChunker requires a fast tokenizer (offset mapping)")
+
+        self.tokenizer = tokenizer
+        self.window = max_tokens - SPECIAL_TOKENS  # Tokens of text per chunk
+        if not 0 <= overlap_tokens < self.window:
+            raise ValueError("overlap_tokens must be smaller than the chunk window")
+        self.stride = self.window - overlap_tokens
+        self._lock = lock or nullcontext()  # Shared with the embedding generator
+
+    def _segments(self, text: str) -> Iterator[tuple[int, str]]:
+        """
+        Yields (offset, segment) pieces of roughly SEGMENT_CHARS characters.
+        """
+        start = 0
+        while start < len(text):
+            end = min(start + SEGMENT_CHARS, len(text))
+            if end < len(text):
+                # Extend to the next whitespace (bounded) so words stay intact
+                space = text.find(" ", end, end + SEGMENT_CHARS)
+                end = space if space != -1 else end
+            yield start, text[start:end]
+            start = end
+
+    def _token_offsets(self, text: str) -> Iterator[tuple[int, int]]:
+        """
+        Yields the (start, end) character offsets of every token in `text`.
+        """
+        for offset, segment in self._segments(text):
+            with self._lock:
+                encoded = self.tokenizer(
+                    segment, add_special_tokens=False, return_offsets_mapping=True
+                )
+            for start, end in encoded["offset_mapping"]:
+                yield offset + start, offset + end
+
+    def chunk(self, text: str) -> Iterator[TextChunk]:
+        """
+        Yields the chunks of `text` in document order.
+        """
+        pending: list[tuple[int, int]] = []  # Token offsets not yet fully emitted
+        chunk_index = 0
+
+        def make_chunk(tokens: list[tuple[int, int]]) -> TextChunk:
+            start_char, end_char = tokens[0][0], tokens[-1][1]
+            return TextChunk(
+                chunk_index=chunk_index,
+                start_char=start_char,
+                end_char=end_char,
+                token_count=len(tokens),
+                text=text[start_char:end_char],
+            )
+
+        for token in self._token_offsets(text):
+            pending.append(token)
+            if len(pending) == self.window:
+                yield make_chunk(pending)
+                chunk_index += 1
+                pending = pending[self.stride :]  # Keep the overlap
+
+        # Emit the tail unless it is only the overlap of the previous chunk
+        if pending and (chunk_index == 0 or len(pending) > self.window - self.stride):
+            yield make_chunk(pending)
@@ -0,0 +1,240 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+from filelock import FileLock
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = re.compile(r"\s+")
+
+DIGEST_BYTES = 32  # sha256
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of `text` for cache keys.
+    - Runs of whitespace collapse to one space and the ends are stripped; the
+      tokenizer splits on whitespace, so this never changes the embedding.
+    """
+    return WHITESPACE.sub(" ", text).strip()
+
+
+class DiskEmbeddingStore:
+    """
+    Fixed-capacity, memory-mapped float32 store of embeddings on local disk.
+    - `vectors.f32` holds `capacity` rows of `dimension` floats; `keys.bin`
+      holds the sha256 digest stored in each slot (all zeros = empty).
+    - Slots are reused in ring order once the store is full (FIFO eviction);
+      `cursor.i64` counts writes, slot = count % capacity.
+    - Writes are serialized across processes with a file lock. A write clears
+      the slot's key, writes the vector, sets the key and only then advances
+      the cursor. Readers copy the vector and re-check the key afterwards, so
+      a slot being rewritten by another process reads as a miss, never as
+      another text's (or a half-written) vector.
+    - Each process indexes the store when it opens it; on a miss it also
+      indexes the slots other processes have written since (cursor delta).
+    """
+
+    def __init__(self, path: str, dimension: int, capacity: int):
+        os.makedirs(path, exist_ok=True)
+        self.capacity = capacity
+        self._lock = FileLock(os.path.join(path, ".write.lock"))
+
+        self._vectors = self._open(
+            os.path.join(path, "vectors.f32"), np.float32, (capacity, dimension)
+        )
+        self._keys = self._open(
+            os.path.join(path, "keys.bin"), np.uint8, (capacity, DIGEST_BYTES)
+        )
+        self._cursor = self._open(os.path.join(path, "cursor.i64"), np.int64, (1,))
+
+        self._slots: dict[bytes, int] = {}  # digest -> slot
+        self._slot_keys: dict[int, bytes] = {}  # slot -> indexed digest
+        self._seen = 0  # Writes (cursor value) indexed so far
+        self._catch_up()
+
+    @staticmethod
+    def _open(path: str, dtype, shape) -> np.memmap:
+        mode = "r+" if os.path.exists(path) else "w+"
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _index(self, slot: int, digest: bytes):
+        previous = self._slot_keys.pop(slot, None)
+        if previous is not None and self._slots.get(previous) == slot:
+            del self._slots[previous]
+        if digest != bytes(DIGEST_BYTES):
+            self._slots[digest] = slot
+            self._slot_keys[slot] = digest
+
+    def _catch_up(self):
+        """
+        Indexes the slots written (by any process) since the last catch-up.
+        """
+        written = int(self._cursor[0])
+        if written - self._seen >= self.capacity or written < self._seen:
+            slots = range(self.capacity)  # Lapped (or first open): index all
+        else:
+            slots = (count % self.capacity for count in range(self._seen, written))
+        for slot in slots:
+            self._index(slot, self._keys[slot].tobytes())
+        self._seen = written
+
+    def get(self, digest: bytes) -> np.ndarray | None:
+        slot = self._slots.get(digest)
+        if slot is None:
+            self._catch_up()  # Maybe written by another process
+            slot = self._slots.get(digest)
+            if slot is None:
+                return None
+        if self._keys[slot].tobytes() != digest:
+            return None  # Overwritten by another process
+        vector = np.array(self._vectors[slot])
+        if self._keys[slot].tobytes() != digest:
+            return None  # Rewritten while copying: the copy may be torn
+        return vector
+
+    def put(self, digest: bytes, vector: np.ndarray) -> bool:
+        """
+        Stores `vector`; returns True if an older entry had to be evicted.
+        """
+        if digest in self._slots:
+            return False
+
+        with self._lock:
+            written = int(self._cursor[0])
+            slot = written % self.capacity
+            evicted = self._keys[slot].tobytes()
+
+            self._keys[slot] = 0  # Readers of the old entry now miss
+            self._vectors[slot] = vector
+            self._keys[slot] = np.frombuffer(digest, dtype=np.uint8)
+            self._cursor[0] = written + 1
+
+        self._index(slot, digest)
+        return evicted != bytes(DIGEST_BYTES)
+
+    def flush(self):
+        self._vectors.flush()
+        self._keys.flush()
+        self._cursor.flush()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of embeddings keyed by (model id, pooling config, text hash).
+    - Memory tier: bounded LRU of `max_entries` vectors.
+    - Disk tier (optional): a `DiskEmbeddingStore` that survives restarts;
+      disk hits are promoted into the memory tier.
+    - Thread-safe; counts hits per tier, misses and evictions.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        dimension: int,
+        max_entries: int = 10_000,
+        disk_dir: str | None = None,
+        disk_entries: int = 100_000,
+    ):
+        self.namespace = namespace
+        self.dimension = dimension
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.disk = None
+        if disk_dir:
+            store_name = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:16]
+            self.disk = DiskEmbeddingStore(
+                os.path.join(os.path.expanduser(disk_dir), store_name),
+                dimension,
+                disk_entries,
+            )
+
+        # Metrics
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._memory_evictions = 0
+        self._disk_evictions = 0
+
+    def key(self, text: str) -> bytes:
+        """
+        Returns the cache key of `text` under this cache's namespace.
+        """
+        payload = f"{self.namespace}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> np.ndarray | None:
+        """
+        Returns the cached vector for `key`, or None on a miss.
+        """
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self._memory_hits += 1
+                return vector
+
+            vector = self.disk.get(key) if self.disk is not None else None
+            if vector is None:
+                self._misses += 1
+                return None
+
+            self._disk_hits += 1
+            self._remember(key, vector)
+            return vector
+
+    def put(self, key: bytes, vector: np.ndarray):
+        """
+        Stores `vector` in the memory tier and, if enabled, on disk.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self.disk is not None and self.disk.put(key, vector):
+                self._disk_evictions += 1
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._memory_evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss/eviction counters and tier sizes.
+        """
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            return {
+                "memory_entries": len(self._entries),
+                "memory_capacity": self.max_entries,
+                "disk_entries": len(self.disk) if self.disk is not None else None,
+                "disk_capacity": self.disk.capacity if self.disk is not None else None,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": (
+                    (self._memory_hits + self._disk_hits) / lookups if lookups else 0.0
+                ),
+                "memory_evictions": self._memory_evictions,
+                "disk_evictions": self._disk_evictions,
+            }
+
+    def flush(self):
+        """
+        Flushes the disk tier to the file system.
+        """
+        if self.disk is not None:
+            with self._lock:
+                self.disk.flush()
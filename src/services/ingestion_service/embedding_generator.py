@@ -1,6 +1,35 @@
-import asyncio
-import torch
-from transformers import AutoTokenizer, AutoModel
+import threading
+import numpy as np
+from transformers import AutoTokenizer
+from src.config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    EMBEDDING_ONNX_CACHE_DIR,
+    EMBEDDING_BATCHING_ENABLED,
+    EMBEDDING_BATCH_MAX_QUEUE,
+    EMBEDDING_MAX_BATCH_SIZE,
+    EMBEDDING_MAX_BATCH_WAIT_MS,
+    EMBEDDING_BUCKET_SIZE,
+    EMBEDDING_NORMALIZE,
+    EMBEDDING_INTRA_OP_THREADS,
+    EMBEDDING_INTER_OP_THREADS,
+    EMBEDDING_WORKERS,
+    EMBEDDING_WORKER_SOCKET,
+    EMBEDDING_WORKER_AUTHKEY,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_CACHE_DISK_ENTRIES,
+)
+from src.services.ingestion_service.chunker import TokenChunker
+from src.services.ingestion_service.embedding_cache import EmbeddingCache
+from src.services.ingestion_service.inference_backends import create_backend
+from src.services.ingestion_service.inference_executor import inference_executor
+from src.services.ingestion_service.embedding_workers import (
+    EmbeddingWorkerClient,
+    worker_addresses,
+)
+from src.services.ingestion_service.micro_batcher import MicroBatcher
 
 
 class EmbeddingGenerator:
@@ -8,24 +37,262 @@ class EmbeddingGenerator:
     Converts text into embeddings using a pre-trained transformer model.
     """
 
-    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name=EMBEDDING_MODEL_NAME,
+        batching_enabled: bool = EMBEDDING_BATCHING_ENABLED,
+        backend: str = EMBEDDING_BACKEND,
+        normalize: bool = EMBEDDING_NORMALIZE,
+        cache_enabled: bool = EMBEDDING_CACHE_ENABLED,
+        workers: int = EMBEDDING_WORKERS,
+        worker_socket: str = EMBEDDING_WORKER_SOCKET,
+        worker_authkey: str | None = EMBEDDING_WORKER_AUTHKEY,
+    ):
         """
         Loads a pre-trained model and tokenizer for embedding generation.
+        - `backend` selects the inference engine: "torch", "onnx" or "onnx-int8".
+        - `normalize` returns unit-length vectors (masked mean pooling + L2 norm).
+        - `cache_enabled` serves repeated texts from an embedding cache.
+        - With `workers` > 0 the model is not loaded here: texts are embedded
+          by the worker pool listening on `worker_socket` (the pool's backend
+          and normalization apply), authenticated with `worker_authkey`. Only
+          the tokenizer is loaded locally.
         """
+        self.model_name = model_name
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModel.from_pretrained(model_name)
+        self.remote = (
+            EmbeddingWorkerClient(
+                worker_addresses(worker_socket, workers), authkey=worker_authkey
+            )
+            if workers
+            else None
+        )
+        if self.remote is not None:
+            self.backend = self.remote  # Provides name, dimension, memory_bytes
+            normalize = self.remote.normalize
+        else:
+            self.backend = create_backend(
+                backend,
+                model_name,
+                input_names=self.tokenizer.model_input_names,
+                cache_dir=EMBEDDING_ONNX_CACHE_DIR,
+                intra_op_threads=EMBEDDING_INTRA_OP_THREADS,
+                inter_op_threads=EMBEDDING_INTER_OP_THREADS,
+            )
+        self.normalize = normalize
+        self.model = getattr(self.backend, "model", None)  # torch backend only
+
+        # ✅ Model calls run on the bounded, process-wide inference executor
+        self.executor = inference_executor
+
+        # Fast (Rust) tokenizers raise "Already borrowed" when one instance is
+        # called from several threads at once, so tokenization is serialized.
+        self._tokenizer_lock = threading.Lock()
+
+        # ✅ Splits documents into chunks that fit the model's token window
+        self.chunker = TokenChunker(self.tokenizer, lock=self._tokenizer_lock)
+
+        # ✅ Identical texts are embedded once; the key covers everything that
+        # changes the vector (model, backend, pooling, normalization)
+        self.cache = (
+            EmbeddingCache(
+                namespace=(
+                    f"{model_name}|{self.backend.name}|mean|"
+                    f"normalize={normalize}|max_length={self.tokenizer.model_max_length}"
+                ),
+                dimension=self.dimension,
+                max_entries=EMBEDDING_CACHE_SIZE,
+                disk_dir=EMBEDDING_CACHE_DIR,
+                disk_entries=EMBEDDING_CACHE_DISK_ENTRIES,
+            )
+            if cache_enabled
+            else None
+        )
+
+        # ✅ Concurrent generate_embedding calls are coalesced into padded batches
+        self.batcher = (
+            MicroBatcher(
+                self._embed_batch_sync,
+                max_batch_size=EMBEDDING_MAX_BATCH_SIZE,
+                max_wait_ms=EMBEDDING_MAX_BATCH_WAIT_MS,
+                run_fn=self.executor.run,
+                max_concurrency=self.executor.workers,
+                max_queue=EMBEDDING_BATCH_MAX_QUEUE,
+            )
+            if batching_enabled
+            else None
+        )
+
+    def count_tokens(self, texts: list[str]) -> list[int]:
+        """
+        Returns the number of tokens of each text (no special tokens, no truncation).
+        """
+        if not texts:
+            return []
+        with self._tokenizer_lock:
+            encoded = self.tokenizer(
+                list(texts), add_special_tokens=False, verbose=False
+            )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def memory_bytes(self) -> int:
+        """
+        Returns the number of bytes held by the model weights.
+        """
+        return self.backend.memory_bytes()
+
+    @property
+    def fork_safe(self) -> bool:
+        """
+        Whether the loaded model may be inherited by forked worker processes.
+        - False for backends that start threads or open sockets while loading
+          (ONNX Runtime sessions, worker pool clients).
+        """
+        return getattr(self.backend, "fork_safe", False)
+
+    def freeze(self):
+        """
+        Prepares the loaded model for sharing with forked processes (see preload).
+        """
+        freeze = getattr(self.backend, "freeze", None)
+        if freeze is not None:
+            freeze()
+
+    @property
+    def dimension(self) -> int:
+        """
+        Size of the vectors produced by the model.
+        """
+        return self.backend.dimension
+
+    def _encode_sync(
+        self, texts: list[str], bucket_size: int = EMBEDDING_BUCKET_SIZE
+    ) -> np.ndarray:
+        """
+        Embeds `texts` and returns a float32 matrix in the original order.
+        - Cached texts are served from the embedding cache; only the distinct
+          remaining texts go through the model (see `_encode_uncached`).
+        """
+        if self.cache is None:
+            return self._encode_uncached(texts, bucket_size)
+
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        missing: dict[bytes, list[int]] = {}  # Cache key -> positions in `texts`
+        for position, text in enumerate(texts):
+            key = self.cache.key(text)
+            vector = self.cache.get(key) if key not in missing else None
+            if vector is not None:
+                embeddings[position] = vector
+            else:
+                missing.setdefault(key, []).append(position)
+
+        if missing:
+            computed = self._encode_uncached(
+                [texts[positions[0]] for positions in missing.values()], bucket_size
+            )
+            for (key, positions), vector in zip(missing.items(), computed):
+                embeddings[positions] = vector
+                self.cache.put(key, vector)
+        return embeddings
+
+    def _encode_uncached(
+        self, texts: list[str], bucket_size: int = EMBEDDING_BUCKET_SIZE
+    ) -> np.ndarray:
+        """
+        Runs the model on `texts` in length-sorted buckets (no cache lookup).
+        - Texts are tokenized once, sorted by token count and split into buckets.
+        - Each bucket is padded only to its own longest text, so short texts do
+          not pay for the longest one in the batch.
+        - Padding positions are excluded from the mean, so every vector matches
+          what the text would get on its own.
+        - Vectors are L2-normalized when `self.normalize` is set.
+        - Rows are returned in the original order of `texts`.
+        """
+        if self.remote is not None:
+            return self.remote.encode(list(texts))  # ✅ Pooled model process
+
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return embeddings
+
+        with self._tokenizer_lock:
+            encoded = self.tokenizer(list(texts), truncation=True)
+        order = sorted(range(len(texts)), key=lambda i: len(encoded["input_ids"][i]))
+
+        for start in range(0, len(order), bucket_size):
+            bucket = order[start : start + bucket_size]
+            inputs = self._pad_bucket(encoded, bucket)
+            hidden = self.backend.run(inputs)
+            mask = inputs["attention_mask"][..., np.newaxis].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            embeddings[bucket] = pooled
+
+        if self.normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+        return embeddings
+
+    def _pad_bucket(self, encoded, bucket: list[int]) -> dict[str, np.ndarray]:
+        """
+        Pads the pre-tokenized texts at `bucket` to the bucket's longest text.
+        """
+        max_length = max(len(encoded["input_ids"][i]) for i in bucket)
+        inputs = {}
+        for key in encoded.keys():
+            pad_value = self.tokenizer.pad_token_id if key == "input_ids" else 0
+            padded = np.full((len(bucket), max_length), pad_value, dtype=np.int64)
+            for row, i in enumerate(bucket):
+                values = encoded[key][i]
+                padded[row, : len(values)] = values
+            inputs[key] = padded
+        return inputs
+
+    def _embed_batch_sync(self, texts: list[str]) -> list[list[float]]:
+        """
+        Batch function used by the micro-batcher; returns one list per text.
+        """
+        return self._encode_sync(texts).tolist()
+
+    async def generate_embeddings(self, texts: list[str]) -> np.ndarray:
+        """
+        Generates embeddings for many texts at once.
+        - Returns a C-contiguous float32 array of shape (len(texts), dimension),
+          with rows in the same order as `texts`.
+        """
+        return await self.executor.run(self._encode_sync, list(texts))
 
     async def generate_embedding(self, text: str):
         """
         Generates an embedding vector from input text.
+        - A cached text returns immediately, without the batcher or a thread hop.
         """
+        if self.cache is not None:
+            vector = self.cache.get(self.cache.key(text))
+            if vector is not None:
+                return vector.tolist()
+
+        if self.batcher is not None:
+            return await self.batcher.submit(text)
 
         def _generate_embedding_sync(text: str):
-            inputs = self.tokenizer(
-                text, return_tensors="pt", padding=True, truncation=True
-            )
-            with torch.no_grad():
-                output = self.model(**inputs).last_hidden_state.mean(dim=1)
-            return output.squeeze().tolist()  # Convert tensor to list
+            return self._encode_sync([text])[0].tolist()  # Convert array to list
+
+        return await self.executor.run(_generate_embedding_sync, text)
+
+    def cache_stats(self) -> dict | None:
+        """
+        Returns embedding cache metrics, or None when the cache is disabled.
+        """
+        return self.cache.stats() if self.cache is not None else None
 
-        return await asyncio.to_thread(_generate_embedding_sync, text)
+    def worker_stats(self) -> dict | None:
+        """
+        Returns embedding worker pool client metrics, or None for a local model.
+        """
+        return self.remote.stats() if self.remote is not None else None
+
+    def batching_stats(self) -> dict | None:
+        """
+        Returns micro-batching metrics, or None when batching is disabled.
+        """
+        return self.batcher.stats() if self.batcher is not None else None
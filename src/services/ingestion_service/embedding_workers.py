@@ -0,0 +1,423 @@
+import argparse
+import itertools
+import logging
+import mmap
+import multiprocessing
+import os
+import queue
+import re
+import stat
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Connection, Listener
+import numpy as np
+from src.config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_WORKERS,
+    EMBEDDING_WORKER_SOCKET,
+    EMBEDDING_WORKER_AUTHKEY,
+)  # Import embedding worker pool settings
+
+logger = logging.getLogger(__name__)
+
+# Initial size of each connection's result buffer; grown on demand
+INITIAL_BUFFER_BYTES = 1 << 20
+
+# Where POSIX shared memory segments appear as files (Linux)
+SHM_DIR = "/dev/shm"
+
+# Buffer names a worker accepts: one file name directly in SHM_DIR
+BUFFER_NAME_PATTERN = re.compile(r"^/?[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+
+class EmbeddingWorkerError(RuntimeError):
+    """
+    A worker answered a request with an error (the connection stays usable).
+    """
+
+
+def require_authkey(authkey: str | None) -> bytes:
+    """
+    Returns the pool's shared secret; there is no default, so it must be configured.
+    """
+    if not authkey:
+        raise ValueError(
+            "EMBEDDING_WORKER_AUTHKEY must be set when embedding workers are used"
+        )
+    return authkey.encode()
+
+
+def ensure_private_directory(path: str):
+    """
+    Creates the socket directory with mode 0700, or checks that an existing
+    one is a real directory owned by this user and closed to everyone else.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise PermissionError(
+            f"Embedding worker socket directory {path} must be owned by this "
+            "user with mode 0700"
+        )
+
+
+def worker_addresses(socket_base: str, workers: int) -> list[str]:
+    """
+    Returns the Unix socket path of every worker ("<base>.<index>").
+    """
+    return [f"{socket_base}.{index}" for index in range(workers)]
+
+
+class _AttachedBuffers:
+    """
+    Result buffers of one client connection, mapped by name.
+    - The client owns (creates and unlinks) the segments. The worker maps them
+      from /dev/shm directly instead of through SharedMemory, which would
+      register them with a resource tracker that may be shared with the client.
+    """
+
+    def __init__(self):
+        self._buffers: dict[str, mmap.mmap] = {}
+
+    def get(self, name: str) -> mmap.mmap:
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            # The name comes from the client: never let it point outside SHM_DIR
+            if ".." in name or not BUFFER_NAME_PATTERN.match(name):
+                raise ValueError(f"Invalid shared memory buffer name: {name!r}")
+            self.close()  # The client replaced its buffer with a larger one
+            fd = os.open(
+                os.path.join(SHM_DIR, name.lstrip("/")), os.O_RDWR | os.O_NOFOLLOW
+            )
+            try:
+                buffer = mmap.mmap(fd, os.fstat(fd).st_size)
+            finally:
+                os.close(fd)
+            self._buffers[name] = buffer
+        return buffer
+
+    def close(self):
+        for buffer in self._buffers.values():
+            buffer.close()
+        self._buffers.clear()
+
+
+def _serve_connection(connection: Connection, generator):
+    """
+    Answers "embed" requests of one client until it disconnects.
+    - Vectors are written straight into the client's shared buffer; only the
+      row count travels back over the socket.
+    - Every connection has its own thread, but inference runs on the
+      generator's bounded executor, so concurrent clients queue for its
+      workers instead of oversubscribing the CPU; a full queue is answered
+      with an error like any other failed request.
+    """
+    buffers = _AttachedBuffers()
+    try:
+        connection.send(
+            (
+                "hello",
+                {
+                    "pid": os.getpid(),
+                    "model_name": generator.model_name,
+                    "backend": generator.backend.name,
+                    "dimension": generator.dimension,
+                    "normalize": generator.normalize,
+                    "memory_bytes": generator.memory_bytes(),
+                },
+            )
+        )
+        while True:
+            _, texts, buffer_name = connection.recv()
+            try:
+                vectors = generator.executor.submit(
+                    generator._encode_uncached, texts
+                ).result()
+                buffer = buffers.get(buffer_name)
+                np.ndarray(vectors.shape, dtype=np.float32, buffer=buffer)[:] = vectors
+                connection.send(("ok", len(texts)))
+            except Exception as e:
+                logger.error(f"Embedding request failed: {e}", exc_info=True)
+                connection.send(("error", str(e)))
+    except (EOFError, OSError):
+        pass  # Client disconnected
+    finally:
+        buffers.close()
+        connection.close()
+
+
+def _worker_main(address: str, model_name: str, authkey: bytes):
+    """
+    Entry point of one worker process: loads the model, then serves clients.
+    """
+    from src.services.ingestion_service.embedding_generator import (
+        EmbeddingGenerator,
+    )
+
+    generator = EmbeddingGenerator(
+        model_name,
+        batching_enabled=False,  # Clients batch; requests arrive as lists
+        cache_enabled=False,  # Clients cache in front of the pool
+        workers=0,  # This process owns the model
+    )
+    if os.path.exists(address):
+        os.unlink(address)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    logger.info(f"Embedding worker {os.getpid()} listening on {address}")
+    while True:
+        connection = listener.accept()
+        threading.Thread(
+            target=_serve_connection, args=(connection, generator), daemon=True
+        ).start()
+
+
+class EmbeddingWorkerPool:
+    """
+    Starts `workers` local processes that each load the embedding model once
+    and serve API processes over a Unix socket (see `EmbeddingWorkerClient`).
+    - API workers then hold only the tokenizer, not the model weights.
+    """
+
+    def __init__(
+        self,
+        workers: int = max(EMBEDDING_WORKERS, 1),
+        socket_base: str = EMBEDDING_WORKER_SOCKET,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        authkey: str | None = EMBEDDING_WORKER_AUTHKEY,
+    ):
+        self.addresses = worker_addresses(socket_base, workers)
+        self.socket_dir = os.path.dirname(os.path.abspath(socket_base))
+        self.model_name = model_name
+        self.authkey = require_authkey(authkey)
+        self.processes: list[multiprocessing.Process] = []
+
+    def start(self, timeout: float = 120.0) -> "EmbeddingWorkerPool":
+        """
+        Starts the worker processes and waits until every one accepts connections.
+        - The sockets are created in a private directory (see
+          `ensure_private_directory`), so only this user can reach them.
+        """
+        ensure_private_directory(self.socket_dir)
+        context = multiprocessing.get_context("spawn")  # No torch state inherited
+        for address in self.addresses:
+            process = context.Process(
+                target=_worker_main,
+                args=(address, self.model_name, self.authkey),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+
+        deadline = time.monotonic() + timeout
+        for address, process in zip(self.addresses, self.processes):
+            while True:
+                try:
+                    Client(address, family="AF_UNIX", authkey=self.authkey).close()
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    if not process.is_alive():
+                        raise RuntimeError(f"Embedding worker for {address} exited")
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Embedding worker {address} did not start")
+                    time.sleep(0.1)
+        return self
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout=10)
+        for address in self.addresses:
+            if os.path.exists(address):
+                os.unlink(address)
+        self.processes.clear()
+
+    def __enter__(self) -> "EmbeddingWorkerPool":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _WorkerConnection:
+    """
+    One socket to a worker plus the shared buffer its results are written to.
+    """
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.connection = Client(address, family="AF_UNIX", authkey=authkey)
+        _, self.info = self.connection.recv()  # "hello"
+        self.buffer: shared_memory.SharedMemory | None = None
+
+    def ensure_buffer(self, size: int) -> shared_memory.SharedMemory:
+        if self.buffer is None or self.buffer.size < size:
+            self.release_buffer()
+            self.buffer = shared_memory.SharedMemory(
+                create=True, size=max(size, INITIAL_BUFFER_BYTES)
+            )
+        return self.buffer
+
+    def release_buffer(self):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer.unlink()
+            self.buffer = None
+
+    def close(self):
+        self.release_buffer()
+        self.connection.close()
+
+
+class EmbeddingWorkerClient:
+    """
+    Embeds texts in an `EmbeddingWorkerPool` instead of a local model.
+    - Texts go to a worker over its Unix socket; the float32 result matrix
+      comes back through a shared memory buffer owned by the connection, so
+      vectors are never pickled (one memcpy out of the buffer).
+    - Connections are pooled and used by one thread at a time; requests are
+      spread over workers round-robin.
+    - A request whose worker died is retried once on a fresh connection.
+    - After a worker error reply the connection goes back to the pool; after
+      any other failure it is closed, which also unlinks its shared buffer.
+    - Exposes `name`, `dimension` and `memory_bytes` like a local backend.
+    """
+
+    def __init__(
+        self,
+        addresses: list[str],
+        authkey: str | None = EMBEDDING_WORKER_AUTHKEY,
+        connections_per_worker: int = 2,
+    ):
+        self.addresses = addresses
+        self.authkey = require_authkey(authkey)
+        self._idle: queue.LifoQueue[_WorkerConnection] = queue.LifoQueue()
+        self._next_address = itertools.cycle(addresses)
+        self._slots = threading.BoundedSemaphore(
+            len(addresses) * connections_per_worker
+        )
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._requests = 0
+        self._texts = 0
+        self._bytes = 0
+        self._reconnects = 0
+
+        # Model details come from the first worker's handshake
+        connection = self._connect()
+        self.info = connection.info
+        self._idle.put(connection)
+        self.name = f"remote:{self.info['backend']}"
+        self.dimension = self.info["dimension"]
+        self.normalize = self.info["normalize"]
+
+    def _connect(self) -> _WorkerConnection:
+        with self._lock:
+            address = next(self._next_address)
+        return _WorkerConnection(address, self.authkey)
+
+    def memory_bytes(self) -> int:
+        """
+        Model weights held by this process: none, they live in the workers.
+        """
+        return 0
+
+    def _request(self, connection: _WorkerConnection, texts: list[str]) -> np.ndarray:
+        size = len(texts) * self.dimension * 4
+        buffer = connection.ensure_buffer(size)
+        connection.connection.send(("embed", texts, buffer.name))
+        status, value = connection.connection.recv()
+        if status != "ok":
+            raise EmbeddingWorkerError(f"Embedding worker failed: {value}")
+        return np.ndarray(
+            (len(texts), self.dimension), dtype=np.float32, buffer=buffer.buf
+        ).copy()
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """
+        Returns a float32 matrix with one row per text (blocking).
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            try:
+                try:
+                    vectors = self._request(connection, texts)
+                except (EOFError, OSError):
+                    connection.close()
+                    with self._lock:
+                        self._reconnects += 1
+                    connection = self._connect()  # The worker went away; retry once
+                    vectors = self._request(connection, texts)
+            except EmbeddingWorkerError:
+                self._idle.put(connection)  # The worker answered; still in sync
+                raise
+            except BaseException:
+                connection.close()  # Broken or interrupted mid-request
+                raise
+            self._idle.put(connection)
+
+        with self._lock:
+            self._requests += 1
+            self._texts += len(texts)
+            self._bytes += vectors.nbytes
+        return vectors
+
+    def stats(self) -> dict:
+        """
+        Returns request counters and the pool's model details.
+        """
+        with self._lock:
+            return {
+                "workers": len(self.addresses),
+                "model_name": self.info["model_name"],
+                "backend": self.info["backend"],
+                "requests": self._requests,
+                "texts": self._texts,
+                "shared_memory_bytes": self._bytes,
+                "reconnects": self._reconnects,
+                "idle_connections": self._idle.qsize(),
+            }
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the embedding worker pool API processes connect to."
+    )
+    parser.add_argument("--workers", type=int, default=max(EMBEDDING_WORKERS, 1))
+    parser.add_argument("--socket", default=EMBEDDING_WORKER_SOCKET)
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    pool = EmbeddingWorkerPool(args.workers, args.socket, args.model).start()
+    logger.info(f"Embedding worker pool ready: {', '.join(pool.addresses)}")
+    try:
+        for process in pool.processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import inspect
+import logging
+import os
+import re
+import numpy as np
+import torch
+from filelock import FileLock
+from transformers import AutoConfig, AutoModel
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+class TorchBackend:
+    """
+    Runs the transformer with PyTorch eager execution.
+    """
+
+    name = "torch"
+    fork_safe = True  # Thread pools start lazily, on the first inference
+
+    def __init__(
+        self,
+        model_name: str,
+        intra_op_threads: int | None = None,
+        inter_op_threads: int | None = None,
+    ):
+        configure_torch_threads(intra_op_threads, inter_op_threads)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()  # ✅ Inference only; the instance is shared between services
+        self.dimension = self.model.config.hidden_size
+
+    def run(self, inputs: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Returns last_hidden_state for a padded batch of int64 token arrays.
+        """
+        tensors = {key: torch.from_numpy(value) for key, value in inputs.items()}
+        with torch.no_grad():
+            return self.model(**tensors).last_hidden_state.numpy()
+
+    def freeze(self):
+        """
+        Marks all weights read-only for autograd before the process forks.
+        - Nothing writes to the weight storage afterwards, so forked workers
+          keep sharing its pages copy-on-write.
+        """
+        self.model.requires_grad_(False)
+
+    def memory_bytes(self) -> int:
+        """
+        Returns the number of bytes held by the model parameters and buffers.
+        """
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def configure_torch_threads(intra_op_threads: int | None, inter_op_threads: int | None):
+    """
+    Sets torch's process-wide intra-op and inter-op thread pool sizes.
+    - The inter-op pool can only be sized before torch first uses it; a later
+      call keeps the current size and logs a warning.
+    """
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads and torch.get_num_interop_threads() != inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            logger.warning(f"Could not set torch inter-op threads: {e}")
+
+
+class OnnxBackend:
+    """
+    Runs the transformer with ONNX Runtime on CPU.
+    - The model is exported to ONNX once and cached on local disk.
+    - With `quantize=True` the cached export is additionally converted to
+      dynamic int8 (weights quantized, activations quantized at runtime).
+    """
+
+    fork_safe = False  # The session starts its thread pools when created
+
+    def __init__(
+        self,
+        model_name: str,
+        input_names: list[str],
+        cache_dir: str,
+        quantize: bool = False,
+        intra_op_threads: int | None = None,
+        inter_op_threads: int | None = None,
+    ):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError(
+                "The onnx backends require the `onnx` and `onnxruntime` packages."
+            ) from e
+
+        self.name = "onnx-int8" if quantize else "onnx"
+        self.dimension = AutoConfig.from_pretrained(model_name).hidden_size
+        self.model_path = ensure_onnx_model(
+            model_name, input_names, cache_dir, quantize
+        )
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = onnxruntime.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def run(self, inputs: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Returns last_hidden_state for a padded batch of int64 token arrays.
+        """
+        feed = {node.name: inputs[node.name] for node in self.session.get_inputs()}
+        return self.session.run(["last_hidden_state"], feed)[0]
+
+    def memory_bytes(self) -> int:
+        """
+        Returns the size of the ONNX model file (weights are mapped from it).
+        """
+        return os.path.getsize(self.model_path)
+
+
+def _cache_path(model_name: str, cache_dir: str) -> str:
+    """
+    Returns the per-model cache directory inside `cache_dir`.
+    """
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name.strip("/"))
+    return os.path.join(os.path.expanduser(cache_dir), safe_name)
+
+
+def ensure_onnx_model(
+    model_name: str, input_names: list[str], cache_dir: str, quantize: bool
+) -> str:
+    """
+    Exports (and optionally quantizes) the model unless a cached artifact exists.
+    - A file lock keeps concurrent workers from exporting the same model twice.
+    - Artifacts are written to a temporary name and renamed into place.
+    """
+    model_dir = _cache_path(model_name, cache_dir)
+    os.makedirs(model_dir, exist_ok=True)
+    fp32_path = os.path.join(model_dir, "model.onnx")
+    int8_path = os.path.join(model_dir, "model.int8.onnx")
+    target_path = int8_path if quantize else fp32_path
+
+    with FileLock(os.path.join(model_dir, ".export.lock")):
+        if os.path.exists(target_path):
+            return target_path
+
+        if not os.path.exists(fp32_path):
+            logger.info(f"Exporting {model_name} to ONNX at {fp32_path}")
+            _export_onnx(model_name, input_names, fp32_path + ".tmp")
+            os.replace(fp32_path + ".tmp", fp32_path)
+
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info(f"Quantizing {fp32_path} to int8")
+            quantize_dynamic(fp32_path, int8_path + ".tmp", weight_type=QuantType.QInt8)
+            os.replace(int8_path + ".tmp", int8_path)
+
+    return target_path
+
+
+def _export_onnx(model_name: str, input_names: list[str], path: str):
+    """
+    Exports the transformer's last_hidden_state with dynamic batch/sequence axes.
+    """
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    model.config.return_dict = False  # Tuple outputs trace cleanly
+
+    # Graph inputs are bound positionally, so follow the forward() signature
+    parameters = list(inspect.signature(model.forward).parameters)
+    input_names = sorted(input_names, key=parameters.index)
+
+    dummy = {name: torch.ones((1, 8), dtype=torch.int64) for name in input_names}
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy,),
+            path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            dynamo=False,
+        )
+
+
+def create_backend(
+    backend_name: str,
+    model_name: str,
+    input_names: list[str],
+    cache_dir: str,
+    intra_op_threads: int | None = None,
+    inter_op_threads: int | None = None,
+):
+    """
+    Builds the inference backend selected by configuration.
+    - `intra_op_threads` / `inter_op_threads` size the engine's CPU thread pools.
+    """
+    if backend_name == "torch":
+        return TorchBackend(model_name, intra_op_threads, inter_op_threads)
+    if backend_name in ("onnx", "onnx-int8"):
+        return OnnxBackend(
+            model_name,
+            input_names,
+            cache_dir,
+            quantize=backend_name == "onnx-int8",
+            intra_op_threads=intra_op_threads,
+            inter_op_threads=inter_op_threads,
+        )
+    raise ValueError(
+        f"Unknown embedding backend '{backend_name}'. "
+        f"Expected one of: {', '.join(SUPPORTED_BACKENDS)}"
+    )
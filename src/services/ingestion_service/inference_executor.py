@@ -0,0 +1,154 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+from src.config import (
+    EMBEDDING_EXECUTOR_WORKERS,
+    EMBEDDING_EXECUTOR_MAX_QUEUE,
+)  # Import inference executor sizing
+
+
+class InferenceOverloadedError(RuntimeError):
+    """
+    Raised when the inference queue is full; callers should retry later (HTTP 503).
+    """
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool dedicated to model inference.
+    - Model calls no longer share asyncio's default executor with file and
+      database helpers, and at most `workers` of them run at once; together
+      with the backend's intra-op thread count this caps CPU threads at
+      roughly workers x intra-op threads instead of oversubscribing cores.
+    - Admission control: at most `max_queue` jobs wait for a worker; beyond
+      that `run` fails fast with InferenceOverloadedError instead of letting
+      queueing delay (and p99 latency) grow without bound.
+    - Queue wait and compute time are recorded separately per job.
+    - Safe across fork (preload mode): a forked child gets fresh threads and
+      lock instead of the parent's, which do not exist in the child.
+    """
+
+    def __init__(
+        self,
+        workers: int = EMBEDDING_EXECUTOR_WORKERS,
+        max_queue: int = EMBEDDING_EXECUTOR_MAX_QUEUE,
+        latency_window: int = 1000,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.workers = workers
+        self.max_queue = max_queue
+        self._latency_window = latency_window
+        self._reset()
+
+        # ✅ Re-create threads and lock in forked children (weakref: no leak)
+        ref = weakref.ref(self)
+        os.register_at_fork(
+            after_in_child=lambda: (executor := ref()) and executor._reset()
+        )
+
+    def _reset(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="inference"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0  # Queued + running jobs
+        self._running = 0
+
+        # Metrics
+        self._completed = 0
+        self._rejected = 0
+        self._waits: deque[float] = deque(maxlen=self._latency_window)
+        self._computes: deque[float] = deque(maxlen=self._latency_window)
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """
+        Schedules `fn(*args)` on an inference thread and returns its future.
+        - For callers on plain threads (no event loop); `run` awaits the same.
+        - Raises InferenceOverloadedError when `max_queue` jobs are already waiting.
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise InferenceOverloadedError(
+                    f"Inference queue is full ({self.max_queue} jobs waiting)"
+                )
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._waits.append(started - submitted)
+                    self._computes.append(finished - started)
+
+        try:
+            future = self._executor.submit(job)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)  # Also runs if cancelled before start
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Runs `fn(*args)` on an inference thread and returns its result.
+        - Raises InferenceOverloadedError when `max_queue` jobs are already waiting.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict:
+        """
+        Returns queue depth, rejections and queue-wait / compute percentiles.
+        """
+        with self._lock:
+            waits = sorted(self._waits)
+            computes = sorted(self._computes)
+            pending, running = self._pending, self._running
+            completed, rejected = self._completed, self._rejected
+
+        def _summary(values: list[float]) -> dict:
+            def _percentile(fraction: float) -> float:
+                if not values:
+                    return 0.0
+                return values[min(int(fraction * len(values)), len(values) - 1)]
+
+            return {
+                "mean": sum(values) / len(values) * 1000 if values else 0.0,
+                "p50": _percentile(0.50) * 1000,
+                "p95": _percentile(0.95) * 1000,
+                "p99": _percentile(0.99) * 1000,
+            }
+
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": max(pending - running, 0),
+            "completed": completed,
+            "rejected": rejected,
+            "queue_wait_ms": _summary(waits),
+            "compute_ms": _summary(computes),
+        }
+
+
+# ✅ One executor per process: torch's thread settings are process-wide too
+inference_executor = InferenceExecutor()
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+from .inference_executor import InferenceOverloadedError
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch-size histogram buckets (the last bucket is open-ended)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into batched calls.
+    - Callers `await submit(item)` and get back their own result.
+    - A background worker drains the queue into batches of up to `max_batch_size`
+      items, waiting at most `max_wait_ms` for a batch to fill.
+    - Each batch is handed to `batch_fn` (a blocking function) through
+      `run_fn` (default: `asyncio.to_thread`), e.g. a dedicated executor.
+      It must return one result per item, in order; otherwise every caller
+      in the batch gets an error rather than a misaligned result.
+    - Up to `max_concurrency` batches run at once (match the executor's
+      workers); while all are busy, waiting items form the next batch.
+    - Admission control: with `max_queue` items already waiting, `submit`
+      raises InferenceOverloadedError instead of queueing without bound.
+      Time spent waiting in the queue is reported separately.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list], list],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        latency_window: int = 1000,
+        run_fn: Callable[..., Awaitable[Any]] = asyncio.to_thread,
+        max_concurrency: int = 1,
+        max_queue: int | None = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.batch_fn = batch_fn
+        self.run_fn = run_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._worker: asyncio.Task | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+        # Metrics
+        self._batches = 0
+        self._items = 0
+        self._histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._histogram_overflow = 0
+        self._rejected = 0
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._waits: deque[float] = deque(maxlen=latency_window)
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queues a single item and waits for its result from the next batch.
+        - Raises InferenceOverloadedError when `max_queue` items are waiting.
+        """
+        queue = self._ensure_worker()
+        if self.max_queue is not None and queue.qsize() >= self.max_queue:
+            self._rejected += 1
+            raise InferenceOverloadedError(
+                f"Embedding batch queue is full ({self.max_queue} items waiting)"
+            )
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        """
+        Starts the worker task on the running loop if it is not already running.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # The queue and worker are bound to the loop they were created on
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._worker = None
+            self._batch_tasks = set()
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def _collect_batch(self, queue: asyncio.Queue) -> list:
+        """
+        Waits for one item, then keeps collecting until the batch is full or
+        the wait budget is spent.
+        """
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.max_wait_seconds
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without yielding to the loop
+            while not queue.empty() and len(batch) < self.max_batch_size:
+                batch.append(queue.get_nowait())
+            if len(batch) >= self.max_batch_size:
+                break
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        """
+        Worker loop: wait for a free batch slot, collect a batch, start it.
+        - The worker exits once the queue is drained; `submit` restarts it, so
+          no task is left pending on an idle (or closing) event loop.
+        """
+        queue, slots = self._queue, self._slots
+        while not queue.empty():
+            await slots.acquire()
+            if queue.empty():
+                slots.release()
+                break
+            batch = await self._collect_batch(queue)
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch, slots))
+            self._batch_tasks.add(task)  # Keep a reference until it finishes
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: list, slots: asyncio.Semaphore):
+        """
+        Runs one batch in a thread and resolves its futures (releases its slot).
+        """
+        try:
+            # Drop callers that gave up while waiting in the queue
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                return
+
+            items = [item for item, _, _ in batch]
+            started = time.perf_counter()
+            self._waits.extend(started - queued for _, _, queued in batch)
+            try:
+                results = await self.run_fn(self.batch_fn, items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"batch_fn returned {len(results)} results for "
+                        f"{len(items)} items"
+                    )
+            except Exception as e:
+                logger.error(f"Batch of {len(items)} items failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                self._record_batch(len(items), time.perf_counter() - started)
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            slots.release()
+
+    def _record_batch(self, size: int, latency_seconds: float):
+        self._batches += 1
+        self._items += size
+        self._latencies.append(latency_seconds)
+        for bucket in BATCH_SIZE_BUCKETS:
+            if size <= bucket:
+                self._histogram[bucket] += 1
+                break
+        else:
+            self._histogram_overflow += 1
+
+    def stats(self) -> dict:
+        """
+        Returns queue depth, batch-size histogram and per-batch latency figures.
+        """
+        latencies = sorted(self._latencies)
+        waits = sorted(self._waits)
+
+        def _percentile(fraction: float, values: list[float] = latencies) -> float:
+            if not values:
+                return 0.0
+            return values[min(int(fraction * len(values)), len(values) - 1)]
+
+        histogram = {f"<={bucket}": count for bucket, count in self._histogram.items()}
+        histogram[f">{BATCH_SIZE_BUCKETS[-1]}"] = self._histogram_overflow
+
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "rejected": self._rejected,
+            "running_batches": len(self._batch_tasks),
+            "max_concurrency": self.max_concurrency,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            "batch_size_histogram": histogram,
+            "batch_latency_ms": {
+                "last": self._latencies[-1] * 1000 if self._latencies else 0.0,
+                "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+                "p50": _percentile(0.50) * 1000,
+                "p95": _percentile(0.95) * 1000,
+                "p99": _percentile(0.99) * 1000,
+            },
+            "queue_wait_ms": {
+                "mean": sum(waits) / len(waits) * 1000 if waits else 0.0,
+                "p50": _percentile(0.50, waits) * 1000,
+                "p95": _percentile(0.95, waits) * 1000,
+                "p99": _percentile(0.99, waits) * 1000,
+            },
+        }
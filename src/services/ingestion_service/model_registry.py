@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from src.config import EMBEDDING_MODEL_NAME
+
+if TYPE_CHECKING:  # Imported on first load: pulls in torch and transformers
+    from src.services.ingestion_service.embedding_generator import EmbeddingGenerator
+
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_bytes() -> int:
+    """
+    Returns the resident set size of this process (0 if it cannot be read).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+@dataclass
+class ModelStats:
+    """
+    Load statistics recorded for every model held by the registry.
+    """
+
+    model_name: str
+    load_seconds: float
+    parameter_bytes: int
+    rss_delta_bytes: int
+
+
+class ModelRegistry:
+    """
+    Loads each embedding model once per process and hands out shared handles.
+    - Loading is guarded by a lock so concurrent first requests load the model once.
+    - Load time and memory usage are recorded per model.
+    - torch / transformers are imported with the first model, so importing
+      the API does not pay for them.
+    """
+
+    def __init__(self):
+        self._generators: dict[str, "EmbeddingGenerator"] = {}
+        self._stats: dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def get_embedding_generator(
+        self, model_name: str = EMBEDDING_MODEL_NAME
+    ) -> "EmbeddingGenerator":
+        """
+        Returns the shared EmbeddingGenerator for `model_name`, loading it on first use.
+        """
+        generator = self._generators.get(model_name)
+        if generator is not None:
+            return generator  # ✅ Fast path without taking the lock
+
+        with self._lock:
+            generator = self._generators.get(model_name)
+            if generator is None:
+                from src.services.ingestion_service.embedding_generator import (
+                    EmbeddingGenerator,
+                )
+
+                rss_before = _current_rss_bytes()
+                started = time.perf_counter()
+                generator = EmbeddingGenerator(model_name)
+                load_seconds = time.perf_counter() - started
+
+                self._stats[model_name] = ModelStats(
+                    model_name=model_name,
+                    load_seconds=load_seconds,
+                    parameter_bytes=generator.memory_bytes(),
+                    rss_delta_bytes=max(_current_rss_bytes() - rss_before, 0),
+                )
+                self._generators[model_name] = generator
+                logger.info(
+                    f"Loaded embedding model {model_name} in {load_seconds:.2f}s"
+                )
+        return generator
+
+    def stats(self) -> list[ModelStats]:
+        """
+        Returns load statistics for every model loaded so far.
+        """
+        with self._lock:
+            return list(self._stats.values())
+
+    def generators(self) -> dict[str, "EmbeddingGenerator"]:
+        """
+        Returns the loaded generators keyed by model name.
+        """
+        with self._lock:
+            return dict(self._generators)
+
+    def clear(self):
+        """
+        Drops all loaded models (used by tests and on reload).
+        """
+        with self._lock:
+            self._generators.clear()
+            self._stats.clear()
+
+
+# ✅ Process-wide registry shared by all services
+model_registry = ModelRegistry()
+
+
+def get_embedding_generator(model_name: str = EMBEDDING_MODEL_NAME):
+    """
+    Returns the process-wide shared EmbeddingGenerator.
+    """
+    return model_registry.get_embedding_generator(model_name)
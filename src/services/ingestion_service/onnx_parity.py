@@ -0,0 +1,71 @@
+import argparse
+import sys
+import numpy as np
+from src.config import EMBEDDING_MODEL_NAME
+from src.services.ingestion_service.embedding_generator import EmbeddingGenerator
+
+SAMPLE_TEXTS = [
+    "Artificial Intelligence is transforming industries.",
+    "Machine Learning is a subset of AI that learns from data.",
+    "Deep learning uses neural networks for complex tasks.",
+    "The football team won the championship after a tough season.",
+    "Learn how to cook delicious meals with simple ingredients.",
+    "What are the negative impacts of PC gaming?",
+    "",
+]
+
+
+def check_parity(
+    backend: str, texts: list[str] = SAMPLE_TEXTS, model_name=EMBEDDING_MODEL_NAME
+) -> dict:
+    """
+    Embeds `texts` with the torch backend and with `backend`, and reports drift.
+    - Cosine similarity is computed row by row between the two outputs.
+    - `max_cosine_drift` is 1 - the lowest similarity seen.
+    """
+    reference = EmbeddingGenerator(model_name, batching_enabled=False, backend="torch")
+    candidate = EmbeddingGenerator(model_name, batching_enabled=False, backend=backend)
+
+    expected = reference._encode_uncached(texts)
+    actual = candidate._encode_uncached(texts)
+
+    cosine = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    return {
+        "backend": backend,
+        "texts": len(texts),
+        "dimension": int(actual.shape[1]),
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "max_cosine_drift": float(1 - cosine.min()),
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare ONNX embeddings against the torch reference output."
+    )
+    parser.add_argument("--backend", default="onnx-int8", choices=["onnx", "onnx-int8"])
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument(
+        "--max-drift",
+        type=float,
+        default=0.01,
+        help="Exit with status 1 if 1 - min cosine similarity exceeds this value.",
+    )
+    args = parser.parse_args()
+
+    report = check_parity(args.backend, model_name=args.model)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+    if report["max_cosine_drift"] > args.max_drift:
+        print(f"❌ Cosine drift exceeds {args.max_drift}")
+        sys.exit(1)
+    print("✅ Parity check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import logging
+import time
+import numpy as np
+from sqlalchemy.sql import text
+from src.backend.database.config import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Rows whose norm is already within this distance of 1 are left untouched
+NORM_TOLERANCE = 1e-4
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scales every row of `vectors` to unit L2 norm (zero rows stay zero).
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+async def renormalize_embeddings(batch_size: int = 1000) -> dict:
+    """
+    Re-normalizes every stored embedding to unit length, in bulk.
+    - Walks the `embeddings` table in primary-key order (keyset pagination).
+    - Normalizes each batch in NumPy and writes it back with one UPDATE ... FROM
+      unnest(...) statement per batch, committing batch by batch.
+    - Rows that are already unit length are skipped.
+    """
+    last_id = 0
+    scanned = 0
+    updated = 0
+    started = time.perf_counter()
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                rows = (
+                    await db.execute(
+                        text("""
+                            SELECT id, CAST(vector AS real[]) FROM embeddings
+                            WHERE id > :last_id AND vector IS NOT NULL
+                            ORDER BY id
+                            LIMIT :batch_size;
+                        """),
+                        {"last_id": last_id, "batch_size": batch_size},
+                    )
+                ).all()
+                if not rows:
+                    break
+
+                ids = np.array([row[0] for row in rows])
+                vectors = np.array([row[1] for row in rows], dtype=np.float32)
+                last_id = int(ids[-1])
+                scanned += len(rows)
+
+                norms = np.linalg.norm(vectors, axis=1)
+                stale = np.abs(norms - 1.0) > NORM_TOLERANCE
+                stale &= norms > 0  # Zero vectors cannot be normalized
+                if not stale.any():
+                    continue
+
+                normalized = normalize_rows(vectors[stale])
+                await db.execute(
+                    text("""
+                        UPDATE embeddings AS e
+                        SET vector = CAST(v.vector AS vector)
+                        FROM unnest(CAST(:ids AS integer[]), CAST(:vectors AS text[]))
+                            AS v(id, vector)
+                        WHERE e.id = v.id;
+                    """),
+                    {
+                        "ids": ids[stale].tolist(),
+                        "vectors": [
+                            "[" + ",".join(map(str, row)) + "]"
+                            for row in normalized.tolist()
+                        ],
+                    },
+                )
+                updated += int(stale.sum())
+
+        logger.info(f"Re-normalized {updated}/{scanned} embeddings (last id {last_id})")
+
+    elapsed = time.perf_counter() - started
+    return {"scanned": scanned, "updated": updated, "seconds": elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Re-normalize stored embeddings to unit length."
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(renormalize_embeddings(args.batch_size)))
@@ -32,6 +32,8 @@ async def ingest_documents_batch(
 ):
     """
     Handles batch ingestion of multiple documents asynchronously.
+    - Uses the pipelined bulk path (COPY writes overlapped with embedding),
+      so large batches (10k+ documents) complete in one request.
     """
     return await service.process_documents_batch(
         request.documents
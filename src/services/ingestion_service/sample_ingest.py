@@ -1,12 +1,12 @@
 from backend.database.config import AsyncSessionLocal
 from backend.database.models import Document, Embedding, SelectedDocument
-from src.services.ingestion_service.embedding_generator import EmbeddingGenerator
+from src.services.ingestion_service.model_registry import get_embedding_generator
 import numpy as np
 
 
 def ingest_sample_documents():
     db = AsyncSessionLocal()
-    embedding_generator = EmbeddingGenerator()
+    embedding_generator = get_embedding_generator()
 
     sample_docs = [
         # AI-related documents
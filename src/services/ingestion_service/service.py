@@ -1,18 +1,28 @@
+import numpy as np
 from src.services.ingestion_service.schemas import (
     DocumentUploadRequest,
 )  # Import schema for document upload request
-from src.services.ingestion_service.embedding_generator import (
-    EmbeddingGenerator,
-)  # Import embedding generator
+from src.services.ingestion_service.model_registry import (
+    get_embedding_generator,
+)  # Import shared embedding generator
+from src.services.ingestion_service.chunker import TextChunk  # Import chunk type
+from src.services.ingestion_service.bulk_ingest import (
+    BulkIngestionPipeline,
+)  # Import pipelined bulk writer
 from src.backend.database.config import (
     AsyncSessionLocal,
 )  # Import async database session
+from src.backend.database.corpus_version import (
+    bump_corpus_version,
+)  # Import shared corpus version (result-cache invalidation)
+from src.services.retrieval_service.bm25_retrieval import (
+    index_documents,
+)  # Import incremental BM25 indexing
 from src.backend.database.models import (
+    Chunk,
     Document,
     Embedding,
-)  # Import ORM models for document and embedding
-
-import asyncio  # Import asyncio for asynchronous operations
+)  # Import ORM models for document, embedding and chunks
 
 
 class DocumentIngestionService:
@@ -22,16 +32,13 @@ class DocumentIngestionService:
 
     def __init__(self):
         self.embedding_generator = (
-            EmbeddingGenerator()
-        )  # Initialize embedding generator instance
+            get_embedding_generator()
+        )  # Shared, process-wide embedding generator instance
 
-    async def process_document(self, filename: str, content: str | bytes):
+    @staticmethod
+    def _validate_content(content: str | bytes | None) -> str:
         """
-        Processes a single document:
-        - Ensures content is valid.
-        - Stores document in the database.
-        - Generates an embedding vector.
-        - Stores embedding in the database.
+        Ensures content is present and non-blank, decoding bytes as UTF-8.
         """
         if content is None:
             raise ValueError(
@@ -46,41 +53,116 @@ class DocumentIngestionService:
                 "Document content cannot be empty"
             )  # Ensure content is not just whitespace
 
+        return content
+
+    def _chunk(self, content: str) -> list[TextChunk]:
+        """
+        Splits content into token-bounded chunks (at least one per document).
+        """
+        chunks = list(self.embedding_generator.chunker.chunk(content))
+        return chunks or [TextChunk(0, 0, len(content), 0, content)]
+
+    @staticmethod
+    def _validate_embeddings(embeddings, count: int) -> np.ndarray:
+        """
+        Ensures the model returned one float vector per chunk.
+        """
+        if (
+            not isinstance(embeddings, np.ndarray)
+            or embeddings.ndim != 2
+            or len(embeddings) != count
+            or not np.issubdtype(embeddings.dtype, np.number)
+        ):
+            raise TypeError("Embeddings must be a float matrix with one row per chunk.")
+        return embeddings
+
+    def _document_vector(self, chunk_vectors: np.ndarray) -> list[float]:
+        """
+        Pools chunk vectors into one document-level vector (mean, then L2 norm).
+        - Replaces the old whole-document embedding, which the tokenizer
+          silently truncated after 512 tokens.
+        """
+        vector = chunk_vectors.mean(axis=0)
+        if self.embedding_generator.normalize:
+            vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        return vector.tolist()
+
+    @staticmethod
+    def _chunk_rows(document_id: int, chunks: list[TextChunk], vectors: np.ndarray):
+        return [
+            Chunk(
+                document_id=document_id,
+                chunk_index=chunk.chunk_index,
+                start_char=chunk.start_char,
+                end_char=chunk.end_char,
+                token_count=chunk.token_count,
+                vector=vector,
+            )
+            for chunk, vector in zip(chunks, vectors)
+        ]
+
+    async def process_document(self, filename: str, content: str | bytes):
+        """
+        Processes a single document:
+        - Ensures content is valid.
+        - Splits it into overlapping, token-bounded chunks.
+        - Embeds all chunks in one batched pass (before opening a transaction).
+        - Stores the document, its chunks and a pooled document embedding.
+        - Adds the document to the in-memory BM25 index.
+        """
+        content = self._validate_content(content)
+        chunks = self._chunk(content)
+
+        # Generate chunk embeddings asynchronously
+        chunk_vectors = self._validate_embeddings(
+            await self.embedding_generator.generate_embeddings(
+                [chunk.text for chunk in chunks]
+            ),
+            len(chunks),
+        )
+
         async with AsyncSessionLocal() as db:  # Open async database session
             async with db.begin():  # Start a database transaction
+                # ✅ New chunks can change search results (all processes, at
+                # commit); locking the version first commits ids in order
+                await bump_corpus_version(db, documents=True)
                 document = Document(
                     filename=filename, content=content.encode("utf-8")
                 )  # Create document entry
                 db.add(document)
                 await db.flush()  # Ensure document.id is generated before using it
 
-                # Generate embedding asynchronously
-                embedding_vector = await self.embedding_generator.generate_embedding(
-                    content
-                )
-
-                # Validate embedding vector format
-                if not isinstance(embedding_vector, list) or not all(
-                    isinstance(val, (float, int)) for val in embedding_vector
-                ):
-                    raise TypeError("Embedding vector must be a list of floats/ints.")
-
                 # Create embedding entry linked to document
-                embedding_entry = Embedding(
-                    document_id=document.id, vector=embedding_vector
+                db.add(
+                    Embedding(
+                        document_id=document.id,
+                        vector=self._document_vector(chunk_vectors),
+                    )
                 )
-                db.add(embedding_entry)
+                db.add_all(self._chunk_rows(document.id, chunks, chunk_vectors))
+                document_id = document.id  # Attributes expire on commit
 
-            await db.commit()  # Commit transaction to save document and embedding
+            await db.commit()  # Commit transaction to save document and embeddings
+
+        await index_documents([(document_id, content)])  # ✅ Add to BM25 index
 
         return {"message": "Document processed successfully"}  # Return success response
 
     async def process_documents_batch(self, documents: list[DocumentUploadRequest]):
         """
-        Processes multiple documents concurrently using asyncio.gather.
-        - Each document is processed independently in parallel.
+        Processes many documents through the bulk ingestion pipeline:
+        - Validates and decodes every document up front.
+        - Chunks and embeds batch N+1 while batch N is written with COPY
+          (see `BulkIngestionPipeline`); each batch commits on its own.
         """
-        tasks = [
-            self.process_document(doc.filename, doc.content) for doc in documents
-        ]  # Create tasks for each document
-        return await asyncio.gather(*tasks)  # Execute all tasks concurrently
+        contents = [
+            self._validate_content(doc.content) for doc in documents
+        ]  # Raise before any model or database work
+        if not contents:
+            return []
+
+        await BulkIngestionPipeline(self).ingest(
+            [doc.filename for doc in documents], contents
+        )
+
+        return [{"message": "Document processed successfully"} for _ in contents]
@@ -0,0 +1,71 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Libraries the API must not import before a model is actually needed
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "onnxruntime",
+    "feedparser",
+    "nltk",
+    "openai",
+    "sentence_transformers",
+)
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+from src.services.ingestion_service.model_registry import model_registry
+print(json.dumps({{
+    "seconds": seconds,
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules],
+    "models_loaded": list(model_registry.generators()),
+}}))
+"""
+
+
+def measure_import(module: str = "src.main", repeat: int = 3) -> dict:
+    """
+    Imports `module` in `repeat` fresh interpreters and reports the cold import time.
+    - Also lists heavy libraries and models the import pulled in (should be none).
+    """
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "module": module,
+        "median_seconds": statistics.median(seconds),
+        "min_seconds": min(seconds),
+        "heavy_modules": sorted(
+            {name for run in runs for name in run["heavy_modules"]}
+        ),
+        "models_loaded": sorted(
+            {name for run in runs for name in run["models_loaded"]}
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the cold import time of the API module."
+    )
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(measure_import(args.module, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+
+# smaps_rollup fields summed into the reported figures (values are in kB)
+_FIELDS = (
+    "Rss",
+    "Pss",
+    "Shared_Clean",
+    "Shared_Dirty",
+    "Private_Clean",
+    "Private_Dirty",
+)
+
+
+def process_memory(pid: int) -> dict:
+    """
+    Returns RSS, PSS, USS and shared bytes of one process (Linux /proc).
+    - RSS counts every resident page; shared pages are counted in full by
+      every process mapping them, so summing RSS over workers overstates.
+    - PSS splits each shared page between the processes mapping it: the sum
+      over the master and workers is their real footprint.
+    - USS is the memory only this process holds (freed if it exits).
+    """
+    values = dict.fromkeys(_FIELDS, 0)
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            key, _, rest = line.partition(":")
+            if key in values:
+                values[key] = int(rest.split()[0]) * 1024
+    return {
+        "pid": pid,
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values["Private_Clean"] + values["Private_Dirty"],
+        "shared": values["Shared_Clean"] + values["Shared_Dirty"],
+    }
+
+
+def child_pids(pid: int) -> list[int]:
+    """
+    Returns the pids of the direct children of `pid`.
+    """
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces; fields resume after ")"
+                ppid = int(stat.read().rpartition(")")[2].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue  # The process exited meanwhile
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def memory_report(master_pid: int) -> dict:
+    """
+    Measures a prefork master and its workers.
+    - `total_pss` is what the server really uses; `total_rss` is what it
+      would use if nothing were shared. The gap is the copy-on-write saving.
+    """
+    master = process_memory(master_pid)
+    workers = []
+    for pid in child_pids(master_pid):
+        try:
+            workers.append(process_memory(pid))
+        except OSError:
+            continue  # The worker exited meanwhile
+    processes = [master, *workers]
+    return {
+        "master": master,
+        "workers": workers,
+        "total_rss": sum(process["rss"] for process in processes),
+        "total_pss": sum(process["pss"] for process in processes),
+        "total_uss": sum(process["uss"] for process in processes),
+    }
+
+
+def _format_report(report: dict) -> str:
+    def mib(value: int) -> str:
+        return f"{value / 2**20:10.1f}"
+
+    lines = [f"{'process':<16}{'pid':>8}{'RSS MiB':>10}{'PSS MiB':>10}{'USS MiB':>10}"]
+    rows = [("master", report["master"])] + [
+        (f"worker {index}", worker) for index, worker in enumerate(report["workers"])
+    ]
+    for label, process in rows:
+        lines.append(
+            f"{label:<16}{process['pid']:>8}"
+            f"{mib(process['rss'])}{mib(process['pss'])}{mib(process['uss'])}"
+        )
+    lines.append(
+        f"{'total':<16}{'':>8}"
+        f"{mib(report['total_rss'])}{mib(report['total_pss'])}{mib(report['total_uss'])}"
+    )
+    saved = report["total_rss"] - report["total_pss"]
+    lines.append(f"Shared across processes (RSS - PSS): {saved / 2**20:.1f} MiB")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report RSS / PSS / USS of the API master and its workers."
+    )
+    parser.add_argument("--pid", type=int, required=True, help="Master process id")
+    parser.add_argument("--json", action="store_true", help="Print JSON")
+    args = parser.parse_args()
+
+    report = memory_report(args.pid)
+    print(json.dumps(report, indent=2) if args.json else _format_report(report))
+
+
+if __name__ == "__main__":
+    main()
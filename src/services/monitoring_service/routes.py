@@ -0,0 +1,146 @@
+import os
+from dataclasses import asdict
+from fastapi import APIRouter
+from src.services.ingestion_service.model_registry import model_registry
+from src.services.ingestion_service.bulk_ingest import bulk_ingestion_stats
+from src.services.retrieval_service.retrieval import (
+    retrieval_flights,
+    retrieval_result_cache,
+)
+from src.services.retrieval_service.bm25_retrieval import bm25_index
+from src.services.qna_service.llm import llm_client_stats
+from src.services.ingestion_service.inference_executor import inference_executor
+from src.services.qna_service.answer_cache import answer_cache
+from src.services.qna_service.service import answer_flights
+from src.backend.database.corpus_version import current_corpus_version
+from src.backend.database.config import engine
+from src.backend.database.engine import pool_stats
+from src.services.monitoring_service.memory_report import process_memory
+from src.services.monitoring_service.schemas import ModelsResponse
+
+router = APIRouter()
+
+
+@router.get("/models", response_model=ModelsResponse)
+async def get_loaded_models():
+    """
+    Reports load time and memory usage for each model loaded in this process.
+    """
+    return {"models": [asdict(stats) for stats in model_registry.stats()]}
+
+
+@router.get("/embedding-batching")
+async def get_embedding_batching_stats():
+    """
+    Reports queue depth, batch-size histogram and batch latency per loaded model.
+    """
+    return {
+        model_name: generator.batching_stats()
+        for model_name, generator in model_registry.generators().items()
+    }
+
+
+@router.get("/embedding-cache")
+async def get_embedding_cache_stats():
+    """
+    Reports embedding cache hits, misses, evictions and tier sizes per model.
+    """
+    return {
+        model_name: generator.cache_stats()
+        for model_name, generator in model_registry.generators().items()
+    }
+
+
+@router.get("/embedding-workers")
+async def get_embedding_worker_stats():
+    """
+    Reports per model whether it runs in the worker pool, and the client counters.
+    """
+    return {
+        model_name: generator.worker_stats()
+        for model_name, generator in model_registry.generators().items()
+    }
+
+
+@router.get("/inference")
+async def get_inference_executor_stats():
+    """
+    Reports the inference executor: running/queued jobs, rejections, and
+    queue wait versus compute time percentiles.
+    """
+    return inference_executor.stats()
+
+
+@router.get("/retrieval-cache")
+async def get_retrieval_cache_stats():
+    """
+    Reports search result cache counters and the current corpus version.
+    """
+    return {
+        "corpus_version": (await current_corpus_version())._asdict(),
+        "cache": retrieval_result_cache.stats() if retrieval_result_cache else None,
+    }
+
+
+@router.get("/bm25")
+async def get_bm25_index_stats():
+    """
+    Reports the size of the in-memory BM25 index (documents, terms, postings).
+    """
+    return bm25_index.stats()
+
+
+@router.get("/llm")
+async def get_llm_client_stats():
+    """
+    Reports LLM client requests, retries, hedges, timeouts and in-flight calls.
+    """
+    return {"client": llm_client_stats()}
+
+
+@router.get("/answer-cache")
+async def get_answer_cache_stats():
+    """
+    Reports hit rates of the exact and semantic answer cache tiers.
+    """
+    return {
+        "enabled": answer_cache is not None,
+        "cache": answer_cache.stats() if answer_cache is not None else None,
+    }
+
+
+@router.get("/ingestion")
+async def get_bulk_ingestion_stats():
+    """
+    Reports the last bulk ingestion run (documents/sec) and running totals.
+    """
+    return bulk_ingestion_stats.snapshot()
+
+
+@router.get("/coalescing")
+async def get_coalescing_stats():
+    """
+    Reports how many identical in-flight requests were coalesced (single-flight).
+    """
+    return {
+        flights.name: flights.stats() for flights in (retrieval_flights, answer_flights)
+    }
+
+
+@router.get("/database")
+async def get_database_pool_stats():
+    """
+    Reports connection pool occupancy (checked out, idle, overflow) and
+    checkout waits (callers waiting, wait-time percentiles, timeouts).
+    """
+    return pool_stats(engine)
+
+
+@router.get("/memory")
+async def get_process_memory():
+    """
+    Reports RSS, PSS and USS of the worker process serving this request.
+    - Run `python -m src.services.monitoring_service.memory_report --pid <master>`
+      for the prefork master and all of its workers at once.
+    """
+    return process_memory(os.getpid())
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class ModelStatsResponse(BaseModel):
+    """
+    Load time and memory usage of a model held by the model registry.
+    """
+
+    model_name: str
+    load_seconds: float
+    parameter_bytes: int
+    rss_delta_bytes: int
+
+
+class ModelsResponse(BaseModel):
+    """
+    Lists every model loaded in this process.
+    """
+
+    models: List[ModelStatsResponse]
@@ -0,0 +1,95 @@
+import hashlib
+from src.config import (
+    QNA_ANSWER_CACHE_ENABLED,
+    QNA_ANSWER_CACHE_SIZE,
+    QNA_ANSWER_CACHE_TTL_SECONDS,
+    QNA_SEMANTIC_CACHE_ENABLED,
+    QNA_SEMANTIC_CACHE_SIZE,
+    QNA_SEMANTIC_CACHE_THRESHOLD,
+)  # Import answer cache settings
+from src.backend.core.cache import SemanticCache, TTLCache
+from src.services.qna_service.schemas import PackedContext
+
+
+def normalize_question(question: str) -> str:
+    """
+    Lowercases, collapses whitespace and drops trailing punctuation.
+    """
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+
+def context_key(packed: PackedContext, model: str, prompt_version: int) -> tuple:
+    """
+    Identifies what an answer was generated from, apart from the question:
+    the packed chunks, a hash of their text, the model and the prompt version.
+    - The text hash makes entries unreachable once a document's content (or
+      how much of it was packed) changes.
+    """
+    return (
+        model,
+        prompt_version,
+        tuple((hit.document_id, hit.chunk_index) for hit in packed.hits),
+        hashlib.sha256(packed.text.encode("utf-8")).hexdigest(),
+    )
+
+
+class AnswerCache:
+    """
+    Two-tier cache of generated answers.
+    - Exact tier: (normalized question, context key) -> answer.
+    - Semantic tier: within one context key, the answer of the most similar
+      cached question, if its embedding is within the cosine threshold.
+    - Either tier can be disabled by passing None.
+    """
+
+    def __init__(self, exact: TTLCache | None, semantic: SemanticCache | None):
+        self.exact = exact
+        self.semantic = semantic
+
+    def get_exact(self, question: str, key: tuple) -> str | None:
+        if self.exact is None:
+            return None
+        return self.exact.get((normalize_question(question), key))
+
+    def get_semantic(self, key: tuple, query_embedding) -> str | None:
+        if self.semantic is None or query_embedding is None:
+            return None
+        hit = self.semantic.get(key, query_embedding)
+        return hit[0] if hit is not None else None
+
+    def put(self, question: str, key: tuple, query_embedding, answer: str):
+        if self.exact is not None:
+            self.exact.put((normalize_question(question), key), answer)
+        if self.semantic is not None and query_embedding is not None:
+            self.semantic.put(key, query_embedding, answer)
+
+    def clear(self):
+        for tier in (self.exact, self.semantic):
+            if tier is not None:
+                tier.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns the metrics of both tiers (None for a disabled tier).
+        """
+        return {
+            "exact": self.exact.stats() if self.exact is not None else None,
+            "semantic": self.semantic.stats() if self.semantic is not None else None,
+        }
+
+
+# ✅ Process-wide answer cache (None when disabled)
+answer_cache = (
+    AnswerCache(
+        TTLCache(QNA_ANSWER_CACHE_SIZE, QNA_ANSWER_CACHE_TTL_SECONDS),
+        SemanticCache(
+            QNA_SEMANTIC_CACHE_SIZE,
+            QNA_ANSWER_CACHE_TTL_SECONDS,
+            QNA_SEMANTIC_CACHE_THRESHOLD,
+        )
+        if QNA_SEMANTIC_CACHE_ENABLED
+        else None,
+    )
+    if QNA_ANSWER_CACHE_ENABLED
+    else None
+)
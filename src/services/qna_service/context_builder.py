@@ -0,0 +1,167 @@
+import re
+from typing import Callable
+from src.config import QNA_CONTEXT_MAX_TOKENS, QNA_CONTEXT_MIN_PASSAGE_TOKENS
+from src.services.qna_service.schemas import ContextStats, PackedContext
+from src.services.retrieval_service.bm25_retrieval import tokenize
+from src.services.retrieval_service.schemas import ChunkHit
+
+# Sentence boundaries used to split a chunk into passages when trimming
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+# Marks text left out between the passages kept from one chunk
+ELLIPSIS = "..."
+
+# Separates the packed chunks in the context text
+SEPARATOR = "\n\n"
+
+
+class ContextBuilder:
+    """
+    Packs retrieved chunks into a token budget for the LLM prompt.
+    - Chunks are taken in rank order; text already covered by a better-ranked
+      chunk of the same document (chunk overlap) is cut before counting.
+    - A chunk that does not fit the remaining budget is trimmed to its most
+      query-relevant sentences (query terms matched); once less than
+      `min_passage_tokens` remain, the remaining chunks are dropped.
+    - Tokens are counted with `count_tokens`, a local tokenizer callable
+      taking a list of texts, so no request leaves the process. Separators
+      and ellipsis markers count against the budget like chunk text.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[list[str]], list[int]],
+        max_tokens: int = QNA_CONTEXT_MAX_TOKENS,
+        min_passage_tokens: int = QNA_CONTEXT_MIN_PASSAGE_TOKENS,
+    ):
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.min_passage_tokens = min_passage_tokens
+
+    @staticmethod
+    def _uncovered(
+        hit: ChunkHit, covered: list[tuple[int, int]]
+    ) -> tuple[str, int | None]:
+        """
+        Returns the part of `hit.text` not inside an already packed range and
+        the document offset it starts at (None if offsets do not describe it).
+        - Chunk texts are exact document slices, so offsets map to characters;
+          only a prefix or suffix overlap is cut (the chunker's overlap).
+        """
+        start, end = hit.start_char, hit.end_char
+        for covered_start, covered_end in sorted(covered):
+            if covered_start <= start and end <= covered_end:
+                return "", None
+            if covered_start <= start < covered_end:
+                start = covered_end
+            elif covered_start < end <= covered_end:
+                end = covered_start
+        if len(hit.text) != hit.end_char - hit.start_char:
+            return hit.text, None  # Offsets do not describe the text; keep it whole
+        text = hit.text[start - hit.start_char : end - hit.start_char]
+        stripped = text.lstrip()
+        return stripped.rstrip(), start + len(text) - len(stripped)
+
+    def _trim(
+        self, question: str, text: str, budget: int, ellipsis_tokens: int
+    ) -> tuple[str, int, list[tuple[int, int]]]:
+        """
+        Keeps the sentences of `text` sharing the most terms with `question`
+        that fit `budget` tokens, in their original order.
+        - Returns the trimmed text, the tokens of its sentences and the
+          character ranges of `text` it keeps (one per run of sentences).
+        - The ELLIPSIS between runs counts against `budget` too.
+        """
+        spans, start = [], 0
+        for match in SENTENCE_PATTERN.finditer(text):
+            spans.append((start, match.start()))
+            start = match.end()
+        spans.append((start, len(text)))
+        spans = [(s, e) for s, e in spans if text[s:e].strip()]
+        sentences = [text[s:e] for s, e in spans]
+        counts = self.count_tokens(sentences)
+        terms = set(tokenize(question))
+        ranked = sorted(
+            range(len(sentences)),
+            key=lambda i: (-len(terms.intersection(tokenize(sentences[i]))), i),
+        )
+
+        def runs_of(indices: list[int]) -> list[list[int]]:
+            runs = []
+            for i in sorted(indices):
+                if runs and runs[-1][-1] == i - 1:
+                    runs[-1].append(i)
+                else:
+                    runs.append([i])
+            return runs
+
+        kept, used = [], 0
+        for i in ranked:
+            if used + counts[i] <= budget:
+                kept.append(i)
+                used += counts[i]
+        runs = runs_of(kept)
+        # ✅ Give up the least relevant sentences until the markers fit as well
+        while kept and used + (len(runs) - 1) * ellipsis_tokens > budget:
+            used -= counts[kept.pop()]
+            runs = runs_of(kept)
+
+        text = f" {ELLIPSIS} ".join(" ".join(sentences[i] for i in run) for run in runs)
+        return text, used, [(spans[run[0]][0], spans[run[-1]][1]) for run in runs]
+
+    def build(self, question: str, hits: list[ChunkHit]) -> PackedContext:
+        """
+        Returns the packed context text, the hits it draws from and token stats.
+        - `packed_tokens` covers the whole text, separators and markers included.
+        - Only text actually packed is marked as covered: a trimmed chunk
+          covers just the sentences it kept, so an overlapping chunk still
+          contributes the rest.
+        """
+        covered: dict[int, list[tuple[int, int]]] = {}
+        stats = ContextStats(budget_tokens=self.max_tokens)
+        sections, packed_hits = [], []
+        if not hits:
+            return PackedContext(text="", hits=packed_hits, stats=stats)
+
+        separator_tokens, ellipsis_tokens = self.count_tokens([SEPARATOR, ELLIPSIS])
+        full_counts = self.count_tokens([hit.text for hit in hits])
+        for hit, full_tokens in zip(hits, full_counts):
+            ranges = covered.setdefault(hit.document_id, [])
+            text, offset = self._uncovered(hit, ranges)
+            if not text:
+                stats.deduplicated_tokens += full_tokens
+                continue
+            tokens = self.count_tokens([text])[0]
+            stats.deduplicated_tokens += max(full_tokens - tokens, 0)
+
+            separator = separator_tokens if sections else 0
+            remaining = self.max_tokens - stats.packed_tokens - separator
+            if tokens <= remaining:
+                ranges.append((hit.start_char, hit.end_char))
+            else:
+                if remaining < self.min_passage_tokens:
+                    stats.dropped_tokens += tokens
+                    stats.dropped_chunks += 1
+                    continue
+                trimmed, kept_tokens, kept = self._trim(
+                    question, text, remaining, ellipsis_tokens
+                )
+                if not trimmed:
+                    stats.dropped_tokens += tokens
+                    stats.dropped_chunks += 1
+                    continue
+                stats.dropped_tokens += tokens - kept_tokens
+                stats.trimmed_chunks += 1
+                if offset is not None:
+                    ranges.extend((offset + s, offset + e) for s, e in kept)
+                text = trimmed
+                tokens = kept_tokens + (len(kept) - 1) * ellipsis_tokens
+
+            sections.append(text)
+            packed_hits.append(hit)
+            stats.packed_tokens += separator + tokens
+            stats.packed_chunks += 1
+
+        return PackedContext(
+            text=SEPARATOR.join(sections), hits=packed_hits, stats=stats
+        )
@@ -0,0 +1,423 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+from typing import AsyncIterator
+import httpx
+from src.config import (
+    LLM_BACKEND,
+    LLM_MODEL,
+    LLM_API_BASE,
+    LLM_TIMEOUT_SECONDS,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_RETRY_MAX_SECONDS,
+    LLM_HEDGE_AFTER_SECONDS,
+    LLM_STUB_TOKEN_DELAY_SECONDS,
+)  # Import LLM client settings
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_LLM_BACKENDS = ("openai", "stub")
+
+# Upstream statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """
+    Raised when the LLM backend fails after all retries.
+    """
+
+
+class LLMTimeoutError(LLMError):
+    """
+    Raised when a request misses its deadline (queueing and retries included).
+    """
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"Upstream returned HTTP {status_code}")
+        self.status_code = status_code
+
+
+class LLMStats:
+    """
+    Thread-safe counters for monitoring the LLM client.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "requests": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "hedges_skipped": 0,
+            "timeouts": 0,
+            "errors": 0,
+        }
+
+    def add(self, counter: str, value: int = 1):
+        with self._lock:
+            self.counters[counter] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+
+def backoff_seconds(attempt: int, base: float, cap: float) -> float:
+    """
+    Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)].
+    - Jitter spreads retries of concurrent requests so they do not hit a
+      recovering upstream at the same instant.
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class OpenAIChatClient:
+    """
+    OpenAI-compatible chat completions client on a pooled httpx.AsyncClient.
+    - Keep-alive connections are reused across requests, up to `max_connections`.
+    - At most `max_concurrency` requests are in flight; waiting for a slot
+      counts against the request deadline, so overload turns into timeouts
+      instead of an unbounded queue.
+    - Every request has a deadline (`timeout` seconds) covering queueing,
+      retries and hedges; for streams it bounds the time to the response.
+    - Transport errors and retryable statuses are retried with jittered
+      exponential backoff.
+    - With `hedge_after` set, a second identical request is sent if the first
+      has not answered by then; the first success wins and the other is
+      cancelled (non-streaming requests only). The hedge takes a concurrency
+      slot of its own and is skipped when none is free.
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        api_base: str = LLM_API_BASE,
+        model: str = LLM_MODEL,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base: float = LLM_RETRY_BASE_SECONDS,
+        retry_max: float = LLM_RETRY_MAX_SECONDS,
+        hedge_after: float | None = LLM_HEDGE_AFTER_SECONDS,
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.hedge_after = hedge_after
+        self.stats = LLMStats()
+
+        self._client = httpx.AsyncClient(
+            base_url=api_base.rstrip("/") + "/",
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(timeout),  # Per attempt; the deadline is overall
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _payload(self, messages, max_tokens: int, temperature: float, stream: bool):
+        return {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": stream,
+        }
+
+    async def _with_retries(self, send):
+        """
+        Calls `send()` until it succeeds, retrying transient failures.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await send()
+            except (httpx.TransportError, _RetryableStatus) as e:
+                if attempt == self.max_retries:
+                    self.stats.add("errors")
+                    raise LLMError(f"LLM request failed: {e}") from e
+                self.stats.add("retries")
+                logger.warning(f"LLM request failed ({e}); retrying")
+                await asyncio.sleep(
+                    backoff_seconds(attempt, self.retry_base, self.retry_max)
+                )
+
+    async def _post(self, payload: dict) -> dict:
+        response = await self._client.post("chat/completions", json=payload)
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            raise _RetryableStatus(response.status_code)
+        if response.is_error:
+            self.stats.add("errors")
+            raise LLMError(
+                f"LLM request failed with HTTP {response.status_code}: {response.text}"
+            )
+        return response.json()
+
+    async def _hedged(self, payload: dict) -> dict:
+        """
+        Sends the request, plus a hedge if it is still pending after `hedge_after`.
+        - The caller holds the request's slot; the hedge takes a second one
+          without waiting, so hedging never exceeds `max_concurrency`.
+        """
+
+        async def attempt():
+            return await self._with_retries(lambda: self._post(payload))
+
+        if self.hedge_after is None:
+            return await attempt()
+
+        tasks = {asyncio.create_task(attempt())}
+        hedge = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done and self._semaphore.locked():
+                self.stats.add("hedges_skipped")  # No free slot: keep waiting
+            elif not done:
+                await self._semaphore.acquire()  # A slot is free: returns at once
+                self.stats.add("hedges")
+                hedge = asyncio.create_task(attempt())
+                hedge.add_done_callback(lambda _: self._semaphore.release())
+                tasks.add(hedge)
+
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats.add("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()  # ✅ The slower request is abandoned
+
+    async def complete(
+        self,
+        messages: list[dict],
+        max_tokens: int = 500,
+        temperature: float = 0.0,
+        timeout: float | None = None,
+    ) -> str:
+        """
+        Returns the completion text for `messages`.
+        - Raises LLMTimeoutError past the deadline, LLMError on other failures.
+        """
+        self.stats.add("requests")
+        payload = self._payload(messages, max_tokens, temperature, stream=False)
+        try:
+            async with asyncio.timeout(timeout or self.timeout):
+                async with self._semaphore:
+                    data = await self._hedged(payload)
+        except TimeoutError as e:
+            self.stats.add("timeouts")
+            raise LLMTimeoutError("LLM request exceeded its deadline") from e
+        return data["choices"][0]["message"]["content"]
+
+    async def _open_stream(self, payload: dict) -> httpx.Response:
+        request = self._client.build_request("POST", "chat/completions", json=payload)
+        response = await self._client.send(request, stream=True)
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            await response.aclose()
+            raise _RetryableStatus(response.status_code)
+        if response.is_error:
+            body = (await response.aread()).decode("utf-8", "replace")
+            await response.aclose()
+            self.stats.add("errors")
+            raise LLMError(
+                f"LLM request failed with HTTP {response.status_code}: {body}"
+            )
+        return response
+
+    async def stream(
+        self,
+        messages: list[dict],
+        max_tokens: int = 500,
+        temperature: float = 0.0,
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yields completion text deltas as they arrive (SSE stream).
+        - The deadline covers queueing, retries and the response headers; gaps
+          between chunks are bounded by the per-attempt read timeout.
+        - Closing the generator closes the upstream response and frees the
+          concurrency slot.
+        """
+        self.stats.add("requests")
+        payload = self._payload(messages, max_tokens, temperature, stream=True)
+        acquired = False
+        try:
+            try:
+                async with asyncio.timeout(timeout or self.timeout):
+                    await self._semaphore.acquire()
+                    acquired = True
+                    response = await self._with_retries(
+                        lambda: self._open_stream(payload)
+                    )
+            except TimeoutError as e:
+                self.stats.add("timeouts")
+                raise LLMTimeoutError("LLM request exceeded its deadline") from e
+
+            try:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:") :].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        yield delta["content"]
+            finally:
+                await response.aclose()
+        finally:
+            if acquired:
+                self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        """
+        Returns request counters and current concurrency use.
+        """
+        return {
+            "backend": self.name,
+            "model": self.model,
+            "in_flight": self.max_concurrency - self._semaphore._value,
+            "max_concurrency": self.max_concurrency,
+            **self.stats.snapshot(),
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class StubLLMClient:
+    """
+    Deterministic, network-free backend for tests and benchmarks.
+    - The answer depends only on the question and a hash of the prompt, so
+      identical requests always get identical answers.
+    - `token_delay` seconds are spent per token to emulate generation time.
+    """
+
+    name = "stub"
+    model = "stub"
+
+    def __init__(self, token_delay: float = LLM_STUB_TOKEN_DELAY_SECONDS):
+        self.token_delay = token_delay
+        self.stats = LLMStats()
+
+    @staticmethod
+    def answer(messages: list[dict], max_tokens: int = 500) -> list[str]:
+        """
+        Returns the stub answer for `messages` as a list of tokens.
+        """
+        prompt = messages[-1]["content"]
+        question = prompt.rsplit("Question:", 1)[-1].replace("Answer:", "").strip()
+        digest = hashlib.sha256(
+            json.dumps(messages, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:8]
+        text = f"Stub answer {digest} to: {question}"
+        return re.findall(r"\S+\s*", text)[:max_tokens]
+
+    async def complete(
+        self,
+        messages: list[dict],
+        max_tokens: int = 500,
+        temperature: float = 0.0,
+        timeout: float | None = None,
+    ) -> str:
+        self.stats.add("requests")
+        tokens = self.answer(messages, max_tokens)
+        if self.token_delay:
+            await asyncio.sleep(self.token_delay * len(tokens))
+        return "".join(tokens)
+
+    async def stream(
+        self,
+        messages: list[dict],
+        max_tokens: int = 500,
+        temperature: float = 0.0,
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        self.stats.add("requests")
+        for token in self.answer(messages, max_tokens):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    def snapshot(self) -> dict:
+        return {"backend": self.name, "model": self.model, **self.stats.snapshot()}
+
+    async def aclose(self):
+        pass
+
+
+def create_llm_client(backend_name: str = LLM_BACKEND, api_key: str | None = None):
+    """
+    Builds the LLM client selected by configuration.
+    """
+    if backend_name == "openai":
+        if not api_key:
+            raise ValueError(
+                "❌ OpenAI API key is missing! Make sure it is securely set in the environment. This project cannot run without it."
+            )
+        return OpenAIChatClient(api_key)
+    if backend_name == "stub":
+        return StubLLMClient()
+    raise ValueError(
+        f"Unknown LLM backend '{backend_name}'. "
+        f"Expected one of: {', '.join(SUPPORTED_LLM_BACKENDS)}"
+    )
+
+
+# ✅ Process-wide client, so the connection pool and concurrency cap are shared
+_llm_client = None
+
+
+def get_llm_client():
+    """
+    Returns the shared LLM client, creating it on first use.
+    """
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = create_llm_client(LLM_BACKEND, os.getenv("OPENAI_API_KEY"))
+    return _llm_client
+
+
+def llm_client_stats() -> dict | None:
+    """
+    Returns the shared client's counters, or None if it was never created.
+    """
+    return _llm_client.snapshot() if _llm_client is not None else None
+
+
+async def close_llm_client():
+    """
+    Closes the shared client's connection pool (application shutdown).
+    """
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.aclose()
+        _llm_client = None
@@ -0,0 +1,109 @@
+import time
+from src.config import RETRIEVAL_HYBRID_CANDIDATES
+from src.backend.database.corpus_version import CorpusState, current_corpus_version
+from src.services.retrieval_service.retrieval import (
+    RetrievalService,
+    retrieval_flights,
+)
+from src.services.qna_service.schemas import RetrievedContext
+
+
+class RetrievalPipeline:
+    """
+    Runs retrieval for a question exactly once: embed -> filtered chunk search.
+    - The search statement also returns the text of every matching chunk, so
+      answer generation needs no further embedding pass or database round trip.
+    - Only the matching chunks (not whole documents) become LLM context.
+    - In hybrid mode the BM25 leg runs concurrently with query embedding, and
+      its documents join the same chunk search before fusion; the overlapped
+      stage is reported as "embedding_lexical". The Postgres full-text leg
+      runs inside the chunk search statement instead.
+    - Repeated questions are served from the retrieval result cache (the
+      "cache" timing replaces "embedding" and "search"); concurrent identical
+      runs share one execution (single-flight) and report its timings.
+    - Each stage is timed and reported in `RetrievedContext.timings_ms`.
+    """
+
+    def __init__(self, retrieval_service: RetrievalService | None = None):
+        self.retrieval_service = retrieval_service or RetrievalService()
+
+    async def run(
+        self,
+        question: str,
+        top_k: int = 5,
+        mode: str = "vector",
+        fusion: str | None = None,
+        lexical: str | None = None,
+        keywords: str | None = None,
+        corpus_version: CorpusState | None = None,
+    ) -> RetrievedContext:
+        """
+        Retrieves the `top_k` closest chunks of selected documents with their texts.
+        - `mode`, `fusion`, `lexical` and `keywords` are passed through to chunk
+          search (see `RetrievalService.search_chunks`).
+        - `corpus_version` is the version the caller already read for this
+          request; it is read here otherwise, once for the whole run.
+        """
+        started = time.perf_counter()
+        if corpus_version is None:
+            corpus_version = await current_corpus_version()
+        key = await self.retrieval_service.result_key(
+            "chunks",
+            question,
+            corpus_version=corpus_version,
+            top_k=top_k,
+            metric=None,
+            ef_search=None,
+            probes=None,
+            **self.retrieval_service.mode_params(mode, fusion, lexical, keywords),
+        )  # Same key as RetrievalService.search_chunks with default knobs
+        hits = self.retrieval_service.cached_results(key)
+        if hits is not None:
+            return RetrievedContext(
+                hits=hits, timings_ms={"cache": (time.perf_counter() - started) * 1000}
+            )
+
+        async def compute() -> RetrievedContext:
+            if mode == "hybrid":
+                (
+                    query_embedding,
+                    lexical_hits,
+                ) = await self.retrieval_service.hybrid_legs(
+                    question,
+                    top_k * RETRIEVAL_HYBRID_CANDIDATES,
+                    lexical,
+                    corpus_version=corpus_version,
+                )
+                embedded = time.perf_counter()
+
+                hits = await self.retrieval_service.hybrid_search_chunks(
+                    question,
+                    query_embedding,
+                    lexical_hits,
+                    top_k,
+                    fusion=fusion,
+                    keywords=keywords,
+                )
+                # Postgres full-text ranking runs inside the search statement
+                stage = "embedding" if lexical_hits is None else "embedding_lexical"
+            else:
+                query_embedding = await self.retrieval_service.embed_query(question)
+                embedded = time.perf_counter()
+
+                hits = await self.retrieval_service.search_chunks_by_embedding(
+                    query_embedding, top_k, keywords=keywords
+                )
+                stage = "embedding"
+            searched = time.perf_counter()
+            self.retrieval_service.cache_results(key, hits)
+
+            return RetrievedContext(
+                hits=hits,
+                timings_ms={
+                    stage: (embedded - started) * 1000,
+                    "search": (searched - embedded) * 1000,
+                },
+                query_embedding=query_embedding,
+            )
+
+        return await retrieval_flights.do(("pipeline", key), compute)
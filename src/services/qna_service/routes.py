@@ -1,14 +1,27 @@
-from fastapi import APIRouter, HTTPException
-from .service import QnAService, RetrievalService
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from .service import QnAService
+from .llm import LLMTimeoutError
+from src.services.ingestion_service.inference_executor import InferenceOverloadedError
 import logging
 from .schemas import QueryRequest, QueryResponse
+from .streaming import SSE_HEADERS, answer_events
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Initialize services
-retrieval_service = RetrievalService()
-qna_service = QnAService()
+# ✅ Created on first use (or by warmup): building it loads the embedding model
+_qna_service: QnAService | None = None
+
+
+def get_qna_service() -> QnAService:
+    """
+    Returns the shared Q&A service, creating it on first use.
+    """
+    global _qna_service
+    if _qna_service is None:
+        _qna_service = QnAService()
+    return _qna_service
 
 
 @router.post("/ask", response_model=QueryResponse)
@@ -17,22 +30,54 @@ async def ask_question(request: QueryRequest):
     Handles user queries by retrieving relevant documents and generating answers using RAG.
     """
     try:
-        # Retrieve relevant documents
-        relevant_docs = await retrieval_service.retrieve_relevant_docs(
-            request.question, request.top_k
-        )
+        qna_service = get_qna_service()
+        # ✅ Retrieve once and generate; identical in-flight questions share the work
+        response = await qna_service.answer(request)
 
-        if not relevant_docs:
+        if response is None:
             raise HTTPException(
                 status_code=404,
                 detail="No relevant documents found. The database does not have enough information to answer the question. Please ingest some data first.",
             )
 
-        # ✅ Await the async function call
-        answer = await qna_service.get_answer(request)
-
-        return QueryResponse(question=request.question, answer=str(answer))
+        return response
 
+    except (HTTPException, InferenceOverloadedError):
+        raise  # ✅ Keep intended status codes (404, 503) instead of turning them into 500
+    except LLMTimeoutError as e:
+        logger.error(f"Answer generation timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail="Answer generation timed out")
     except Exception as e:
         logger.error(f"Error processing question: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/ask/stream")
+async def ask_question_stream(request: QueryRequest, http_request: Request):
+    """
+    Streams the answer as Server-Sent Events: retrieved sources first, then
+    LLM tokens as they arrive (see `answer_events`).
+    - Retrieval errors and "no documents" are reported with a status code
+      before the stream starts.
+    """
+    qna_service = get_qna_service()
+    try:
+        # ✅ Retrieve before streaming so failures still get a proper status code
+        retrieved = await qna_service.retrieve(request)
+    except InferenceOverloadedError:
+        raise  # ✅ Answered with 503 by the application's exception handler
+    except Exception as e:
+        logger.error(f"Error retrieving documents: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if not retrieved.hits:
+        raise HTTPException(
+            status_code=404,
+            detail="No relevant documents found. The database does not have enough information to answer the question. Please ingest some data first.",
+        )
+
+    return StreamingResponse(
+        answer_events(http_request, qna_service, request, retrieved),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -1,4 +1,6 @@
+from typing import Literal
 from pydantic import BaseModel
+from src.services.retrieval_service.schemas import ChunkHit
 
 
 class QueryRequest(BaseModel):
@@ -8,11 +10,75 @@ class QueryRequest(BaseModel):
 
     question: str
     top_k: int = 5  # Default to retrieving top 5 relevant documents
+    mode: Literal["vector", "hybrid"] = "vector"  # Hybrid adds a BM25 leg
+    fusion: Literal["rrf", "weighted"] | None = None  # Hybrid fusion (config default)
+    lexical: Literal["bm25", "postgres"] | None = None  # Hybrid lexical leg
+    keywords: str | None = None  # Only use documents matching this full-text query
+
+
+class RetrievedContext(BaseModel):
+    """
+    Output of the retrieval pipeline, handed straight to answer generation.
+    - `hits` carry chunk positions, distances and chunk texts.
+    - `timings_ms` holds the duration of each pipeline stage in milliseconds.
+    - `query_embedding` is the question's embedding, when it was computed.
+    """
+
+    hits: list[ChunkHit] = []
+    timings_ms: dict[str, float] = {}
+    query_embedding: list[float] | None = None
+
+
+class ContextStats(BaseModel):
+    """
+    Token accounting of the context packed into the LLM prompt.
+    - `deduplicated_tokens` were cut because a better-ranked chunk of the same
+      document already covered them; `dropped_tokens` did not fit the budget.
+    """
+
+    budget_tokens: int
+    packed_tokens: int = 0
+    dropped_tokens: int = 0
+    deduplicated_tokens: int = 0
+    packed_chunks: int = 0
+    trimmed_chunks: int = 0
+    dropped_chunks: int = 0
+
+
+class PackedContext(BaseModel):
+    """
+    Retrieved text that fits the prompt budget, and the hits it comes from.
+    """
+
+    text: str = ""
+    hits: list[ChunkHit] = []
+    stats: ContextStats
+
+
+class SourceDocument(BaseModel):
+    """
+    A document chunk used as context for the answer, with its search distance.
+    """
+
+    document_id: int
+    chunk_index: int
+    start_char: int
+    end_char: int
+    distance: float
+    score: float | None = None  # Fused score (hybrid retrieval only)
 
 
 class QueryResponse(BaseModel):
     """
     Represents the response from the QnA service, including the retrieved answer.
+    - `sources` lists the documents the answer was generated from.
+    - `timings_ms` reports per-stage latency (embedding, search, generation, total).
+    - `context` reports how many retrieved tokens were packed or dropped.
+    - `cache` names the answer cache tier that served the answer, if any.
     """
 
     answer: str
+    sources: list[SourceDocument] = []
+    timings_ms: dict[str, float] = {}
+    context: ContextStats | None = None
+    cache: Literal["exact", "semantic"] | None = None
@@ -1,8 +1,27 @@
-import openai
-import os
+import time
+from typing import AsyncIterator
 from dotenv import load_dotenv
+from src.config import COALESCING_ENABLED  # Import single-flight switch
+from src.backend.core.singleflight import SingleFlight  # Import request coalescing
+from src.backend.database.corpus_version import CorpusState, current_corpus_version
 from src.services.retrieval_service.retrieval import RetrievalService
-from src.services.qna_service.schemas import QueryRequest, QueryResponse
+from src.services.qna_service.pipeline import RetrievalPipeline
+from src.services.qna_service.llm import get_llm_client  # Import shared LLM client
+from src.services.qna_service.context_builder import ContextBuilder
+from src.services.qna_service.answer_cache import answer_cache, context_key
+from src.services.qna_service.schemas import (
+    PackedContext,
+    QueryRequest,
+    QueryResponse,
+    RetrievedContext,
+    SourceDocument,
+)
+
+# Bump whenever `build_messages` changes, so cached answers of the old prompt are not served
+PROMPT_VERSION = 1
+
+# ✅ Concurrent identical questions share one retrieval and one LLM call
+answer_flights = SingleFlight("answer", enabled=COALESCING_ENABLED)
 
 
 class QnAService:
@@ -14,56 +33,180 @@ class QnAService:
         load_dotenv()  # ✅ Explicitly load .env file (only needed for local development)
 
         self.retrieval_service = RetrievalService()
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.pipeline = RetrievalPipeline(self.retrieval_service)
+        self.llm = get_llm_client()  # ✅ Pooled, deadline-bound client (LLM_BACKEND)
+        # ✅ Token budget for the prompt, counted with the local embedding tokenizer
+        self.context_builder = ContextBuilder(
+            self.retrieval_service.embedding_generator.count_tokens
+        )
 
-        if not self.openai_api_key:
-            raise ValueError(
-                "❌ OpenAI API key is missing! Make sure it is securely set in the environment. This project cannot run without it."
-            )
+    async def retrieve(
+        self, request: QueryRequest, corpus_version: CorpusState | None = None
+    ) -> RetrievedContext:
+        """
+        Runs the retrieval pipeline once with the options of `request`.
+        - `corpus_version` is passed down when the caller already read it.
+        """
+        return await self.pipeline.run(
+            request.question,
+            request.top_k,
+            mode=request.mode,
+            fusion=request.fusion,
+            lexical=request.lexical,
+            keywords=request.keywords,
+            corpus_version=corpus_version,
+        )
 
-        openai.api_key = self.openai_api_key  # ✅ Set the API key for OpenAI usage
+    def pack_context(self, question: str, retrieved: RetrievedContext) -> PackedContext:
+        """
+        Fits the retrieved chunks into the prompt token budget (see `ContextBuilder`).
+        """
+        return self.context_builder.build(question, retrieved.hits)
 
-    async def get_answer(self, request: QueryRequest) -> QueryResponse:
+    async def answer(self, request: QueryRequest) -> QueryResponse | None:
         """
-        Retrieves the most relevant documents and generates an answer
-        using OpenAI GPT API.
+        Retrieves and generates an answer for `request` (None if nothing was
+        retrieved), sharing the work with identical requests in flight.
+        - Requests are identical when their normalized question, `top_k` and
+          search options match and the corpus has not changed in between.
+        - The corpus version is read once and reused by retrieval.
         """
-        # ✅ Step 1: Retrieve relevant document IDs
-        document_ids = await self.retrieval_service.retrieve_relevant_docs(
-            request.question, request.top_k
+        version = await current_corpus_version()
+        key = await self.retrieval_service.result_key(
+            "answer",
+            request.question,
+            corpus_version=version,
+            top_k=request.top_k,
+            **self.retrieval_service.mode_params(
+                request.mode, request.fusion, request.lexical, request.keywords
+            ),
         )
 
-        # ✅ Step 2: Fetch actual document texts
-        document_texts = await self.retrieval_service.get_document_texts(document_ids)
+        async def compute() -> QueryResponse | None:
+            retrieved = await self.retrieve(request, version)
+            if not retrieved.hits:
+                return None
+            return await self.get_answer(request, retrieved)
+
+        return await answer_flights.do(key, compute)
 
-        # ✅ Step 3: Format documents for LLM input
+    @staticmethod
+    def build_messages(question: str, packed: PackedContext) -> list[dict]:
+        """
+        Builds the chat messages: packed chunk texts as context, closest first.
+        """
         doc_texts = (
-            "\n\n".join(
-                doc.decode("utf-8") if isinstance(doc, bytes) else str(doc)
-                for doc in document_texts
-            )
-            if document_texts
+            packed.text
+            if packed.text
             else "No relevant documents found. The database does not have enough information to answer the question. Please ingest some data first."
         )
+        return [
+            {
+                "role": "system",
+                "content": "You are an expert answering questions based on retrieved documents.",
+            },
+            {
+                "role": "user",
+                "content": f"Context:\n{doc_texts}\n\nQuestion: {question}\nAnswer:",
+            },
+        ]
 
-        # ✅ Step 4: Call OpenAI API to generate answer
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert answering questions based on retrieved documents.",
-                },
-                {
-                    "role": "user",
-                    "content": f"Context:\n{doc_texts}\n\nQuestion: {request.question}\nAnswer:",
-                },
-            ],
-            temperature=0.0,  # always pick the most likely response; do not use pre-trained knowledge
+    @staticmethod
+    def sources(retrieved: RetrievedContext | PackedContext) -> list[SourceDocument]:
+        """
+        Lists the chunks an answer is generated from.
+        """
+        return [
+            SourceDocument(
+                document_id=hit.document_id,
+                chunk_index=hit.chunk_index,
+                start_char=hit.start_char,
+                end_char=hit.end_char,
+                distance=hit.distance,
+                score=hit.score,
+            )
+            for hit in retrieved.hits
+        ]
+
+    async def get_answer(
+        self, request: QueryRequest, retrieved: RetrievedContext | None = None
+    ) -> QueryResponse:
+        """
+        Generates an answer from the retrieved documents using OpenAI GPT API.
+        - `retrieved` is the output of a retrieval pipeline run that already
+          happened (e.g. in the route); otherwise the pipeline is run here.
+        - Answers are served from the answer cache when the same (or, within
+          the similarity threshold, a similar) question was answered from the
+          same packed context. The semantic tier reuses the query embedding
+          of retrieval; results served from the retrieval cache (same question)
+          carry none and only use the exact tier.
+        """
+        # ✅ Step 1: Retrieve relevant chunks (ids, distances and texts) once
+        if retrieved is None:
+            retrieved = await self.retrieve(request)
+
+        started = time.perf_counter()
+        # ✅ Step 2: Pack the chunks into the token budget
+        packed = self.pack_context(request.question, retrieved)
+        packed_at = time.perf_counter()
+
+        timings_ms = dict(retrieved.timings_ms)
+        timings_ms["packing"] = (packed_at - started) * 1000
+
+        # ✅ Step 3: Serve a cached answer generated from the same context
+        key = context_key(packed, self.llm.model, PROMPT_VERSION)
+        if answer_cache is not None:
+            tier, answer = "exact", answer_cache.get_exact(request.question, key)
+            if answer is None:
+                tier = "semantic"
+                answer = answer_cache.get_semantic(key, retrieved.query_embedding)
+            if answer is not None:
+                timings_ms["answer_cache"] = (time.perf_counter() - packed_at) * 1000
+                timings_ms["total"] = sum(timings_ms.values())
+                return QueryResponse(
+                    answer=answer,
+                    sources=self.sources(packed),
+                    timings_ms=timings_ms,
+                    context=packed.stats,
+                    cache=tier,
+                )
+
+        # ✅ Step 4: Generate the answer with the packed chunks as context
+        generating = time.perf_counter()
+        answer = await self.llm.complete(
+            self.build_messages(request.question, packed),
             max_tokens=500,
+            temperature=0.0,  # always pick the most likely response; do not use pre-trained knowledge
         )
+        timings_ms["generation"] = (time.perf_counter() - generating) * 1000
+        timings_ms["total"] = sum(timings_ms.values())
+
+        if answer_cache is not None and packed.hits:
+            answer_cache.put(request.question, key, retrieved.query_embedding, answer)
 
-        # ✅ Step 5: Extract and return the generated answer
-        answer = response["choices"][0]["message"]["content"]
+        return QueryResponse(
+            answer=answer,
+            sources=self.sources(packed),
+            timings_ms=timings_ms,
+            context=packed.stats,
+        )
 
-        return QueryResponse(answer=answer)
+    async def stream_answer(
+        self, request: QueryRequest, packed: PackedContext
+    ) -> AsyncIterator[str]:
+        """
+        Generates the answer like `get_answer`, yielding text deltas as the
+        model produces them.
+        - Closing this generator (client gone, request cancelled) closes the
+          upstream HTTP response, so the model stops generating for nobody.
+        """
+        tokens = self.llm.stream(
+            self.build_messages(request.question, packed),
+            max_tokens=500,
+            temperature=0.0,
+        )
+        try:
+            async for token in tokens:
+                yield token
+        finally:
+            await tokens.aclose()  # ✅ Release the upstream connection early
@@ -0,0 +1,78 @@
+import json
+import logging
+import time
+from typing import AsyncIterator
+from fastapi import Request
+from src.services.qna_service.llm import LLMTimeoutError
+from src.services.qna_service.schemas import QueryRequest, RetrievedContext
+
+logger = logging.getLogger(__name__)
+
+# Headers keeping proxies (e.g. nginx) from buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data) -> str:
+    """
+    Formats one Server-Sent Event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def answer_events(
+    http_request: Request,
+    qna_service,
+    request: QueryRequest,
+    retrieved: RetrievedContext,
+) -> AsyncIterator[str]:
+    """
+    Streams an answer as SSE events:
+    - `sources`: document ids and chunk positions packed into the prompt,
+      sent before the model is called, with the retrieval timings and the
+      token counts of the packed context.
+    - `token`: one event per text delta from the model.
+    - `done`: generation timings ("first_token" is time to the first delta).
+    - `error`: generation failed after the stream started (status is already 200).
+    The upstream model stream is closed as soon as the client disconnects or
+    the response task is cancelled.
+    """
+    started = time.perf_counter()
+    packed = qna_service.pack_context(request.question, retrieved)
+    packed_at = time.perf_counter()
+    yield sse_event(
+        "sources",
+        {
+            "documents": [hit.document_id for hit in packed.hits],
+            "sources": [source.model_dump() for source in qna_service.sources(packed)],
+            "timings_ms": retrieved.timings_ms,
+            "context": packed.stats.model_dump(),
+        },
+    )
+
+    first_token = None
+    tokens = qna_service.stream_answer(request, packed)
+    try:
+        async for token in tokens:
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected; stopping answer generation")
+                return
+            if first_token is None:
+                first_token = time.perf_counter()
+            yield sse_event("token", {"text": token})
+
+        finished = time.perf_counter()
+        timings_ms = dict(retrieved.timings_ms)
+        timings_ms["total"] = sum(timings_ms.values()) + (finished - started) * 1000
+        timings_ms["packing"] = (packed_at - started) * 1000
+        timings_ms["generation"] = (finished - packed_at) * 1000
+        if first_token is not None:
+            timings_ms["first_token"] = (first_token - packed_at) * 1000
+        yield sse_event("done", {"timings_ms": timings_ms})
+    except LLMTimeoutError as e:
+        logger.error(f"Answer generation timed out: {str(e)}")
+        yield sse_event("error", {"detail": "Answer generation timed out"})
+    except Exception as e:
+        logger.error(f"Error streaming answer: {str(e)}", exc_info=True)
+        yield sse_event("error", {"detail": "Internal server error"})
+    finally:
+        await tokens.aclose()  # ✅ Runs on completion, disconnect and cancellation
@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import statistics
+import time
+import numpy as np
+from sqlalchemy.sql import text
+from src.backend.database.config import AsyncSessionLocal, engine
+from src.services.retrieval_service.retrieval import (
+    build_search_query,
+    distance_operator,
+    run_filtered_search,
+)
+
+LEGACY_SELECT = text("SELECT document_id FROM selected_documents;")
+
+
+def legacy_search_query(operator: str):
+    """
+    The previous two-step search: selected IDs are sent back as an array.
+    """
+    return text(f"""
+        SELECT document_id FROM embeddings
+        WHERE document_id = ANY(:selected_ids)
+        ORDER BY vector {operator} CAST(:query_embedding AS vector)
+        LIMIT :top_k;
+    """)
+
+
+def _unit_vectors(rng: np.random.Generator, count: int, dimension: int) -> list[str]:
+    """
+    Returns `count` random unit-length vectors in pgvector text format.
+    - Unit length matches what the embedding generator stores.
+    """
+    vectors = rng.standard_normal((count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return ["[" + ",".join(map(str, row)) + "]" for row in vectors.tolist()]
+
+
+def _random_query(rng: np.random.Generator, dimension: int) -> str:
+    return _unit_vectors(rng, 1, dimension)[0]
+
+
+async def _time_queries(run_query, repeats: int) -> tuple[float, float, float]:
+    """
+    Runs `run_query` `repeats` times; returns (p50 ms, p95 ms, mean rows).
+    """
+    latencies, rows = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows.append(await run_query())
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p95 = latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)]
+    return statistics.median(latencies), p95, statistics.mean(rows)
+
+
+async def run_benchmark(
+    corpus_size: int,
+    selection_sizes: list[int],
+    repeats: int,
+    top_k: int,
+    metric: str,
+    dimension: int = 384,
+):
+    """
+    Compares the legacy two-step search with the single-statement semi-join.
+    - Synthetic documents, embeddings and selections are created inside one
+      transaction that is rolled back at the end, so the database is untouched.
+    """
+    operator = distance_operator(metric)
+    rng = np.random.default_rng(0)
+
+    async with AsyncSessionLocal() as db:
+        await db.begin()
+        try:
+            document_ids = (
+                (
+                    await db.execute(
+                        text("""
+                            INSERT INTO documents (filename, content, source)
+                            SELECT 'bench_' || g, convert_to('bench ' || g, 'UTF8'),
+                                   'benchmark'
+                            FROM generate_series(1, :n) g
+                            RETURNING id;
+                        """),
+                        {"n": corpus_size},
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            await db.execute(
+                text("""
+                    INSERT INTO embeddings (document_id, vector)
+                    SELECT v.id, CAST(v.vector AS vector)
+                    FROM unnest(CAST(:ids AS integer[]), CAST(:vectors AS text[]))
+                        AS v(id, vector);
+                """),
+                {
+                    "ids": document_ids,
+                    "vectors": _unit_vectors(rng, len(document_ids), dimension),
+                },
+            )
+            await db.execute(text("DELETE FROM selected_documents;"))
+
+            print(
+                f"corpus={corpus_size} top_k={top_k} metric={metric} repeats={repeats}"
+            )
+            print(
+                f"{'selected':>9} | {'legacy p50':>10} {'p95':>8} {'rows':>5} | "
+                f"{'semi-join p50':>13} {'p95':>8} {'rows':>5}"
+            )
+
+            selected = 0
+            shuffled = rng.permutation(document_ids).tolist()
+            for size in sorted(selection_sizes):
+                size = min(size, corpus_size)
+                await db.execute(
+                    text("""
+                        INSERT INTO selected_documents (document_id)
+                        SELECT unnest(CAST(:ids AS integer[]));
+                    """),
+                    {"ids": shuffled[selected:size]},
+                )
+                selected = size
+                await db.execute(text("ANALYZE embeddings, selected_documents;"))
+
+                async def legacy():
+                    ids = (await db.execute(LEGACY_SELECT)).scalars().all() or [-1]
+                    result = await db.execute(
+                        legacy_search_query(operator),
+                        {
+                            "selected_ids": ids,
+                            "query_embedding": _random_query(rng, dimension),
+                            "top_k": top_k,
+                        },
+                    )
+                    return len(result.all())
+
+                async def semi_join():
+                    rows = await run_filtered_search(
+                        db,
+                        build_search_query(operator, include_snippets=False),
+                        {
+                            "query_embedding": _random_query(rng, dimension),
+                            "top_k": top_k,
+                            "snippet_chars": 0,
+                        },
+                    )
+                    await db.execute(text("RESET enable_indexscan;"))
+                    return len(rows)
+
+                legacy_p50, legacy_p95, legacy_rows = await _time_queries(
+                    legacy, repeats
+                )
+                new_p50, new_p95, new_rows = await _time_queries(semi_join, repeats)
+                print(
+                    f"{size:>9} | {legacy_p50:>8.1f}ms {legacy_p95:>6.1f}ms "
+                    f"{legacy_rows:>5.1f} | "
+                    f"{new_p50:>11.1f}ms {new_p95:>6.1f}ms {new_rows:>5.1f}"
+                )
+        finally:
+            await db.rollback()  # ✅ Leave the database exactly as it was
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark filtered vector search latency against selection size."
+    )
+    parser.add_argument("--corpus-size", type=int, default=20000)
+    parser.add_argument(
+        "--selection-sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 20000]
+    )
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument(
+        "--metric", default="l2", choices=["l2", "inner_product", "cosine"]
+    )
+    args = parser.parse_args()
+
+    engine.echo = False  # ✅ Keep the report readable
+
+    asyncio.run(
+        run_benchmark(
+            args.corpus_size,
+            args.selection_sizes,
+            args.repeats,
+            args.top_k,
+            args.metric,
+        )
+    )
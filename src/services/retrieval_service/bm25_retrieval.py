@@ -1,64 +1,295 @@
-# Need to refactor this code entirely; commenting for now
+import asyncio
+import re
+import threading
+from array import array
+from typing import Iterable, List
+import numpy as np
+from sqlalchemy.sql import text
+from src.backend.database.config import AsyncSessionLocal
+from src.backend.database.corpus_version import CorpusState, current_corpus_version
 
-# from rank_bm25 import BM25Okapi
-# from src.backend.database.config import AsyncSessionLocal
-# from src.backend.database.models import Document, SelectedDocument
-# from typing import List
-# import nltk
+TOKEN_PATTERN = re.compile(r"\w+")
 
-# # nltk.download()
-# nltk.download("punkt")
-# nltk.download("wordnet")
-# nltk.download("omw-1.4")
 
+def tokenize(text: str) -> List[str]:
+    """Tokenizes and preprocesses text for BM25 (lowercased word characters)."""
+    return TOKEN_PATTERN.findall(text.lower())
 
-# def tokenize(text: str) -> List[str]:
-#     """Tokenizes and preprocesses text for BM25."""
-#     return nltk.word_tokenize(text.lower())
 
+class BM25Index:
+    """
+    In-memory BM25 inverted index over all documents, filtered by selection.
+    - Postings are array-backed per term: document slots (int32) and term
+      frequencies (float32), appended as documents are ingested.
+    - Document lengths live in one float32 array; IDF values are computed
+      for the whole vocabulary at once, only after the corpus has changed.
+    - Selection is a per-slot mask, so selecting or deselecting documents is
+      O(number of ids) and never touches postings.
+    - A query only reads the postings of its own terms, so its cost grows
+      with how common those terms are, not with the size of the corpus.
+    - Every process holds its own index; before each query it compares the
+      shared corpus version in the database with the one it reflects and
+      catches up on documents and selection changed by other processes.
+    """
 
-# class BM25RetrievalService:
-#     """
-#     Handles document retrieval using BM25 ranking.
-#     """
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
 
-#     def __init__(self):
-#         self.documents = []  # Store tokenized documents
-#         self.doc_ids = []  # Map document order to IDs
-#         self.bm25 = None  # BM25 model
-#         self.load_documents()
+        self._vocabulary: dict[str, int] = {}  # term -> term id
+        self._postings_slots: list[array] = []  # term id -> document slots
+        self._postings_tfs: list[array] = []  # term id -> term frequencies
 
-#     def load_documents(self):
-#         """Loads and tokenizes documents from the database."""
-#         db = AsyncSessionLocal()
-#         try:
-#             selected_ids = db.query(SelectedDocument.document_id).all()
-#             selected_ids = [row[0] for row in selected_ids] if selected_ids else []
+        self._slot_of: dict[int, int] = {}  # document id -> slot
+        self._doc_ids = array("q")  # slot -> document id
+        self._doc_lengths = array("f")  # slot -> token count
+        self._selected_mask = bytearray()  # slot -> 1 if selected
+        self._selected_ids: set[int] = set()
+        self._total_length = 0
 
-#             if not selected_ids:
-#                 return
+        self._idf: np.ndarray | None = None  # Recomputed lazily after changes
+        self._lock = threading.Lock()
+        self._load_lock: asyncio.Lock | None = None
+        self._version: CorpusState | None = None  # Corpus version last synced
+        self._last_id = 0  # Largest document id fetched from the database
+        self.loaded = False  # True once the corpus has been read from the database
 
-#             docs = db.query(Document).filter(Document.id.in_(selected_ids)).all()
+    def __len__(self) -> int:
+        return len(self._doc_ids)
 
-#             self.documents = [tokenize(doc.content.decode("utf-8")) for doc in docs]
-#             self.doc_ids = [doc.id for doc in docs]
+    @property
+    def active(self) -> bool:
+        """True once loading has started; from then on changes must be applied."""
+        return self.loaded or self._load_lock is not None
 
-#             if self.documents:
-#                 self.bm25 = BM25Okapi(self.documents)
-#         finally:
-#             db.close()
+    def add_documents(self, documents: Iterable[tuple[int, str]]):
+        """
+        Indexes (document_id, text) pairs; already indexed ids are skipped.
+        - Tokenization happens outside the lock; only appends are serialized.
+        """
+        tokenized = [(doc_id, tokenize(content)) for doc_id, content in documents]
 
-#     def retrieve_relevant_docs(self, question: str, top_k: int = 5) -> List[int]:
-#         """Retrieves top-k relevant documents using BM25 scoring."""
-#         if not self.bm25 or not question.strip():
-#             return []
+        with self._lock:
+            for doc_id, tokens in tokenized:
+                if doc_id in self._slot_of:
+                    continue
 
-#         tokenized_query = tokenize(question)
-#         scores = self.bm25.get_scores(tokenized_query)
+                slot = len(self._doc_ids)
+                self._slot_of[doc_id] = slot
+                self._doc_ids.append(doc_id)
+                self._doc_lengths.append(len(tokens))
+                self._selected_mask.append(doc_id in self._selected_ids)
+                self._total_length += len(tokens)
 
-#         sorted_indices = sorted(
-#             range(len(scores)), key=lambda i: scores[i], reverse=True
-#         )
-#         top_doc_ids = [self.doc_ids[i] for i in sorted_indices[:top_k]]
+                counts: dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for term, count in counts.items():
+                    term_id = self._vocabulary.get(term)
+                    if term_id is None:
+                        term_id = self._vocabulary[term] = len(self._vocabulary)
+                        self._postings_slots.append(array("i"))
+                        self._postings_tfs.append(array("f"))
+                    self._postings_slots[term_id].append(slot)
+                    self._postings_tfs[term_id].append(count)
 
-#         return top_doc_ids
+            self._idf = None  # Document frequencies / corpus size changed
+
+    def set_selected(self, document_ids: Iterable[int], selected: bool):
+        """
+        Marks documents as selected or deselected for retrieval.
+        """
+        with self._lock:
+            for doc_id in document_ids:
+                if selected:
+                    self._selected_ids.add(doc_id)
+                else:
+                    self._selected_ids.discard(doc_id)
+                slot = self._slot_of.get(doc_id)
+                if slot is not None:
+                    self._selected_mask[slot] = selected
+
+    def replace_selection(self, document_ids: Iterable[int]):
+        """
+        Makes exactly `document_ids` the selected documents.
+        """
+        with self._lock:
+            self._selected_ids = set(document_ids)
+            self._selected_mask = bytearray(
+                doc_id in self._selected_ids for doc_id in self._doc_ids
+            )
+
+    def _compute_idf(self) -> np.ndarray:
+        """
+        Returns IDF for every term: log(1 + (N - df + 0.5) / (df + 0.5)).
+        """
+        if self._idf is None:
+            document_frequencies = np.fromiter(
+                (len(slots) for slots in self._postings_slots),
+                dtype=np.float64,
+                count=len(self._postings_slots),
+            )
+            n = len(self._doc_ids)
+            self._idf = np.log1p(
+                (n - document_frequencies + 0.5) / (document_frequencies + 0.5)
+            )
+        return self._idf
+
+    def search(self, question: str, top_k: int = 5) -> list[tuple[int, float]]:
+        """
+        Returns up to `top_k` (document_id, score) pairs of selected documents.
+        """
+        terms = set(tokenize(question))
+
+        with self._lock:
+            term_ids = [self._vocabulary[t] for t in terms if t in self._vocabulary]
+            if not term_ids or top_k < 1:
+                return []
+
+            idf = self._compute_idf()
+            doc_lengths = np.frombuffer(self._doc_lengths, dtype=np.float32)
+            selected_mask = np.frombuffer(self._selected_mask, dtype=np.uint8)
+            average_length = self._total_length / len(self._doc_ids)
+
+            slots, contributions = [], []
+            for term_id in term_ids:
+                term_slots = np.frombuffer(self._postings_slots[term_id], np.int32)
+                tfs = np.frombuffer(self._postings_tfs[term_id], np.float32)
+                norm = self.k1 * (
+                    1 - self.b + self.b * doc_lengths[term_slots] / average_length
+                )
+                slots.append(term_slots)
+                contributions.append(idf[term_id] * tfs * (self.k1 + 1) / (tfs + norm))
+
+            # Sum contributions per document over the matched postings only
+            slots = np.concatenate(slots)
+            unique_slots, inverse = np.unique(slots, return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(contributions))
+
+            keep = selected_mask[unique_slots].astype(bool)
+            unique_slots, scores = unique_slots[keep], scores[keep]
+            if len(scores) > top_k:
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                unique_slots, scores = unique_slots[best], scores[best]
+            order = np.argsort(-scores, kind="stable")
+
+            return [
+                (self._doc_ids[int(slot)], float(score))
+                for slot, score in zip(unique_slots[order], scores[order])
+            ]
+
+    async def ensure_loaded(
+        self, batch_size: int = 500, version: CorpusState | None = None
+    ):
+        """
+        Brings the index up to date with the database before a query.
+        - Reads the shared corpus version (one primary-key lookup); nothing
+          else happens while it matches the version the index reflects.
+        - A new selection version reloads the selected ids; a new documents
+          version indexes the documents above the largest id fetched so far,
+          in batches (the first call loads the whole corpus this way), so the
+          cost follows the new documents, not the corpus size. Writers take
+          the version row lock before allocating document ids, so ids commit
+          in increasing order and none can appear below that mark later.
+        - The version is read before the data, so a change committed
+          meanwhile is picked up by the next query; adds are idempotent.
+          Callers that already read it for the request pass it as `version`.
+        """
+        if version is None:
+            version = await current_corpus_version()
+        if version == self._version:
+            return
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+
+        async with self._load_lock:
+            synced = self._version
+            if version == synced:
+                return
+
+            async with AsyncSessionLocal() as db:
+                if synced is None or version.selection != synced.selection:
+                    selected = await db.execute(
+                        text("SELECT document_id FROM selected_documents;")
+                    )
+                    self.replace_selection(selected.scalars().all())
+
+                if synced is None or version.documents != synced.documents:
+                    while True:
+                        rows = (
+                            await db.execute(
+                                text("""
+                                    SELECT id, convert_from(content, 'UTF8') AS content
+                                    FROM documents
+                                    WHERE id > :last_id AND content IS NOT NULL
+                                    ORDER BY id
+                                    LIMIT :batch_size;
+                                """),
+                                {"last_id": self._last_id, "batch_size": batch_size},
+                            )
+                        ).all()
+                        if not rows:
+                            break
+                        await asyncio.to_thread(
+                            self.add_documents, [(row.id, row.content) for row in rows]
+                        )
+                        self._last_id = rows[-1].id
+                        if len(rows) < batch_size:
+                            break
+
+            self._version = version
+            self.loaded = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "documents": len(self._doc_ids),
+                "selected_documents": int(sum(self._selected_mask)),
+                "terms": len(self._vocabulary),
+                "postings": sum(len(slots) for slots in self._postings_slots),
+                "average_document_length": (
+                    self._total_length / len(self._doc_ids) if self._doc_ids else 0.0
+                ),
+            }
+
+
+# ✅ Process-wide index, synced with the database through the corpus version
+bm25_index = BM25Index()
+
+
+class BM25RetrievalService:
+    """
+    Handles document retrieval using BM25 ranking.
+    """
+
+    def __init__(self):
+        self.index = bm25_index  # Shared index (built once per process)
+
+    async def search(
+        self,
+        question: str,
+        top_k: int = 5,
+        corpus_version: CorpusState | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Returns (document_id, score) pairs of the best matching selected documents.
+        - `corpus_version` is the version the request already read, if any.
+        """
+        if not question.strip():
+            return []
+        await self.index.ensure_loaded(version=corpus_version)
+        return self.index.search(question, top_k)
+
+    async def retrieve_relevant_docs(self, question: str, top_k: int = 5) -> List[int]:
+        """Retrieves top-k relevant documents using BM25 scoring."""
+        return [doc_id for doc_id, _ in await self.search(question, top_k)]
+
+
+async def index_documents(documents: list[tuple[int, str]]):
+    """
+    Adds newly ingested documents to this process's BM25 index if it is
+    already loaded; other processes catch up through the corpus version.
+    """
+    if documents and bm25_index.active:
+        await asyncio.to_thread(bm25_index.add_documents, documents)
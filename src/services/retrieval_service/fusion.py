@@ -0,0 +1,117 @@
+from typing import Callable, Hashable
+from src.config import (
+    RETRIEVAL_HYBRID_FUSION,
+    RETRIEVAL_HYBRID_VECTOR_WEIGHT,
+    RETRIEVAL_RRF_K,
+)  # Import hybrid search defaults
+
+FUSION_METHODS = ("rrf", "weighted")
+
+
+def reciprocal_rank_fusion(
+    vector_ranks: dict[Hashable, int],
+    lexical_ranks: dict[Hashable, int],
+    k: int = RETRIEVAL_RRF_K,
+) -> dict[Hashable, float]:
+    """
+    Scores items by reciprocal rank fusion: sum over legs of 1 / (k + rank).
+    - Ranks start at 1; items a leg did not return get nothing from that leg.
+    - Only ranks are used, so distances and BM25 scores need no calibration.
+    """
+    scores: dict[Hashable, float] = {}
+    for ranks in (vector_ranks, lexical_ranks):
+        for item, rank in ranks.items():
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return scores
+
+
+def weighted_score_fusion(
+    vector_distances: dict[Hashable, float],
+    lexical_scores: dict[Hashable, float],
+    vector_weight: float = RETRIEVAL_HYBRID_VECTOR_WEIGHT,
+) -> dict[Hashable, float]:
+    """
+    Scores items by a weighted sum of min-max normalized leg scores.
+    - Distances are flipped so that 1 is the closest candidate and 0 the farthest.
+    - BM25 scores are divided by the best score; items a leg missed score 0 there.
+    """
+    scores = {item: 0.0 for item in (*vector_distances, *lexical_scores)}
+
+    if vector_distances:
+        closest, farthest = (
+            min(vector_distances.values()),
+            max(vector_distances.values()),
+        )
+        spread = farthest - closest
+        for item, distance in vector_distances.items():
+            similarity = (farthest - distance) / spread if spread > 0 else 1.0
+            scores[item] += vector_weight * similarity
+
+    if lexical_scores:
+        best = max(lexical_scores.values())
+        for item, score in lexical_scores.items():
+            scores[item] += (1 - vector_weight) * (score / best if best > 0 else 0.0)
+
+    return scores
+
+
+def text_rank_ranking(hits: list) -> list[tuple[int, float]]:
+    """
+    Turns `text_rank` values of hits into a lexical ranking of documents
+    (best rank per document, highest first); unmatched hits are left out.
+    """
+    best: dict[int, float] = {}
+    for hit in hits:
+        if hit.text_rank:
+            best[hit.document_id] = max(hit.text_rank, best.get(hit.document_id, 0.0))
+    return sorted(best.items(), key=lambda item: item[1], reverse=True)
+
+
+def fuse_hits(
+    hits: list,
+    lexical: list[tuple[int, float]],
+    top_k: int,
+    fusion: str | None = None,
+    key: Callable = lambda hit: hit.document_id,
+) -> list:
+    """
+    Re-ranks vector hits with lexical (document_id, score) results (BM25 or ts_rank).
+    - `hits` must already include the candidates found by the lexical leg
+      (the hybrid query fetches their distances in the same statement).
+    - A hit inherits the lexical rank/score of its document, so with chunk hits
+      every chunk of a keyword-matching document is boosted equally.
+    - Returns the `top_k` hits by fused score, with `score` set on each hit.
+    """
+    fusion = fusion or RETRIEVAL_HYBRID_FUSION
+    if fusion not in FUSION_METHODS:
+        raise ValueError(
+            f"Unknown fusion method '{fusion}'. "
+            f"Expected one of: {', '.join(FUSION_METHODS)}"
+        )
+
+    by_key = {key(hit): hit for hit in hits}
+    lexical_rank = {doc_id: rank for rank, (doc_id, _) in enumerate(lexical)}
+    lexical_score = dict(lexical)
+
+    if fusion == "rrf":
+        vector_order = sorted(by_key, key=lambda item: by_key[item].distance)
+        scores = reciprocal_rank_fusion(
+            {item: rank for rank, item in enumerate(vector_order, start=1)},
+            {
+                item: lexical_rank[hit.document_id] + 1
+                for item, hit in by_key.items()
+                if hit.document_id in lexical_rank
+            },  # Chunks of one document share its lexical rank
+        )
+    else:
+        scores = weighted_score_fusion(
+            {item: hit.distance for item, hit in by_key.items()},
+            {
+                item: lexical_score[hit.document_id]
+                for item, hit in by_key.items()
+                if hit.document_id in lexical_score
+            },
+        )
+
+    ranked = sorted(by_key, key=lambda item: scores[item], reverse=True)[:top_k]
+    return [by_key[item].model_copy(update={"score": scores[item]}) for item in ranked]
@@ -1,10 +1,335 @@
+import asyncio
 from sqlalchemy.sql import text  # Import SQL utilities for executing raw queries
+from src.config import (
+    RETRIEVAL_DISTANCE_METRIC,
+    RETRIEVAL_HNSW_EF_SEARCH,
+    RETRIEVAL_IVFFLAT_PROBES,
+    RETRIEVAL_CACHE_ENABLED,
+    RETRIEVAL_CACHE_SIZE,
+    RETRIEVAL_CACHE_TTL_SECONDS,
+    RETRIEVAL_HYBRID_FUSION,
+    RETRIEVAL_HYBRID_CANDIDATES,
+    RETRIEVAL_HYBRID_LEXICAL,
+    COALESCING_ENABLED,
+)  # Import configured search defaults
+from src.backend.core.cache import TTLCache  # Import result cache
+from src.backend.database.corpus_version import (
+    CorpusState,
+    current_corpus_version,
+)  # Import shared corpus version (result-cache invalidation)
+from src.backend.core.singleflight import SingleFlight  # Import request coalescing
 from src.backend.database.config import (
     AsyncSessionLocal,
 )  # Import async database session
-from src.services.ingestion_service.embedding_generator import (
-    EmbeddingGenerator,
-)  # Import embedding generator
+from src.services.retrieval_service.schemas import (
+    ChunkHit,
+    SearchHit,
+)  # Import hit schemas
+from src.services.ingestion_service.model_registry import (
+    get_embedding_generator,
+)  # Import shared embedding generator
+from src.services.ingestion_service.embedding_cache import normalize_text
+from src.services.retrieval_service.bm25_retrieval import (
+    BM25RetrievalService,
+)  # Import lexical (BM25) leg of hybrid search
+from src.services.retrieval_service.fusion import (
+    FUSION_METHODS,
+    fuse_hits,
+    text_rank_ranking,
+)  # Import rank fusion
+
+# ✅ Process-wide cache of search results; keys include the corpus version, so
+# results computed before an ingestion or selection change are never served
+retrieval_result_cache = (
+    TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL_SECONDS)
+    if RETRIEVAL_CACHE_ENABLED
+    else None
+)
+
+# ✅ Concurrent cache misses for the same result key run one search between them
+retrieval_flights = SingleFlight("retrieval", enabled=COALESCING_ENABLED)
+
+# Characters of document text returned with each hit when snippets are requested
+SNIPPET_CHARS = 300
+
+# pgvector operators per distance metric (smaller is always closer).
+# "<#>" returns the negative inner product; on unit-length vectors it ranks
+# exactly like cosine distance but skips the norm computation.
+DISTANCE_OPERATORS = {
+    "l2": "<->",
+    "inner_product": "<#>",
+    "cosine": "<=>",
+}
+
+
+# "vector": embedding search only; "hybrid": vector + lexical leg fused per request
+SEARCH_MODES = ("vector", "hybrid")
+
+# Lexical leg of hybrid search: in-memory BM25 or Postgres full-text search
+LEXICAL_ENGINES = ("bm25", "postgres")
+
+# Full-text queries; the config must match documents_search_vector() (migration).
+# The lexical leg and text_rank use the question; the keyword filter its keywords
+TEXT_QUERY = "websearch_to_tsquery('english', :text_query)"
+KEYWORD_QUERY = "websearch_to_tsquery('english', :keywords)"
+
+
+def distance_operator(metric: str) -> str:
+    """
+    Returns the pgvector operator for `metric`, rejecting unknown metrics.
+    """
+    if metric not in DISTANCE_OPERATORS:
+        raise ValueError(
+            f"Unknown distance metric '{metric}'. "
+            f"Expected one of: {', '.join(DISTANCE_OPERATORS)}"
+        )
+    return DISTANCE_OPERATORS[metric]
+
+
+def search_settings(ef_search: int | None, probes: int | None) -> list[str]:
+    """
+    Returns the SET LOCAL statements applying the ANN search knobs.
+    - `ef_search` sizes the HNSW candidate list (higher = better recall, slower).
+    - `probes` is the number of IVFFlat lists scanned.
+    - SET does not accept bind parameters, so values are validated as ints.
+    """
+    statements = []
+    if ef_search is not None:
+        statements.append(f"SET LOCAL hnsw.ef_search = {_positive_int(ef_search)}")
+    if probes is not None:
+        statements.append(f"SET LOCAL ivfflat.probes = {_positive_int(probes)}")
+    return statements
+
+
+def _positive_int(value) -> int:
+    value = int(value)
+    if value < 1:
+        raise ValueError("ANN search parameters must be positive integers")
+    return value
+
+
+def text_search_parts(keywords: bool, ranked: bool) -> tuple[str, str]:
+    """
+    Returns the (keyword filter, text rank column) SQL fragments.
+    - The filter is a semi-join on the GIN-indexed `documents.search_vector`
+      matching `:keywords`, so keyword-constrained search stays one statement.
+    - The rank column reads `d.search_vector` (documents must be joined as `d`).
+    """
+    keyword_filter = (
+        f"""AND EXISTS (
+            SELECT 1 FROM documents k
+            WHERE k.id = {{alias}}.document_id AND k.search_vector @@ {KEYWORD_QUERY}
+        )"""
+        if keywords
+        else ""
+    )
+    rank_column = (
+        f", ts_rank(d.search_vector, {TEXT_QUERY}) AS text_rank" if ranked else ""
+    )
+    return keyword_filter, rank_column
+
+
+def lexical_candidates(lexical: str | None, alias: str) -> str:
+    """
+    Returns the SQL condition selecting the lexical leg's documents (hybrid search).
+    - "ids": documents ranked by the in-memory BM25 index (`:lexical_ids`).
+    - "postgres": the top_k selected documents by `ts_rank` on `:text_query`.
+    """
+    if lexical == "ids":
+        return f"{alias}.document_id = ANY(:lexical_ids)"
+    return f"""{alias}.document_id IN (
+        SELECT t.id FROM documents t
+        WHERE t.search_vector @@ {TEXT_QUERY}
+          AND EXISTS (SELECT 1 FROM selected_documents s WHERE s.document_id = t.id)
+        ORDER BY ts_rank(t.search_vector, {TEXT_QUERY}) DESC
+        LIMIT :top_k
+    )"""
+
+
+def eligible_rows(table: str, alias: str, keyword_filter: str) -> str:
+    """
+    Returns the rows an exact search could return (selected and matching the
+    keywords), capped at top_k so counting them stays cheap.
+    """
+    return f"""
+        SELECT 1 FROM {table} {alias}
+        WHERE EXISTS (
+            SELECT 1 FROM selected_documents s WHERE s.document_id = {alias}.document_id
+        )
+        {keyword_filter.format(alias=alias)}
+        LIMIT :top_k
+    """
+
+
+def with_coverage(nearest: str, hits: str, eligible: str):
+    """
+    Wraps a search as one statement whose rows also report `nearest_rows`
+    (rows the nearest-neighbour leg found) and `eligible_rows` (see
+    `eligible_rows`), both read in the statement's own snapshot.
+    - `hits` selects the result rows from the `nearest` CTE; with no hits a
+      single row of NULLs still carries the counts.
+    """
+    return text(f"""
+        WITH nearest AS ({nearest}),
+        hits AS ({hits}),
+        coverage AS (
+            SELECT (SELECT count(*) FROM nearest) AS nearest_rows,
+                   (SELECT count(*) FROM ({eligible}) x) AS eligible_rows
+        )
+        SELECT hits.*, coverage.nearest_rows, coverage.eligible_rows
+        FROM coverage LEFT JOIN hits ON true
+        ORDER BY hits.distance;
+    """).execution_options(cacheable=False)
+
+
+def build_search_query(
+    operator: str,
+    include_snippets: bool,
+    truncate_snippets: bool = True,
+    lexical: str | None = None,
+    keywords: bool = False,
+):
+    """
+    Builds the single-statement filtered vector search.
+    - EXISTS on `selected_documents` lets the planner pick a semi-join (hash or
+      nested loop over ix_embeddings_document_id) depending on selection size.
+    - Snippets are decoded server-side from `documents.content` when requested;
+      with `truncate_snippets=False` the full document text is returned.
+    - `lexical` ("ids" or "postgres", see `lexical_candidates`) adds the lexical
+      leg's documents, with their distances, for hybrid search.
+    - `keywords=True` keeps only documents matching `:keywords` (full-text).
+    - With full-text search involved, each row also carries its `text_rank`.
+    - Rows carry the coverage counts of `with_coverage`.
+    """
+    ranked = keywords or lexical == "postgres"
+    keyword_filter, rank_column = text_search_parts(keywords, ranked)
+
+    snippet_text = "convert_from(d.content, 'UTF8')"
+    if truncate_snippets:
+        snippet_text = f"left({snippet_text}, :snippet_chars)"
+    snippet_column = f", {snippet_text} AS snippet" if include_snippets else ""
+    snippet_join = (
+        "LEFT JOIN documents d ON d.id = e.document_id"
+        if include_snippets or ranked
+        else ""
+    )
+    nearest = f"""
+        SELECT e.document_id,
+               e.vector {operator} CAST(:query_embedding AS vector) AS distance
+               {snippet_column}
+               {rank_column}
+        FROM embeddings e
+        {snippet_join}
+        WHERE EXISTS (
+            SELECT 1 FROM selected_documents s WHERE s.document_id = e.document_id
+        )
+        {keyword_filter.format(alias="e")}
+        ORDER BY distance
+        LIMIT :top_k
+    """
+    hits = "SELECT * FROM nearest"
+    if lexical is not None:
+        hits += f"""
+        UNION
+        SELECT e.document_id,
+               e.vector {operator} CAST(:query_embedding AS vector) AS distance
+               {snippet_column}
+               {rank_column}
+        FROM embeddings e
+        JOIN selected_documents s ON s.document_id = e.document_id
+        {snippet_join}
+        WHERE {lexical_candidates(lexical, "e")}
+        {keyword_filter.format(alias="e")}
+        """
+    return with_coverage(
+        nearest, hits, eligible_rows("embeddings", "e", keyword_filter)
+    )
+
+
+def build_chunk_search_query(
+    operator: str, lexical: str | None = None, keywords: bool = False
+):
+    """
+    Builds the single-statement filtered search over document chunks.
+    - The inner query ranks chunks of selected documents (same semi-join as
+      `build_search_query`); only the top_k survivors are then joined to
+      `documents` to slice their text, so no other document is decoded.
+    - `lexical` adds the closest chunk of every document found by the lexical
+      leg to the candidates (hybrid search); `keywords` and the coverage
+      counts work as in `build_search_query`.
+    """
+    ranked = keywords or lexical == "postgres"
+    keyword_filter, rank_column = text_search_parts(keywords, ranked)
+
+    nearest = f"""
+            SELECT c.document_id, c.chunk_index, c.start_char, c.end_char,
+                   c.vector {operator} CAST(:query_embedding AS vector) AS distance
+            FROM chunks c
+            WHERE EXISTS (
+                SELECT 1 FROM selected_documents s
+                WHERE s.document_id = c.document_id
+            )
+            {keyword_filter.format(alias="c")}
+            ORDER BY distance
+            LIMIT :top_k
+    """
+    candidates = "SELECT * FROM nearest"
+    if lexical is not None:
+        candidates = f"""
+            (SELECT * FROM nearest)
+            UNION
+            (
+                SELECT DISTINCT ON (c.document_id)
+                       c.document_id, c.chunk_index, c.start_char, c.end_char,
+                       c.vector {operator} CAST(:query_embedding AS vector) AS distance
+                FROM chunks c
+                JOIN selected_documents s ON s.document_id = c.document_id
+                WHERE {lexical_candidates(lexical, "c")}
+                {keyword_filter.format(alias="c")}
+                ORDER BY c.document_id, distance
+            )
+        """
+
+    hits = f"""
+        SELECT h.document_id, h.chunk_index, h.start_char, h.end_char, h.distance,
+               substr(
+                   convert_from(d.content, 'UTF8'),
+                   h.start_char + 1,
+                   h.end_char - h.start_char
+               ) AS text
+               {rank_column}
+        FROM ({candidates}) h
+        JOIN documents d ON d.id = h.document_id
+    """
+    return with_coverage(nearest, hits, eligible_rows("chunks", "c", keyword_filter))
+
+
+def lexical_source(lexical_ids: list[int] | None, fulltext: str | None) -> str | None:
+    """
+    Returns which lexical candidates a search statement adds ("ids", "postgres").
+    """
+    if lexical_ids:
+        return "ids"
+    return "postgres" if fulltext else None
+
+
+async def run_filtered_search(db, query, params: dict):
+    """
+    Runs the filtered vector search, falling back to an exact scan if needed.
+    - HNSW / IVFFlat apply the selection filter after collecting their
+      ef_search / probes candidates, so a selective filter can leave fewer
+      than top_k rows. Only when the nearest leg found fewer rows than
+      min(top_k, eligible rows) (counted by the same statement) is the query
+      re-run in the same transaction with index scans disabled, which returns
+      the exact nearest selected documents. A selection smaller than top_k
+      is not a reason to re-run.
+    - Returns the hit rows (without the empty row of a search with no hits).
+    """
+    rows = (await db.execute(query, params)).all()
+    if rows and rows[0].nearest_rows < rows[0].eligible_rows:
+        await db.execute(text("SET LOCAL enable_indexscan = off"))
+        rows = (await db.execute(query, params)).all()
+    return [row for row in rows if row.document_id is not None]
 
 
 class RetrievalService:
@@ -14,61 +339,457 @@ class RetrievalService:
 
     def __init__(self):
         self.embedding_generator = (
-            EmbeddingGenerator()
-        )  # Initialize embedding generator instance
+            get_embedding_generator()
+        )  # Shared, process-wide embedding generator instance
+        self.bm25_service = BM25RetrievalService()  # Shared in-memory BM25 index
 
-    async def retrieve_relevant_docs(self, question: str, top_k: int = 5):
+    @staticmethod
+    def mode_params(
+        mode: str,
+        fusion: str | None,
+        lexical: str | None = None,
+        keywords: str | None = None,
+    ) -> dict:
         """
-        Converts the query into an embedding and retrieves the most similar documents asynchronously.
-        - Generates an embedding for the query.
-        - Retrieves selected document IDs from the database.
-        - Performs vector similarity search to find the closest matches.
+        Validates the search mode; returns the extra cache-key params it implies.
+        - Plain vector searches keep their original keys (no extra params).
         """
-        async with AsyncSessionLocal() as db:  # Open async database session
-            async with db.begin():  # Start a database transaction
-                # ✅ Generate embedding asynchronously
-                query_embedding = await self.embedding_generator.generate_embedding(
-                    question
-                )
+        if mode not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown search mode '{mode}'. Expected one of: {', '.join(SEARCH_MODES)}"
+            )
+        params = {"keywords": keywords} if keywords else {}
+        if mode == "vector":
+            return params
+        if fusion is not None and fusion not in FUSION_METHODS:
+            raise ValueError(
+                f"Unknown fusion method '{fusion}'. "
+                f"Expected one of: {', '.join(FUSION_METHODS)}"
+            )
+        if lexical is not None and lexical not in LEXICAL_ENGINES:
+            raise ValueError(
+                f"Unknown lexical engine '{lexical}'. "
+                f"Expected one of: {', '.join(LEXICAL_ENGINES)}"
+            )
+        return {
+            **params,
+            "mode": mode,
+            "fusion": fusion or RETRIEVAL_HYBRID_FUSION,
+            "lexical": lexical or RETRIEVAL_HYBRID_LEXICAL,
+        }
 
-                # Handle invalid embedding
-                if query_embedding is None:
-                    return []
+    async def hybrid_legs(
+        self,
+        question: str,
+        candidates: int,
+        lexical: str | None = None,
+        corpus_version: CorpusState | None = None,
+    ):
+        """
+        Runs both legs of hybrid search concurrently and returns
+        (query_embedding, lexical results).
+        - The BM25 leg is in memory, so it finishes while the query is still
+          being embedded; the database is then queried once for both legs.
+        - With the "postgres" engine the lexical results are None: full-text
+          ranking happens inside the vector search statement itself.
+        - `corpus_version` is the version already read for the request's cache
+          key; the BM25 index syncs to it without reading it again.
+        """
+        if (lexical or RETRIEVAL_HYBRID_LEXICAL) == "postgres":
+            return await self.embed_query(question), None
+        return await asyncio.gather(
+            self.embed_query(question),
+            self.bm25_service.search(
+                question, candidates, corpus_version=corpus_version
+            ),
+        )
+
+    @staticmethod
+    def lexical_leg(question: str, lexical: list[tuple[int, float]] | None) -> dict:
+        """
+        Returns the search arguments adding the lexical leg's candidates:
+        BM25 document ids, or the question as a full-text query (None results).
+        """
+        if lexical is None:
+            return {"fulltext": question}
+        return {"lexical_ids": [doc_id for doc_id, _ in lexical]}
+
+    @staticmethod
+    async def result_key(
+        kind: str,
+        question: str,
+        corpus_version: CorpusState | None = None,
+        **params,
+    ) -> tuple:
+        """
+        Builds the result-cache key for a search of `kind` ("documents", "chunks").
+        - Captures the committed corpus version from the database, so a change
+          made by any process invalidates the entries of every process.
+        - Compute it before searching: a concurrent corpus change can then only
+          make the stored entry unreachable, never serve it stale.
+        - Pass `corpus_version` when the request already read it (one read per
+          request); it is read here otherwise.
+        """
+        if corpus_version is None:
+            corpus_version = await current_corpus_version()
+        return (
+            kind,
+            normalize_text(question),
+            tuple(sorted(params.items())),
+            corpus_version,
+        )
+
+    @staticmethod
+    def cached_results(key: tuple) -> list | None:
+        """
+        Returns cached hits for `key` (a copy), or None on a miss.
+        """
+        if retrieval_result_cache is None:
+            return None
+        hits = retrieval_result_cache.get(key)
+        return list(hits) if hits is not None else None
 
-                # ✅ Convert NumPy array to PostgreSQL-compatible format
-                query_embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
+    @staticmethod
+    def cache_results(key: tuple, hits: list):
+        if retrieval_result_cache is not None:
+            retrieval_result_cache.put(key, tuple(hits))
 
-                # ✅ Fetch selected document IDs asynchronously
-                selected_ids_result = await db.execute(
-                    text("SELECT document_id FROM selected_documents;")
+    async def embed_query(self, question: str):
+        """
+        Converts the question into a query embedding (None if it cannot be embedded).
+        """
+        return await self.embedding_generator.generate_embedding(question)
+
+    async def search(
+        self,
+        question: str,
+        top_k: int = 5,
+        metric: str | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        include_snippets: bool = False,
+        snippet_chars: int | None = SNIPPET_CHARS,
+        mode: str = "vector",
+        fusion: str | None = None,
+        lexical: str | None = None,
+        keywords: str | None = None,
+    ) -> list[SearchHit]:
+        """
+        Embeds the query and runs the filtered vector search in one SQL statement.
+        - See `search_by_embedding` for the search itself.
+        - `mode="hybrid"` also ranks selected documents lexically and fuses both
+          rankings (`fusion`: "rrf" or "weighted"; `lexical`: "bm25" or
+          "postgres" full-text search; defaults from config).
+        - `keywords` restricts results to documents matching a full-text query.
+        - Repeated questions are answered from the result cache, skipping both
+          the model and the database; identical searches already in flight
+          are joined instead of being run again.
+        """
+        version = await current_corpus_version()
+        key = await self.result_key(
+            "documents",
+            question,
+            corpus_version=version,
+            top_k=top_k,
+            metric=metric,
+            ef_search=ef_search,
+            probes=probes,
+            include_snippets=include_snippets,
+            snippet_chars=snippet_chars,
+            **self.mode_params(mode, fusion, lexical, keywords),
+        )
+        hits = self.cached_results(key)
+        if hits is not None:
+            return hits
+
+        async def compute():
+            if mode == "hybrid":
+                # ✅ Both legs fetch more candidates than needed; fusion picks top_k
+                candidates = top_k * RETRIEVAL_HYBRID_CANDIDATES
+                query_embedding, lexical_hits = await self.hybrid_legs(
+                    question, candidates, lexical, corpus_version=version
+                )
+                hits = await self.search_by_embedding(
+                    query_embedding,
+                    candidates,
+                    metric=metric,
+                    ef_search=ef_search,
+                    probes=probes,
+                    include_snippets=include_snippets,
+                    snippet_chars=snippet_chars,
+                    keywords=keywords,
+                    **self.lexical_leg(question, lexical_hits),
                 )
+                if lexical_hits is None:
+                    lexical_hits = text_rank_ranking(hits)
+                hits = fuse_hits(hits, lexical_hits, top_k, fusion)
+            else:
+                # ✅ Generate embedding before opening a connection (model time is not DB time)
+                query_embedding = await self.embed_query(question)
 
-                selected_ids = selected_ids_result.scalars().all()
+                hits = await self.search_by_embedding(
+                    query_embedding,
+                    top_k,
+                    metric=metric,
+                    ef_search=ef_search,
+                    probes=probes,
+                    include_snippets=include_snippets,
+                    snippet_chars=snippet_chars,
+                    keywords=keywords,
+                )
+            self.cache_results(key, hits)
+            return hits
+
+        # ✅ Concurrent identical searches share one embedding and query
+        return list(await retrieval_flights.do(key, compute))
 
-                # ✅ Ensure selected_ids is not empty to prevent SQL errors
-                if not selected_ids:
-                    selected_ids = [-1]  # Dummy ID to avoid SQL failure
+    async def search_by_embedding(
+        self,
+        query_embedding,
+        top_k: int = 5,
+        metric: str | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        include_snippets: bool = False,
+        snippet_chars: int | None = SNIPPET_CHARS,
+        lexical_ids: list[int] | None = None,
+        fulltext: str | None = None,
+        keywords: str | None = None,
+    ) -> list[SearchHit]:
+        """
+        Runs the filtered vector search for an already computed query embedding.
+        - The selection filter is a semi-join on `selected_documents`, so selected
+          IDs never travel to Python and back.
+        - Returns document ids with their distances (and snippets if requested).
+        - `snippet_chars=None` returns the full document text as the snippet.
+        - `metric` overrides the configured distance metric (l2, inner_product, cosine).
+        - `ef_search` / `probes` tune HNSW / IVFFlat recall for this query only.
+        - `lexical_ids` adds these (selected) documents to the results, so hybrid
+          search gets distances for lexical-only matches in the same statement.
+        - `fulltext` instead adds the best full-text matches for this text
+          (Postgres leg of hybrid search), ranked with `ts_rank`.
+        - `keywords` keeps only documents matching this full-text query; it
+          never replaces `fulltext` as the lexical leg's query.
+        - With `fulltext` or `keywords`, hits carry their `text_rank` (for
+          `fulltext` when given, else for `keywords`).
+        """
+        operator = distance_operator(metric or RETRIEVAL_DISTANCE_METRIC)
+        settings = search_settings(
+            ef_search if ef_search is not None else RETRIEVAL_HNSW_EF_SEARCH,
+            probes if probes is not None else RETRIEVAL_IVFFLAT_PROBES,
+        )
 
-                # ✅ Execute the vector similarity search query
-                search_query = text("""
-                    SELECT document_id FROM embeddings
-                    WHERE document_id = ANY(:selected_ids)
-                    ORDER BY vector <-> CAST(:query_embedding AS vector)
-                    LIMIT :top_k;
-                """).execution_options(cacheable=False)
+        # Handle invalid embedding
+        if query_embedding is None:
+            return []
+
+        # ✅ Convert NumPy array to PostgreSQL-compatible format
+        query_embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
+
+        async with AsyncSessionLocal() as db:  # Open async database session
+            async with db.begin():  # Start a database transaction
+                # ✅ Apply ANN knobs; SET LOCAL is scoped to this transaction
+                for statement in settings:
+                    await db.execute(text(statement))
 
-                results = await db.execute(
-                    search_query,
+                rows = await run_filtered_search(
+                    db,
+                    build_search_query(
+                        operator,
+                        include_snippets,
+                        truncate_snippets=snippet_chars is not None,
+                        lexical=lexical_source(lexical_ids, fulltext),
+                        keywords=bool(keywords),
+                    ),
                     {
                         "query_embedding": query_embedding_str,  # Pass as string
                         "top_k": top_k,
-                        "selected_ids": selected_ids,
+                        "snippet_chars": snippet_chars,
+                        "lexical_ids": lexical_ids or [],
+                        "text_query": fulltext or keywords,
+                        "keywords": keywords,
+                    },
+                )
+
+                return [
+                    SearchHit(
+                        document_id=row.document_id,
+                        distance=row.distance,
+                        snippet=row.snippet if include_snippets else None,
+                        text_rank=row._mapping.get("text_rank"),
+                    )
+                    for row in rows
+                ]
+
+    async def search_chunks_by_embedding(
+        self,
+        query_embedding,
+        top_k: int = 5,
+        metric: str | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        lexical_ids: list[int] | None = None,
+        fulltext: str | None = None,
+        keywords: str | None = None,
+    ) -> list[ChunkHit]:
+        """
+        Returns the `top_k` closest chunks of selected documents, with their text.
+        - Same selection filter, metric, ANN knobs and lexical / keyword
+          options as `search_by_embedding`.
+        - Lexical candidates contribute the closest chunk of each document.
+        """
+        operator = distance_operator(metric or RETRIEVAL_DISTANCE_METRIC)
+        settings = search_settings(
+            ef_search if ef_search is not None else RETRIEVAL_HNSW_EF_SEARCH,
+            probes if probes is not None else RETRIEVAL_IVFFLAT_PROBES,
+        )
+
+        # Handle invalid embedding
+        if query_embedding is None:
+            return []
+
+        query_embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
+
+        async with AsyncSessionLocal() as db:  # Open async database session
+            async with db.begin():  # Start a database transaction
+                for statement in settings:
+                    await db.execute(text(statement))
+
+                rows = await run_filtered_search(
+                    db,
+                    build_chunk_search_query(
+                        operator,
+                        lexical=lexical_source(lexical_ids, fulltext),
+                        keywords=bool(keywords),
+                    ),
+                    {
+                        "query_embedding": query_embedding_str,
+                        "top_k": top_k,
+                        "lexical_ids": lexical_ids or [],
+                        "text_query": fulltext or keywords,
+                        "keywords": keywords,
                     },
                 )
+                return [ChunkHit(**row._mapping) for row in rows]
 
-                # ✅ Extract document IDs from query results
-                document_ids = list(results.scalars())
-                return document_ids
+    async def search_chunks(
+        self,
+        question: str,
+        top_k: int = 5,
+        metric: str | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        mode: str = "vector",
+        fusion: str | None = None,
+        lexical: str | None = None,
+        keywords: str | None = None,
+    ) -> list[ChunkHit]:
+        """
+        Embeds the query and returns the closest chunks of selected documents.
+        - `mode="hybrid"` fuses chunk distances with the lexical rank of their
+          documents; `keywords` filters as in `search`.
+        - Served from the result cache when the same search was run before,
+          and joined when the same search is in flight.
+        """
+        version = await current_corpus_version()
+        key = await self.result_key(
+            "chunks",
+            question,
+            corpus_version=version,
+            top_k=top_k,
+            metric=metric,
+            ef_search=ef_search,
+            probes=probes,
+            **self.mode_params(mode, fusion, lexical, keywords),
+        )
+        hits = self.cached_results(key)
+        if hits is not None:
+            return hits
+
+        async def compute():
+            if mode == "hybrid":
+                query_embedding, lexical_hits = await self.hybrid_legs(
+                    question,
+                    top_k * RETRIEVAL_HYBRID_CANDIDATES,
+                    lexical,
+                    corpus_version=version,
+                )
+                hits = await self.hybrid_search_chunks(
+                    question,
+                    query_embedding,
+                    lexical_hits,
+                    top_k,
+                    metric=metric,
+                    ef_search=ef_search,
+                    probes=probes,
+                    fusion=fusion,
+                    keywords=keywords,
+                )
+            else:
+                query_embedding = await self.embed_query(question)
+                hits = await self.search_chunks_by_embedding(
+                    query_embedding,
+                    top_k,
+                    metric=metric,
+                    ef_search=ef_search,
+                    probes=probes,
+                    keywords=keywords,
+                )
+            self.cache_results(key, hits)
+            return hits
+
+        # ✅ Concurrent identical searches share one embedding and query
+        return list(await retrieval_flights.do(key, compute))
+
+    async def hybrid_search_chunks(
+        self,
+        question: str,
+        query_embedding,
+        lexical: list[tuple[int, float]] | None,
+        top_k: int = 5,
+        metric: str | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        fusion: str | None = None,
+        keywords: str | None = None,
+    ) -> list[ChunkHit]:
+        """
+        Fuses chunk search with the lexical leg computed by `hybrid_legs`
+        (BM25 results, or None to rank with Postgres full-text search).
+        """
+        hits = await self.search_chunks_by_embedding(
+            query_embedding,
+            top_k * RETRIEVAL_HYBRID_CANDIDATES,
+            metric=metric,
+            ef_search=ef_search,
+            probes=probes,
+            keywords=keywords,
+            **self.lexical_leg(question, lexical),
+        )
+        return fuse_hits(
+            hits,
+            lexical if lexical is not None else text_rank_ranking(hits),
+            top_k,
+            fusion,
+            key=lambda hit: (hit.document_id, hit.chunk_index),
+        )
+
+    async def retrieve_relevant_docs(
+        self,
+        question: str,
+        top_k: int = 5,
+        metric: str | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ):
+        """
+        Converts the query into an embedding and retrieves the most similar documents asynchronously.
+        - Returns only the ids of the closest selected documents (see `search`).
+        """
+        hits = await self.search(
+            question, top_k, metric=metric, ef_search=ef_search, probes=probes
+        )
+        return [hit.document_id for hit in hits]
 
     async def get_document_texts(self, document_ids: list[int]):
         """
@@ -1,7 +1,8 @@
+from typing import Literal
 from fastapi import APIRouter, Depends
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from .retrieval import RetrievalService
-# from .bm25_retrieval import BM25RetrievalService  # ✅ Import BM25 retrieval service
+from .bm25_retrieval import BM25RetrievalService  # ✅ Import BM25 retrieval service
 
 import logging
 
@@ -16,6 +17,14 @@ router = APIRouter()
 class QueryRequest(BaseModel):
     question: str
     top_k: int = 5  # Default value
+    metric: Literal["l2", "inner_product", "cosine"] | None = None  # Config default
+    ef_search: int | None = Field(None, ge=1, le=1000)  # HNSW candidate list size
+    probes: int | None = Field(None, ge=1, le=32768)  # IVFFlat lists to scan
+    include_snippets: bool = False  # Return a text snippet with each hit
+    mode: Literal["vector", "hybrid"] = "vector"  # Hybrid adds a BM25 leg
+    fusion: Literal["rrf", "weighted"] | None = None  # Hybrid fusion (config default)
+    lexical: Literal["bm25", "postgres"] | None = None  # Hybrid lexical leg
+    keywords: str | None = None  # Only return documents matching this full-text query
 
 
 # ✅ Embedding-based retrieval route
@@ -26,35 +35,80 @@ async def retrieve_documents(
     """
     Accepts a user query, retrieves the most relevant documents using embeddings,
     and returns matching document contents.
+    - `mode="hybrid"` runs the vector and lexical legs concurrently and fuses them.
+    - `keywords` constrains the search to full-text matches in the same query.
     """
 
     # ✅ Debug: Print the received request
     logger.debug(f"Received Request: {request}")
 
-    results = await service.retrieve_relevant_docs(request.question, request.top_k)
+    hits = await service.search(
+        request.question,
+        request.top_k,
+        metric=request.metric,
+        ef_search=request.ef_search,
+        probes=request.probes,
+        include_snippets=request.include_snippets,
+        mode=request.mode,
+        fusion=request.fusion,
+        lexical=request.lexical,
+        keywords=request.keywords,
+    )
 
     # ✅ Debug: Print the retrieved documents
-    logger.debug(f"Retrieved Documents (Embedding): {results}")
+    logger.debug(f"Retrieved Documents (Embedding): {hits}")
 
-    return {"documents": results}
+    return {
+        "documents": [hit.document_id for hit in hits],
+        "results": [hit.model_dump(exclude_none=True) for hit in hits],
+    }
 
 
-# ✅ BM25-based retrieval route
-# @router.post("/search/bm25")
-# async def retrieve_documents_bm25(
-#     request: QueryRequest, service: BM25RetrievalService = Depends()
-# ):
-#     """
-#     Accepts a user query, retrieves the most relevant documents using BM25 ranking,
-#     and returns matching document contents.
-#     """
+# ✅ Chunk-level retrieval route
+@router.post("/search/chunks")
+async def retrieve_chunks(request: QueryRequest, service: RetrievalService = Depends()):
+    """
+    Accepts a user query and returns the most relevant chunks of selected
+    documents, with their character offsets and text.
+    """
+    logger.debug(f"Received Request (chunks): {request}")
+
+    hits = await service.search_chunks(
+        request.question,
+        request.top_k,
+        metric=request.metric,
+        ef_search=request.ef_search,
+        probes=request.probes,
+        mode=request.mode,
+        fusion=request.fusion,
+        lexical=request.lexical,
+        keywords=request.keywords,
+    )
+
+    return {"results": [hit.model_dump(exclude_none=True) for hit in hits]}
+
 
-#     # ✅ Debug: Print the received request
-#     logger.debug(f"Received Request (BM25): {request}")
+# ✅ BM25-based retrieval route
+@router.post("/search/bm25")
+async def retrieve_documents_bm25(
+    request: QueryRequest, service: BM25RetrievalService = Depends()
+):
+    """
+    Accepts a user query and ranks the selected documents with BM25 using
+    the in-memory inverted index (loaded once, then updated incrementally).
+    """
 
-#     results = await service.retrieve_relevant_docs(request.question, request.top_k)
+    # ✅ Debug: Print the received request
+    logger.debug(f"Received Request (BM25): {request}")
 
-#     # ✅ Debug: Print the retrieved documents
-#     logger.debug(f"Retrieved Documents (BM25): {results}")
+    results = await service.search(request.question, request.top_k)
 
-#     return {"documents": results}
+    # ✅ Debug: Print the retrieved documents
+    logger.debug(f"Retrieved Documents (BM25): {results}")
+
+    return {
+        "documents": [doc_id for doc_id, _ in results],
+        "results": [
+            {"document_id": doc_id, "score": score} for doc_id, score in results
+        ],
+    }
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 
 class QueryRequest(BaseModel):
@@ -15,3 +16,31 @@ class QueryResponse(BaseModel):
     """
 
     answer: str
+
+
+class SearchHit(BaseModel):
+    """
+    A single vector search result: document id, distance and optional snippet.
+    - Hybrid search also sets the fused `score` (higher is better).
+    """
+
+    document_id: int
+    distance: float
+    snippet: Optional[str] = None
+    score: Optional[float] = None  # Fused score (hybrid search only)
+    text_rank: Optional[float] = None  # ts_rank (full-text search only)
+
+
+class ChunkHit(BaseModel):
+    """
+    A chunk-level search result: the chunk's position in its document and text.
+    """
+
+    document_id: int
+    chunk_index: int
+    start_char: int
+    end_char: int
+    distance: float
+    text: Optional[str] = None
+    score: Optional[float] = None  # Fused score (hybrid search only)
+    text_rank: Optional[float] = None  # ts_rank (full-text search only)
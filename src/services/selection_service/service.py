@@ -1,11 +1,18 @@
 from sqlalchemy.future import select  # Import select function for async queries
 from sqlalchemy import delete  # Import delete function to remove records
+from sqlalchemy.dialects.postgresql import insert  # Import upsert-capable insert
 from sqlalchemy.orm import (
     sessionmaker,
 )  # Import sessionmaker for creating database sessions
 from src.backend.database.config import (
     AsyncSessionLocal,
 )  # Import async session factory for DB connection
+from src.backend.database.corpus_version import (
+    bump_corpus_version,
+)  # Import shared corpus version (result-cache invalidation)
+from src.services.retrieval_service.bm25_retrieval import (
+    bm25_index,
+)  # Import in-memory BM25 index
 from src.backend.database.models import (
     SelectedDocument,
 )  # Import ORM model for selected documents
@@ -46,15 +53,27 @@ class DocumentSelectionService:
     async def add_selected_documents(self, request: DocumentSelectionRequest) -> dict:
         """
         Adds document IDs to the selection list.
-        - Inserts document IDs into the `selected_documents` table.
+        - Inserts document IDs into the `selected_documents` table in one statement.
+        - Already-selected IDs are skipped (unique index on document_id).
         - Uses a transaction that auto-commits on success.
+        - Bumps the corpus version so cached search results are not reused.
+        - Updates the selection mask of the in-memory BM25 index.
         """
+        document_ids = sorted(
+            {int(doc_id) for doc_id in request.document_ids}
+        )  # Convert document IDs to integers and drop duplicates
+
         async with self.SessionLocal() as session:  # Open async database session
             async with session.begin():  # Start transaction (auto-commits on exit)
-                for doc_id in request.document_ids:
-                    session.add(
-                        SelectedDocument(document_id=int(doc_id))
-                    )  # Add each document ID
+                if document_ids:
+                    await session.execute(
+                        insert(SelectedDocument)
+                        .values([{"document_id": doc_id} for doc_id in document_ids])
+                        .on_conflict_do_nothing(index_elements=["document_id"])
+                    )
+                # ✅ Invalidates cached search results in every process at commit
+                await bump_corpus_version(session, selection=True)
+        bm25_index.set_selected(document_ids, True)  # ✅ Keep BM25 selection in sync
         return {"message": "Documents selected successfully"}
 
     async def remove_selected_documents(
@@ -64,16 +83,21 @@ class DocumentSelectionService:
         Removes document IDs from the selection list.
         - Deletes matching records from `selected_documents` table.
         - Uses a transaction that auto-commits on success.
+        - Bumps the corpus version so cached search results are not reused.
+        - Updates the selection mask of the in-memory BM25 index.
         """
+        document_ids = [
+            int(doc) for doc in request.document_ids
+        ]  # Convert document IDs to integers for deletion
+
         async with self.SessionLocal() as session:  # Open async database session
             async with session.begin():  # Start transaction (auto-commits on exit)
                 await session.execute(
                     delete(SelectedDocument).where(
-                        SelectedDocument.document_id.in_(
-                            [
-                                int(doc) for doc in request.document_ids
-                            ]  # Convert document IDs to integers for deletion
-                        )
+                        SelectedDocument.document_id.in_(document_ids)
                     )
                 )
+                # ✅ Invalidates cached search results in every process at commit
+                await bump_corpus_version(session, selection=True)
+        bm25_index.set_selected(document_ids, False)  # ✅ Keep BM25 selection in sync
         return {"message": "Documents removed from selection"}
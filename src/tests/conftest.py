@@ -1,7 +1,11 @@
 import pytest
 import asyncio
+from unittest.mock import MagicMock, patch
 from httpx import AsyncClient, ASGITransport
 from src.main import app
+from src.services.qna_service.service import QnAService
+from src.services.retrieval_service.retrieval import retrieval_result_cache
+from src.services.qna_service.answer_cache import answer_cache
 
 
 @pytest.fixture(scope="session")
@@ -17,4 +21,32 @@ async def async_client():
     """Fixture for creating an HTTP client for API testing."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
-        yield client
\ No newline at end of file
+        yield client
+
+
+@pytest.fixture
+def qna_service():
+    """
+    Q&A service with the embedding model mocked out, also used by the routes.
+    - Tokens are counted per word, so context packing works without a tokenizer.
+    """
+    generator = MagicMock()
+    generator.count_tokens.side_effect = lambda texts: [
+        len(text.split()) for text in texts
+    ]
+    with patch(
+        "src.services.retrieval_service.retrieval.get_embedding_generator",
+        return_value=generator,
+    ):
+        service = QnAService()
+    with patch("src.services.qna_service.routes._qna_service", service):
+        yield service
+
+
+@pytest.fixture(autouse=True)
+def clear_retrieval_cache():
+    """Keep cached search results from leaking between tests."""
+    if retrieval_result_cache is not None:
+        retrieval_result_cache.clear()
+    if answer_cache is not None:
+        answer_cache.clear()
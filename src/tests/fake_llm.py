@@ -0,0 +1,113 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class FakeLLMServer:
+    """
+    Local OpenAI-compatible chat completions server for tests.
+    - Serves POST /v1/chat/completions on 127.0.0.1 from a background thread;
+      point an `OpenAIChatClient` at `api_base`.
+    - Streams `tokens` as SSE chunks (with `delay` seconds between them) when
+      `stream=true`, otherwise returns them joined in one completion.
+    - The first `failures` requests get HTTP 503; request i waits
+      `latencies[i]` seconds before answering (when given).
+    - `disconnected` is set when a client goes away before the stream ended;
+      `max_in_flight` is the highest number of concurrent requests seen.
+    """
+
+    def __init__(
+        self,
+        tokens: list[str],
+        delay: float = 0.0,
+        failures: int = 0,
+        latencies: list[float] | None = None,
+    ):
+        self.tokens = tokens
+        self.delay = delay
+        self.failures = failures
+        self.latencies = latencies or []
+        self.disconnected = threading.Event()
+        self.requests: list[dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self._socket = socket.socket()
+        self._socket.bind(("127.0.0.1", 0))
+        self.api_base = f"http://127.0.0.1:{self._socket.getsockname()[1]}/v1"
+        self._server = uvicorn.Server(
+            uvicorn.Config(self._app(), log_level="warning", lifespan="off")
+        )
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True
+        )
+
+    def _app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            index = len(self.requests)
+            self.requests.append(body)
+            if index < self.failures:
+                return JSONResponse({"error": "overloaded"}, status_code=503)
+
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                if index < len(self.latencies):
+                    await asyncio.sleep(self.latencies[index])
+            finally:
+                self.in_flight -= 1
+            if not body.get("stream"):
+                return {
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": "".join(self.tokens),
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ]
+                }
+            return StreamingResponse(
+                self._stream(request), media_type="text/event-stream"
+            )
+
+        return app
+
+    async def _stream(self, request: Request):
+        finished = False
+        try:
+            for token in self.tokens:
+                if await request.is_disconnected():
+                    return
+                chunk = {"choices": [{"index": 0, "delta": {"content": token}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(self.delay)
+            yield "data: [DONE]\n\n"
+            finished = True
+        finally:
+            if not finished:
+                self.disconnected.set()
+
+    def __enter__(self) -> "FakeLLMServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake LLM server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
@@ -17,7 +17,7 @@ async def test_end_to_end_flow(async_client: AsyncClient):
 
     # Patch the EmbeddingGenerator in the DocumentIngestionService
     with patch(
-        "src.services.ingestion_service.service.EmbeddingGenerator",
+        "src.services.ingestion_service.service.get_embedding_generator",
         return_value=mock_embedding_generator,
     ):
         # Step 1: Ingest document
@@ -65,7 +65,7 @@ async def test_end_to_end_flow(async_client: AsyncClient):
 
 #     # Patch the EmbeddingGenerator in the DocumentIngestionService
 #     with patch(
-#         "src.services.ingestion_service.service.EmbeddingGenerator",
+#         "src.services.ingestion_service.service.get_embedding_generator",
 #         return_value=mock_embedding_generator,
 #     ):
 #         # Step 1: Ingest multiple documents
@@ -113,7 +113,7 @@ async def test_end_to_end_flow_with_arxiv_papers(async_client: AsyncClient):
 
     # Patch the EmbeddingGenerator in the DocumentIngestionService
     with patch(
-        "src.services.ingestion_service.service.EmbeddingGenerator",
+        "src.services.ingestion_service.service.get_embedding_generator",
         return_value=mock_embedding_generator,
     ):
         # Step 1: Ingest papers from ArXiv
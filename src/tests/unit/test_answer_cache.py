@@ -0,0 +1,101 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from src.backend.core.cache import SemanticCache
+from src.services.qna_service.answer_cache import normalize_question
+from src.services.qna_service.schemas import QueryRequest, RetrievedContext
+from src.services.qna_service.service import QnAService
+from src.services.retrieval_service.schemas import ChunkHit
+
+
+def retrieved(text: str = "AI text", embedding=(1.0, 0.0, 0.0)) -> RetrievedContext:
+    return RetrievedContext(
+        hits=[
+            ChunkHit(
+                document_id=4,
+                chunk_index=0,
+                start_char=0,
+                end_char=len(text),
+                distance=0.2,
+                text=text,
+            )
+        ],
+        timings_ms={"embedding": 1.0, "search": 2.0},
+        query_embedding=list(embedding),
+    )
+
+
+@pytest.fixture
+def service():
+    service = QnAService()
+    with patch.object(
+        service.llm, "complete", new_callable=AsyncMock, return_value="An answer"
+    ):
+        yield service
+
+
+def test_normalize_question():
+    assert normalize_question("  What is   AI? ") == normalize_question("what is ai")
+
+
+def test_semantic_cache_threshold_and_partitions():
+    cache = SemanticCache(max_entries=10, ttl_seconds=10, threshold=0.9)
+    cache.put("docs-a", [1.0, 0.0], "answer")
+
+    assert cache.get("docs-a", [0.99, 0.05])[0] == "answer"
+    assert cache.get("docs-a", [0.0, 1.0]) is None  # Not similar enough
+    assert cache.get("docs-b", [1.0, 0.0]) is None  # Other retrieved set
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_semantic_cache_expires_and_evicts():
+    cache = SemanticCache(max_entries=1, ttl_seconds=10, threshold=0.9)
+    with patch("src.backend.core.cache.time.monotonic", return_value=100.0):
+        cache.put("a", [1.0, 0.0], "first")
+        cache.put("b", [1.0, 0.0], "second")  # Evicts "first"
+        assert cache.get("a", [1.0, 0.0]) is None
+    with patch("src.backend.core.cache.time.monotonic", return_value=111.0):
+        assert cache.get("b", [1.0, 0.0]) is None  # Expired
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["expirations"]) == (0, 1, 1)
+
+
+async def test_repeated_question_skips_llm(service):
+    """Test that the exact tier serves a repeated (normalized) question."""
+    first = await service.get_answer(QueryRequest(question="What is AI?"), retrieved())
+    second = await service.get_answer(
+        QueryRequest(question="what is  AI"), retrieved(embedding=(0.0, 1.0, 0.0))
+    )
+
+    assert first.cache is None and second.cache == "exact"
+    assert second.answer == "An answer"
+    assert "generation" not in second.timings_ms
+    service.llm.complete.assert_awaited_once()
+
+
+async def test_paraphrase_served_by_semantic_tier(service):
+    """Test that a similar question over the same context reuses the answer."""
+    await service.get_answer(QueryRequest(question="What is AI?"), retrieved())
+    paraphrase = await service.get_answer(
+        QueryRequest(question="Explain artificial intelligence"),
+        retrieved(embedding=(0.99, 0.1, 0.0)),
+    )
+    unrelated = await service.get_answer(
+        QueryRequest(question="Who wrote BERT?"),
+        retrieved(embedding=(0.0, 1.0, 0.0)),
+    )
+
+    assert paraphrase.cache == "semantic"
+    assert unrelated.cache is None
+    assert service.llm.complete.await_count == 2
+
+
+async def test_changed_context_misses(service):
+    """Test that new document content is never answered from the cache."""
+    await service.get_answer(QueryRequest(question="What is AI?"), retrieved())
+    response = await service.get_answer(
+        QueryRequest(question="What is AI?"), retrieved(text="AI text, revised")
+    )
+
+    assert response.cache is None
+    assert service.llm.complete.await_count == 2
@@ -1,114 +1,232 @@
-# Need to refactor this code entirely; commenting for now
-
-# import pytest
-# from unittest.mock import patch, MagicMock
-# from src.services.retrieval_service.bm25_retrieval import BM25RetrievalService
-
-
-# @pytest.fixture
-# def bm25_service():
-#     """Fixture to initialize BM25RetrievalService with mocked data."""
-#     with patch(
-#         "src.services.retrieval_service.bm25_retrieval.AsyncSessionLocal"
-#     ) as mock_db:
-#         # Mock the database session and query results
-#         mock_session = MagicMock()
-#         mock_db.return_value = mock_session
-
-#         # Mock selected document IDs
-#         mock_selected_ids = [1, 2, 3]
-#         mock_session.query.return_value.all.return_value = [
-#             (id,) for id in mock_selected_ids
-#         ]
-
-#         # Mock documents
-#         mock_docs = [
-#             MagicMock(id=1, content=b"Python is a programming language."),
-#             MagicMock(id=2, content=b"Machine learning is a subset of AI."),
-#             MagicMock(id=3, content=b"Deep learning uses neural networks."),
-#         ]
-#         mock_session.query.return_value.filter.return_value.all.return_value = mock_docs
-
-#         service = BM25RetrievalService()
-#         service.load_documents()
-#         return service
-
-
-# def test_load_documents(bm25_service):
-#     """Test loading and tokenizing documents from the database."""
-#     assert len(bm25_service.documents) == 3
-#     assert len(bm25_service.doc_ids) == 3
-#     assert bm25_service.bm25 is not None
-
-
-# def test_retrieve_relevant_docs(bm25_service):
-#     """Test retrieving relevant documents using BM25."""
-#     query = "What is Python?"
-#     top_k = 2
-#     result = bm25_service.retrieve_relevant_docs(query, top_k)
-#     assert len(result) == top_k
-#     assert result == [1, 2]  # Assuming the first two documents are most relevant
-
-
-# def test_retrieve_relevant_docs_no_documents():
-#     """Test retrieving relevant documents when no documents are loaded."""
-#     with patch(
-#         "src.services.retrieval_service.bm25_retrieval.AsyncSessionLocal"
-#     ) as mock_db:
-#         mock_session = MagicMock()
-#         mock_db.return_value = mock_session
-
-#         # Mock no selected document IDs
-#         mock_session.query.return_value.all.return_value = []
-
-#         service = BM25RetrievalService()
-#         service.load_documents()
-
-#         query = "What is Python?"
-#         top_k = 2
-#         result = service.retrieve_relevant_docs(query, top_k)
-#         assert len(result) == 0
-#         assert result == []
-
-
-# def test_retrieve_relevant_docs_empty_query(bm25_service):
-#     """Test retrieving relevant documents with an empty query."""
-#     query = ""
-#     top_k = 2
-#     result = bm25_service.retrieve_relevant_docs(query, top_k)
-#     assert len(result) == 0
-#     assert result == []
-
-
-# def test_retrieve_relevant_docs_no_bm25_model():
-#     """Test retrieving relevant documents when BM25 model is not initialized."""
-#     with patch(
-#         "src.services.retrieval_service.bm25_retrieval.AsyncSessionLocal"
-#     ) as mock_db:
-#         mock_session = MagicMock()
-#         mock_db.return_value = mock_session
-
-#         # Mock selected document IDs
-#         mock_selected_ids = [1, 2, 3]
-#         mock_session.query.return_value.all.return_value = [
-#             (id,) for id in mock_selected_ids
-#         ]
-
-#         # Mock documents
-#         mock_docs = [
-#             MagicMock(id=1, content=b"Python is a programming language."),
-#             MagicMock(id=2, content=b"Machine learning is a subset of AI."),
-#             MagicMock(id=3, content=b"Deep learning uses neural networks."),
-#         ]
-#         mock_session.query.return_value.filter.return_value.all.return_value = mock_docs
-
-#         service = BM25RetrievalService()
-#         service.documents = []  # Clear documents to simulate no BM25 model
-#         service.doc_ids = []
-#         service.bm25 = None
-
-#         query = "What is Python?"
-#         top_k = 2
-#         result = service.retrieve_relevant_docs(query, top_k)
-#         assert len(result) == 0
-#         assert result == []
+import math
+import pytest
+from unittest.mock import patch
+from sqlalchemy import event
+from sqlalchemy.sql import text
+from src.backend.database.config import AsyncSessionLocal, engine
+from src.backend.database.corpus_version import (
+    bump_corpus_version,
+    current_corpus_version,
+)
+from src.services.retrieval_service.bm25_retrieval import (
+    BM25Index,
+    BM25RetrievalService,
+    tokenize,
+)
+
+DOCUMENTS = [
+    (1, "Python is a programming language."),
+    (2, "Machine learning is a subset of AI."),
+    (3, "Deep learning uses neural networks for machine learning."),
+]
+
+
+@pytest.fixture
+def bm25_index():
+    """Index over three documents, all of them selected."""
+    index = BM25Index()
+    index.set_selected([1, 2, 3], True)
+    index.add_documents(DOCUMENTS)
+    return index
+
+
+def test_tokenize():
+    """Test lowercasing and punctuation stripping."""
+    assert tokenize("What is Python?") == ["what", "is", "python"]
+
+
+def test_add_documents(bm25_index):
+    """Test postings and statistics after indexing."""
+    stats = bm25_index.stats()
+    assert len(bm25_index) == 3
+    assert stats["selected_documents"] == 3
+    assert stats["terms"] == len({t for _, doc in DOCUMENTS for t in tokenize(doc)})
+
+    # Re-adding an indexed document is a no-op
+    bm25_index.add_documents([(1, "Python is a programming language.")])
+    assert len(bm25_index) == 3
+
+
+def test_search_ranks_by_bm25(bm25_index):
+    """Test ranking, scores and top_k."""
+    results = bm25_index.search("machine learning", top_k=2)
+    assert [doc_id for doc_id, _ in results] == [3, 2]
+    assert results[0][1] > results[1][1] > 0
+
+    assert bm25_index.search("What is Python?", top_k=1)[0][0] == 1
+
+
+def test_search_matches_reference_formula(bm25_index):
+    """Test the score of a single-term query against the BM25 formula."""
+    k1, b = bm25_index.k1, bm25_index.b
+    lengths = [len(tokenize(doc)) for _, doc in DOCUMENTS]
+    average_length = sum(lengths) / len(lengths)
+    idf = math.log1p((3 - 1 + 0.5) / (1 + 0.5))  # "python" is in one document
+    expected = idf * (k1 + 1) / (1 + k1 * (1 - b + b * lengths[0] / average_length))
+
+    [(doc_id, score)] = bm25_index.search("python", top_k=5)
+    assert doc_id == 1
+    assert score == pytest.approx(expected, rel=1e-5)
+
+
+def test_search_only_returns_selected_documents(bm25_index):
+    """Test that selection changes apply without re-indexing."""
+    bm25_index.set_selected([3], False)
+    assert [doc_id for doc_id, _ in bm25_index.search("learning")] == [2]
+
+    bm25_index.set_selected([3], True)
+    assert {doc_id for doc_id, _ in bm25_index.search("learning")} == {2, 3}
+
+
+def test_incremental_add_updates_idf(bm25_index):
+    """Test that a newly ingested document is searchable and changes IDF."""
+    [(_, before)] = bm25_index.search("python")
+
+    bm25_index.add_documents([(4, "Python tutorial for Python beginners.")])
+    assert [doc_id for doc_id, _ in bm25_index.search("python")] == [1]
+
+    bm25_index.set_selected([4], True)
+    results = dict(bm25_index.search("python"))
+    assert set(results) == {1, 4}
+    assert results[1] < before  # "python" is less rare now
+
+
+def test_search_no_documents():
+    """Test searching an empty index."""
+    assert BM25Index().search("What is Python?", top_k=2) == []
+
+
+def test_search_empty_or_unknown_query(bm25_index):
+    """Test queries without any indexed term."""
+    assert bm25_index.search("", top_k=2) == []
+    assert bm25_index.search("quantum chromodynamics", top_k=2) == []
+
+
+async def test_service_loads_index_before_search(bm25_index):
+    """Test that the service loads the index before searching it."""
+    bm25_index.loaded = False
+
+    async def load(self, version=None):
+        self.loaded = True
+
+    with patch.object(
+        BM25Index, "ensure_loaded", autospec=True, side_effect=load
+    ) as ensure_loaded:
+        service = BM25RetrievalService()
+        service.index = bm25_index
+        assert await service.retrieve_relevant_docs("What is Python?", 1) == [1]
+        ensure_loaded.assert_called_once_with(bm25_index, version=None)
+        assert bm25_index.loaded
+
+        assert await service.retrieve_relevant_docs("   ", 1) == []
+        assert ensure_loaded.call_count == 1  # Blank queries skip the index
+
+
+async def synced_index() -> BM25Index:
+    """
+    Index standing in for one that has loaded the current corpus (existing
+    documents are indexed empty, so the test does not tokenize the whole DB).
+    """
+    index = BM25Index()
+    async with AsyncSessionLocal() as db:
+        document_ids = (await db.execute(text("SELECT id FROM documents"))).scalars()
+        document_ids = list(document_ids)
+        index.add_documents([(document_id, "") for document_id in document_ids])
+        index._last_id = max(document_ids, default=0)
+        index._version = await current_corpus_version(db)
+    index.loaded = True
+    return index
+
+
+async def test_indexes_in_two_processes_converge():
+    """Test that a change committed elsewhere reaches every index via the DB version."""
+    first, second = await synced_index(), await synced_index()
+
+    async with AsyncSessionLocal() as db, db.begin():  # e.g. ingested by a third worker
+        document_id = (
+            await db.execute(
+                text("""
+                    INSERT INTO documents (filename, content, source)
+                    VALUES ('sync.txt', convert_to('Zyxwvut converges everywhere', 'UTF8'), 'upload')
+                    RETURNING id;
+                """)
+            )
+        ).scalar_one()
+        await db.execute(
+            text("INSERT INTO selected_documents (document_id) VALUES (:id)"),
+            {"id": document_id},
+        )
+        await bump_corpus_version(db, documents=True, selection=True)
+
+    try:
+        for index in (first, second):
+            await index.ensure_loaded()
+            assert [doc_id for doc_id, _ in index.search("zyxwvut")] == [document_id]
+
+        async with AsyncSessionLocal() as db, db.begin():  # Deselected elsewhere
+            await db.execute(
+                text("DELETE FROM selected_documents WHERE document_id = :id"),
+                {"id": document_id},
+            )
+            await bump_corpus_version(db, selection=True)
+
+        for index in (first, second):
+            await index.ensure_loaded()
+            assert index.search("zyxwvut") == []
+    finally:
+        async with AsyncSessionLocal() as db, db.begin():
+            await db.execute(
+                text("DELETE FROM selected_documents WHERE document_id = :id"),
+                {"id": document_id},
+            )
+            await db.execute(
+                text("DELETE FROM documents WHERE id = :id"), {"id": document_id}
+            )
+            await bump_corpus_version(db, documents=True, selection=True)
+
+
+async def test_unchanged_version_skips_database():
+    index = await synced_index()
+    with patch(
+        "src.services.retrieval_service.bm25_retrieval.AsyncSessionLocal"
+    ) as session:
+        await index.ensure_loaded()
+    session.assert_not_called()
+
+
+async def test_new_documents_are_fetched_above_high_water_mark():
+    """Test that a documents bump fetches only ids above the last one indexed."""
+    index = await synced_index()
+    last_id = index._last_id
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    async with AsyncSessionLocal() as db, db.begin():
+        await bump_corpus_version(db, documents=True)
+        document_id = (
+            await db.execute(
+                text("""
+                    INSERT INTO documents (filename, content, source)
+                    VALUES ('mark.txt', convert_to('Qwertzuiop marks', 'UTF8'), 'upload')
+                    RETURNING id;
+                """)
+            )
+        ).scalar_one()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        await index.ensure_loaded()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+        async with AsyncSessionLocal() as db, db.begin():
+            await db.execute(
+                text("DELETE FROM documents WHERE id = :id"), {"id": document_id}
+            )
+            await bump_corpus_version(db, documents=True)
+
+    assert document_id in index._slot_of and index._last_id == document_id
+    fetches = [params for sql, params in statements if "FROM documents" in sql]
+    assert fetches and all(last_id in params for params in fetches)
+    assert not any("ORDER BY id;" in sql for sql, _ in statements)  # No full id scan
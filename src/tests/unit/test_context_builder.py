@@ -0,0 +1,111 @@
+from src.services.qna_service.context_builder import ContextBuilder
+from src.services.retrieval_service.schemas import ChunkHit
+
+
+def count_words(texts: list[str]) -> list[int]:
+    """Deterministic stand-in tokenizer: one token per word."""
+    return [len(text.split()) for text in texts]
+
+
+def chunk(document_id: int, chunk_index: int, text: str, start: int = 0) -> ChunkHit:
+    return ChunkHit(
+        document_id=document_id,
+        chunk_index=chunk_index,
+        start_char=start,
+        end_char=start + len(text),
+        distance=0.1,
+        text=text,
+    )
+
+
+def test_packs_in_rank_order_within_budget():
+    """Test that chunks are packed best first and the rest is reported as dropped."""
+    hits = [chunk(1, 0, "one two three"), chunk(2, 0, "four five"), chunk(3, 0, "six")]
+    packed = ContextBuilder(count_words, max_tokens=5, min_passage_tokens=2).build(
+        "question", hits
+    )
+
+    assert packed.text == "one two three\n\nfour five"
+    assert [hit.document_id for hit in packed.hits] == [1, 2]
+    assert packed.stats.packed_tokens == 5
+    assert packed.stats.dropped_tokens == 1
+    assert packed.stats.dropped_chunks == 1
+
+
+def test_overlapping_chunks_are_deduplicated():
+    """Test that text shared with a better-ranked chunk is sent only once."""
+    document = "Alpha beta gamma. Delta epsilon zeta. Eta theta iota."
+    first = chunk(1, 0, document[:37])  # "Alpha beta gamma. Delta epsilon zeta."
+    second = chunk(1, 1, document[18:], start=18)  # Overlaps "Delta epsilon zeta."
+    packed = ContextBuilder(count_words, max_tokens=100).build("q", [first, second])
+
+    assert packed.text == "Alpha beta gamma. Delta epsilon zeta.\n\nEta theta iota."
+    assert packed.stats.deduplicated_tokens == 3
+    assert packed.stats.packed_tokens == 9
+
+    contained = chunk(1, 2, document[18:37], start=18)
+    packed = ContextBuilder(count_words).build("q", [first, contained])
+    assert [hit.chunk_index for hit in packed.hits] == [0]
+
+
+def test_trims_to_query_relevant_sentences():
+    """Test that a chunk over the remaining budget keeps its best sentences."""
+    text = (
+        "Cats sleep a lot. Transformers use attention layers. "
+        "Dogs bark loudly. Attention weights tokens."
+    )
+    packed = ContextBuilder(count_words, max_tokens=8, min_passage_tokens=2).build(
+        "How does attention work in transformers?", [chunk(1, 0, text)]
+    )
+
+    assert (
+        packed.text
+        == "Transformers use attention layers. ... Attention weights tokens."
+    )
+    assert packed.stats.trimmed_chunks == 1
+    assert packed.stats.packed_tokens == 8  # The ellipsis is sent too
+    assert packed.stats.dropped_tokens == 7
+
+
+def test_separators_count_against_budget():
+    """Test that the text between chunks is counted, so the budget holds."""
+
+    def count_with_breaks(texts: list[str]) -> list[int]:
+        return [len(text.split()) + text.count("\n\n") for text in texts]
+
+    hits = [chunk(1, 0, "a b"), chunk(2, 0, "c d"), chunk(3, 0, "e")]
+    packed = ContextBuilder(
+        count_with_breaks, max_tokens=5, min_passage_tokens=1
+    ).build("q", hits)
+
+    assert packed.text == "a b\n\nc d"
+    assert packed.stats.packed_tokens == count_with_breaks([packed.text])[0] == 5
+    assert packed.stats.dropped_chunks == 1
+
+
+def test_trimmed_chunk_covers_only_kept_sentences():
+    """Test that text cut from a trimmed chunk is not deduplicated as if sent."""
+    text = (
+        "Cats sleep a lot. Transformers use attention layers. "
+        "Dogs bark loudly. Attention weights tokens."
+    )
+    cut = text.index("Dogs")
+    kept = text.index("Attention weights")
+    hits = [
+        chunk(1, 0, text),
+        chunk(1, 1, text[cut:kept].strip(), start=cut),  # Trimmed away above
+        chunk(1, 2, text[kept:], start=kept),  # Sent above
+    ]
+    packed = ContextBuilder(count_words, max_tokens=8, min_passage_tokens=2).build(
+        "How does attention work in transformers?", hits
+    )
+
+    assert [hit.chunk_index for hit in packed.hits] == [0]
+    assert packed.stats.deduplicated_tokens == 3  # Only "Attention weights tokens."
+    assert packed.stats.dropped_chunks == 1
+
+
+def test_empty_hits():
+    packed = ContextBuilder(count_words).build("q", [])
+    assert packed.text == "" and packed.hits == []
+    assert packed.stats.packed_tokens == 0
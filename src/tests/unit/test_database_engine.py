@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.sql import text
+from src.backend.database.config import engine
+from src.backend.database.engine import create_engine, pool_stats
+
+
+@pytest.fixture
+async def small_engine():
+    """Engine with a single pooled connection and a short checkout timeout."""
+    small = create_engine(
+        pool_size=1, max_overflow=0, pool_timeout=0.5, statement_timeout_ms=200
+    )
+    yield small
+    await small.dispose()
+
+
+def test_app_uses_one_engine():
+    from src.main import engine as app_engine
+
+    assert app_engine is engine
+    assert not engine.echo
+
+
+async def test_statement_timeout_is_set_per_connection(small_engine):
+    async with small_engine.connect() as connection:
+        timeout = (await connection.execute(text("SHOW statement_timeout"))).scalar()
+        assert timeout == "200ms"
+        with pytest.raises(DBAPIError):
+            await connection.execute(text("SELECT pg_sleep(1)"))
+
+
+async def test_pool_records_waiters_and_wait_time(small_engine):
+    """Test that a checkout blocked on a full pool is counted while it waits."""
+    held = await small_engine.connect()
+    waiting = asyncio.create_task(small_engine.connect().start())
+    await asyncio.sleep(0.1)
+
+    stats = pool_stats(small_engine)
+    assert (stats["checked_out"], stats["waiting"]) == (1, 1)
+
+    await held.close()
+    await (await waiting).close()
+    stats = pool_stats(small_engine)
+    assert (stats["checked_out"], stats["waiting"], stats["checkouts"]) == (0, 0, 2)
+    assert stats["wait_ms"]["max"] >= 90
+
+
+async def test_pool_timeout_is_counted(small_engine):
+    async with small_engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            await small_engine.connect()
+    assert pool_stats(small_engine)["timeouts"] == 1
+
+
+async def test_pool_stats_endpoint(async_client):
+    response = await async_client.get("/monitoring/database")
+    assert response.status_code == 200
+    assert {"pool_size", "checked_out", "waiting", "wait_ms"} <= set(response.json())
@@ -1,19 +1,30 @@
+import numpy as np
 import pytest
 from src.services.ingestion_service.service import DocumentIngestionService
 from src.services.ingestion_service.schemas import DocumentUploadRequest
+from src.services.ingestion_service.bulk_ingest import (
+    BulkIngestionPipeline,
+    _copy_text,
+    bulk_ingestion_stats,
+)
 from unittest.mock import patch, AsyncMock
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+async def fake_embeddings(texts):
+    """Stands in for the model: one constant vector per chunk."""
+    return np.full((len(texts), 384), 0.1, dtype=np.float32)
+
+
 @pytest.mark.asyncio
 async def test_process_document_valid_string():
     service = DocumentIngestionService()
 
     # Patch the embedding generator to return a valid vector.
     with patch.object(
-        service.embedding_generator, "generate_embedding", new_callable=AsyncMock
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
     ) as mock_embedding:
-        mock_embedding.return_value = [0.1] * 384
+        mock_embedding.side_effect = fake_embeddings
 
         response = await service.process_document(
             "test.txt", "This is a test document."
@@ -27,9 +38,9 @@ async def test_process_document_valid_bytes():
 
     # Patch the embedding generator to return a valid vector.
     with patch.object(
-        service.embedding_generator, "generate_embedding", new_callable=AsyncMock
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
     ) as mock_embedding:
-        mock_embedding.return_value = [0.1] * 384
+        mock_embedding.side_effect = fake_embeddings
 
         response = await service.process_document(
             "test.txt", b"This is a test document."
@@ -50,12 +61,12 @@ async def test_process_document_invalid_embedding():
 
     # Patch the embedding generator to return an invalid vector.
     with patch.object(
-        service.embedding_generator, "generate_embedding", new_callable=AsyncMock
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
     ) as mock_embedding:
         mock_embedding.return_value = "invalid_vector"
 
         with pytest.raises(
-            TypeError, match="Embedding vector must be a list of floats/ints."
+            TypeError, match="Embeddings must be a float matrix with one row per chunk."
         ):
             await service.process_document("test.txt", "This is a test document.")
 
@@ -70,14 +81,33 @@ async def test_process_documents_batch():
         for i in range(3)
     ]
 
-    # Patch the embedding generator for each document in the batch.
+    # Patch the batch embedding path used for the whole batch.
     with patch.object(
-        service.embedding_generator, "generate_embedding", new_callable=AsyncMock
-    ) as mock_embedding:
-        mock_embedding.return_value = [0.1] * 384
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
+    ) as mock_embeddings:
+        mock_embeddings.return_value = np.full((3, 384), 0.1, dtype=np.float32)
         responses = await service.process_documents_batch(documents)
+        assert len(responses) == 3
         for response in responses:
             assert response == {"message": "Document processed successfully"}
+        mock_embeddings.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_process_documents_batch_rejects_empty_document():
+    """An empty document should fail the batch before any embedding work."""
+    service = DocumentIngestionService()
+    documents = [
+        DocumentUploadRequest(filename="ok.txt", content="Valid content."),
+        DocumentUploadRequest(filename="empty.txt", content="   "),
+    ]
+
+    with patch.object(
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
+    ) as mock_embeddings:
+        with pytest.raises(ValueError, match="Document content cannot be empty"):
+            await service.process_documents_batch(documents)
+        mock_embeddings.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -103,9 +133,9 @@ async def test_process_large_document():
     large_content = "A" * 10_000_000  # 10MB content
 
     with patch.object(
-        service.embedding_generator, "generate_embedding", new_callable=AsyncMock
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
     ) as mock_embedding:
-        mock_embedding.return_value = [0.1] * 384  # Simulating valid embedding
+        mock_embedding.side_effect = fake_embeddings  # Simulating valid embedding
         response = await service.process_document("large.txt", large_content)
         assert response == {"message": "Document processed successfully"}
 
@@ -117,17 +147,17 @@ async def test_process_document_duplicate_filename():
 
     # First upload should succeed
     with patch.object(
-        service.embedding_generator, "generate_embedding", new_callable=AsyncMock
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
     ) as mock_embedding:
-        mock_embedding.return_value = [0.1] * 384
+        mock_embedding.side_effect = fake_embeddings
         response1 = await service.process_document("duplicate.txt", "First version")
         assert response1 == {"message": "Document processed successfully"}
 
     # Second upload: Should it replace, update, or be rejected?
     with patch.object(
-        service.embedding_generator, "generate_embedding", new_callable=AsyncMock
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
     ) as mock_embedding:
-        mock_embedding.return_value = [0.1] * 384
+        mock_embedding.side_effect = fake_embeddings
         response2 = await service.process_document("duplicate.txt", "Second version")
         assert response2 == {
             "message": "Document processed successfully"
@@ -140,10 +170,73 @@ async def test_process_document_db_failure():
     service = DocumentIngestionService()
 
     with patch.object(
-        service.embedding_generator, "generate_embedding", new_callable=AsyncMock
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
     ) as mock_embedding:
-        mock_embedding.return_value = [0.1] * 384
+        mock_embedding.side_effect = fake_embeddings
 
         with patch.object(AsyncSession, "commit", side_effect=Exception("DB Failure")):
             with pytest.raises(Exception, match="DB Failure"):
                 await service.process_document("db_fail.txt", "This should fail")
+
+
+def test_chunker_splits_long_text_with_overlap():
+    """Chunks are token-bounded, overlap, and map back to the original text."""
+    service = DocumentIngestionService()
+    chunker = service.embedding_generator.chunker
+    text = " ".join(f"word{i}" for i in range(2000))
+
+    chunks = list(chunker.chunk(text))
+
+    assert len(chunks) > 1
+    assert all(chunk.token_count <= chunker.window for chunk in chunks)
+    assert [chunk.chunk_index for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert chunk.text == text[chunk.start_char : chunk.end_char]
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.start_char < previous.end_char  # Overlapping windows
+    assert chunks[0].start_char == 0 and chunks[-1].end_char == len(text)
+
+
+@pytest.mark.asyncio
+async def test_process_document_embeds_every_chunk():
+    """A long document is embedded chunk by chunk instead of being truncated."""
+    service = DocumentIngestionService()
+    content = " ".join(f"sentence {i} about retrieval." for i in range(500))
+    expected_chunks = len(list(service.embedding_generator.chunker.chunk(content)))
+
+    with patch.object(
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
+    ) as mock_embedding:
+        mock_embedding.side_effect = fake_embeddings
+        response = await service.process_document("long.txt", content)
+
+    assert response == {"message": "Document processed successfully"}
+    assert expected_chunks > 1
+    assert len(mock_embedding.call_args.args[0]) == expected_chunks
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingestion_pipeline_overlaps_batches():
+    """Every batch is embedded once and written with COPY; stats are recorded."""
+    service = DocumentIngestionService()
+    filenames = [f"bulk_{i}.txt" for i in range(5)]
+    contents = [
+        f"Bulk document {i}\twith a tab\nand a newline \\ ok." for i in range(5)
+    ]
+
+    with patch.object(
+        service.embedding_generator, "generate_embeddings", new_callable=AsyncMock
+    ) as mock_embedding:
+        mock_embedding.side_effect = fake_embeddings
+        result = await BulkIngestionPipeline(service, batch_size=2).ingest(
+            filenames, contents
+        )
+
+    assert mock_embedding.await_count == 3  # Batches of 2, 2 and 1
+    assert (result.documents, result.batches) == (5, 3)
+    assert result.chunks >= 5 and result.documents_per_second > 0
+    assert bulk_ingestion_stats.snapshot()["last_run"]["documents"] == 5
+
+
+def test_copy_text_escapes_control_characters():
+    assert _copy_text("a\tb\nc\\d\re") == "a\\tb\\nc\\\\d\\re"
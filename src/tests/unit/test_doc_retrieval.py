@@ -1,7 +1,19 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from src.services.retrieval_service.retrieval import RetrievalService
+from src.backend.database.config import AsyncSessionLocal
+from src.services.retrieval_service.retrieval import (
+    RetrievalService,
+    build_chunk_search_query,
+    build_search_query,
+    run_filtered_search,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import text
+
+
+def search_row(nearest_rows=1, eligible_rows=1, **columns):
+    """A search result row with the statement's coverage counts."""
+    return MagicMock(nearest_rows=nearest_rows, eligible_rows=eligible_rows, **columns)
 
 
 @pytest.mark.asyncio
@@ -15,21 +27,14 @@ async def test_retrieve_relevant_docs():
     # Mock the database session and transaction
     mock_db = AsyncMock(spec=AsyncSession)
 
-    # Mock the execute chain for both database calls
-    # First call: SELECT document_id FROM selected_documents
-    mock_selected_execute = MagicMock()
-    mock_selected_scalars = MagicMock()
-    mock_selected_scalars.all.return_value = [1, 2, 3]  # Selected IDs
-    mock_selected_execute.scalars.return_value = mock_selected_scalars
-
-    # Second call: Vector similarity search
+    # Single filtered search statement returning (document_id, distance) rows
     mock_search_execute = MagicMock()
-    mock_search_scalars = MagicMock()
-    mock_search_scalars.__iter__.return_value = iter([1, 2, 3])  # Document IDs
-    mock_search_execute.scalars.return_value = mock_search_scalars
-
-    # Configure execute to return different mocks for each call
-    mock_db.execute.side_effect = [mock_selected_execute, mock_search_execute]
+    mock_search_execute.all.return_value = [
+        search_row(document_id=1, distance=0.1),
+        search_row(document_id=2, distance=0.2),
+        search_row(document_id=3, distance=0.3),
+    ]
+    mock_db.execute.return_value = mock_search_execute
 
     # Mock async context managers
     mock_db.__aenter__.return_value = mock_db
@@ -45,7 +50,7 @@ async def test_retrieve_relevant_docs():
             return_value=mock_db,
         ),
         patch(
-            "src.services.retrieval_service.retrieval.EmbeddingGenerator",
+            "src.services.retrieval_service.retrieval.get_embedding_generator",
             return_value=mock_embedding_generator,
         ),
     ):
@@ -106,19 +111,10 @@ async def test_retrieve_relevant_docs_no_selected_docs():
 
     mock_db = AsyncMock(spec=AsyncSession)
 
-    # First call: Empty selected documents
-    mock_selected_execute = MagicMock()
-    mock_selected_scalars = MagicMock()
-    mock_selected_scalars.all.return_value = []  # No selected document IDs
-    mock_selected_execute.scalars.return_value = mock_selected_scalars
-
-    # Second call: No search results
+    # No selected documents: the semi-join yields no rows
     mock_search_execute = MagicMock()
-    mock_search_scalars = MagicMock()
-    mock_search_scalars.__iter__.return_value = iter([])  # No retrieved document IDs
-    mock_search_execute.scalars.return_value = mock_search_scalars
-
-    mock_db.execute.side_effect = [mock_selected_execute, mock_search_execute]
+    mock_search_execute.all.return_value = []
+    mock_db.execute.return_value = mock_search_execute
 
     mock_db.__aenter__.return_value = mock_db
     mock_db.__aexit__.return_value = None
@@ -132,7 +128,7 @@ async def test_retrieve_relevant_docs_no_selected_docs():
             return_value=mock_db,
         ),
         patch(
-            "src.services.retrieval_service.retrieval.EmbeddingGenerator",
+            "src.services.retrieval_service.retrieval.get_embedding_generator",
             return_value=mock_embedding_generator,
         ),
     ):
@@ -184,7 +180,7 @@ async def test_retrieve_relevant_docs_invalid_embedding():
             return_value=mock_db,
         ),
         patch(
-            "src.services.retrieval_service.retrieval.EmbeddingGenerator",
+            "src.services.retrieval_service.retrieval.get_embedding_generator",
             return_value=mock_embedding_generator,
         ),
     ):
@@ -237,3 +233,279 @@ async def test_get_document_texts_no_matching_docs():
 
     # Expecting an empty list since there are no matching documents
     assert document_texts == []
+
+
+@pytest.mark.asyncio
+async def test_retrieve_relevant_docs_inner_product_metric():
+    """The configured metric should select the matching pgvector operator."""
+    mock_embedding_generator = MagicMock()
+    mock_embedding_generator.generate_embedding = AsyncMock(
+        return_value=[0.1, 0.2, 0.3]
+    )
+
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_search_execute = MagicMock()
+    mock_search_execute.all.return_value = [
+        search_row(document_id=2, distance=-0.9),
+        search_row(document_id=1, distance=-0.5),
+    ]
+    mock_db.execute.return_value = mock_search_execute
+
+    mock_db.__aenter__.return_value = mock_db
+    mock_db.__aexit__.return_value = None
+    mock_db.begin.return_value = MagicMock(
+        __aenter__=AsyncMock(return_value=None), __aexit__=AsyncMock(return_value=None)
+    )
+
+    with (
+        patch(
+            "src.services.retrieval_service.retrieval.AsyncSessionLocal",
+            return_value=mock_db,
+        ),
+        patch(
+            "src.services.retrieval_service.retrieval.get_embedding_generator",
+            return_value=mock_embedding_generator,
+        ),
+    ):
+        retrieval_service = RetrievalService()
+        result = await retrieval_service.retrieve_relevant_docs(
+            "test query", 2, metric="inner_product"
+        )
+
+    assert result == [2, 1]
+    search_sql = str(mock_db.execute.call_args_list[-1].args[0])
+    assert "e.vector <#> CAST(:query_embedding AS vector)" in search_sql
+
+
+@pytest.mark.asyncio
+async def test_search_runs_single_statement_with_snippets():
+    """Selection filtering must happen server-side in the same statement."""
+    mock_embedding_generator = MagicMock()
+    mock_embedding_generator.generate_embedding = AsyncMock(
+        return_value=[0.1, 0.2, 0.3]
+    )
+
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_search_execute = MagicMock()
+    mock_search_execute.all.return_value = [
+        search_row(document_id=7, distance=0.25, snippet="Python is a language.")
+    ]
+    mock_db.execute.return_value = mock_search_execute
+    mock_db.__aenter__.return_value = mock_db
+    mock_db.__aexit__.return_value = None
+    mock_db.begin.return_value = MagicMock(
+        __aenter__=AsyncMock(return_value=None), __aexit__=AsyncMock(return_value=None)
+    )
+
+    with (
+        patch(
+            "src.services.retrieval_service.retrieval.AsyncSessionLocal",
+            return_value=mock_db,
+        ),
+        patch(
+            "src.services.retrieval_service.retrieval.get_embedding_generator",
+            return_value=mock_embedding_generator,
+        ),
+    ):
+        retrieval_service = RetrievalService()
+        hits = await retrieval_service.search("python", 1, include_snippets=True)
+
+    assert [(hit.document_id, hit.distance, hit.snippet) for hit in hits] == [
+        (7, 0.25, "Python is a language.")
+    ]
+    mock_db.execute.assert_awaited_once()
+    search_sql = str(mock_db.execute.call_args.args[0])
+    assert "EXISTS" in search_sql and "selected_documents" in search_sql
+    assert "convert_from(d.content" in search_sql
+
+
+@pytest.mark.asyncio
+async def test_retrieve_relevant_docs_unknown_metric():
+    retrieval_service = RetrievalService()
+    with pytest.raises(ValueError, match="Unknown distance metric"):
+        await retrieval_service.retrieve_relevant_docs("test query", 3, metric="l1")
+
+
+@pytest.mark.asyncio
+async def test_search_falls_back_to_exact_scan_on_short_results():
+    """An ANN scan filtered down to fewer rows than are eligible is re-run exactly."""
+    mock_embedding_generator = MagicMock()
+    mock_embedding_generator.generate_embedding = AsyncMock(
+        return_value=[0.1, 0.2, 0.3]
+    )
+
+    ann_result = MagicMock()
+    # The ANN leg found 1 row, but 2 selected rows were eligible
+    ann_result.all.return_value = [
+        search_row(document_id=4, distance=0.4, nearest_rows=1, eligible_rows=2)
+    ]
+    exact_result = MagicMock()
+    exact_result.all.return_value = [
+        search_row(document_id=9, distance=0.1),
+        search_row(document_id=4, distance=0.4),
+    ]
+
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_db.execute.side_effect = [ann_result, MagicMock(), exact_result]
+    mock_db.__aenter__.return_value = mock_db
+    mock_db.__aexit__.return_value = None
+    mock_db.begin.return_value = MagicMock(
+        __aenter__=AsyncMock(return_value=None), __aexit__=AsyncMock(return_value=None)
+    )
+
+    with (
+        patch(
+            "src.services.retrieval_service.retrieval.AsyncSessionLocal",
+            return_value=mock_db,
+        ),
+        patch(
+            "src.services.retrieval_service.retrieval.get_embedding_generator",
+            return_value=mock_embedding_generator,
+        ),
+    ):
+        retrieval_service = RetrievalService()
+        result = await retrieval_service.retrieve_relevant_docs("test query", 2)
+
+    assert result == [9, 4]
+    statements = [str(call.args[0]) for call in mock_db.execute.call_args_list]
+    assert statements[1] == "SET LOCAL enable_indexscan = off"
+
+
+@pytest.mark.asyncio
+async def test_search_chunks_returns_chunk_hits():
+    """Chunk search slices only the matching chunk text out of its document."""
+    mock_embedding_generator = MagicMock()
+    mock_embedding_generator.generate_embedding = AsyncMock(
+        return_value=[0.1, 0.2, 0.3]
+    )
+
+    row = search_row()
+    row._mapping = {
+        "document_id": 3,
+        "chunk_index": 1,
+        "start_char": 900,
+        "end_char": 1800,
+        "distance": 0.12,
+        "text": "second chunk",
+    }
+    mock_search_execute = MagicMock()
+    mock_search_execute.all.return_value = [row]
+
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_db.execute.return_value = mock_search_execute
+    mock_db.__aenter__.return_value = mock_db
+    mock_db.__aexit__.return_value = None
+    mock_db.begin.return_value = MagicMock(
+        __aenter__=AsyncMock(return_value=None), __aexit__=AsyncMock(return_value=None)
+    )
+
+    with (
+        patch(
+            "src.services.retrieval_service.retrieval.AsyncSessionLocal",
+            return_value=mock_db,
+        ),
+        patch(
+            "src.services.retrieval_service.retrieval.get_embedding_generator",
+            return_value=mock_embedding_generator,
+        ),
+    ):
+        retrieval_service = RetrievalService()
+        hits = await retrieval_service.search_chunks("query", 1)
+
+    assert [(hit.document_id, hit.chunk_index, hit.text) for hit in hits] == [
+        (3, 1, "second chunk")
+    ]
+    search_sql = str(mock_db.execute.call_args.args[0])
+    assert "FROM chunks c" in search_sql and "selected_documents" in search_sql
+    assert "h.start_char + 1" in search_sql
+
+
+@pytest.mark.asyncio
+async def test_search_skips_exact_scan_when_selection_is_smaller_than_top_k():
+    """Fewer rows than top_k are not short when that is all the selection has."""
+    mock_embedding_generator = MagicMock()
+    mock_embedding_generator.generate_embedding = AsyncMock(
+        return_value=[0.1, 0.2, 0.3]
+    )
+
+    ann_result = MagicMock()
+    ann_result.all.return_value = [
+        search_row(document_id=4, distance=0.4, nearest_rows=1, eligible_rows=1)
+    ]
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_db.execute.return_value = ann_result
+    mock_db.__aenter__.return_value = mock_db
+    mock_db.__aexit__.return_value = None
+    mock_db.begin.return_value = MagicMock(
+        __aenter__=AsyncMock(return_value=None), __aexit__=AsyncMock(return_value=None)
+    )
+
+    with (
+        patch(
+            "src.services.retrieval_service.retrieval.AsyncSessionLocal",
+            return_value=mock_db,
+        ),
+        patch(
+            "src.services.retrieval_service.retrieval.get_embedding_generator",
+            return_value=mock_embedding_generator,
+        ),
+    ):
+        retrieval_service = RetrievalService()
+        result = await retrieval_service.retrieve_relevant_docs("test query", 5)
+
+    assert result == [4]
+    mock_db.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_search_statement_counts_eligible_rows():
+    """Test the coverage counts against the database, for both search statements."""
+    embedding = "[" + ",".join(["0.1"] * 384) + "]"
+    chunk_count = 3
+    async with AsyncSessionLocal() as db, db.begin():
+        savepoint = await db.begin_nested()  # Rolled back: nothing is left behind
+        try:
+            document_id = (
+                await db.execute(
+                    text("""
+                        INSERT INTO documents (filename, content, source)
+                        VALUES ('coverage.txt', convert_to('coverage', 'UTF8'), 'upload')
+                        RETURNING id;
+                    """)
+                )
+            ).scalar_one()
+            await db.execute(
+                text("""
+                    INSERT INTO chunks (document_id, chunk_index, start_char,
+                                        end_char, token_count, vector)
+                    SELECT :id, g, 0, 8, 1, CAST(:vector AS vector)
+                    FROM generate_series(0, :n - 1) g;
+                """),
+                {"id": document_id, "vector": embedding, "n": chunk_count},
+            )
+            await db.execute(text("DELETE FROM selected_documents"))
+            await db.execute(
+                text("INSERT INTO selected_documents (document_id) VALUES (:id)"),
+                {"id": document_id},
+            )
+            params = {"query_embedding": embedding, "top_k": 10}
+
+            query = build_chunk_search_query("<->")
+            rows = (await db.execute(query, params)).all()
+            assert rows[0].eligible_rows == chunk_count
+            hits = await run_filtered_search(db, query, params)
+            assert {row.document_id for row in hits} == {document_id}
+            assert len(hits) == chunk_count
+
+            params["top_k"] = 1
+            rows = (await db.execute(query, params)).all()
+            assert rows[0].eligible_rows == 1  # Capped at top_k
+
+            await db.execute(text("DELETE FROM selected_documents"))
+            query = build_search_query("<->", include_snippets=False)
+            rows = (await db.execute(query, params)).all()
+            assert len(rows) == 1 and rows[0].document_id is None
+            assert (rows[0].nearest_rows, rows[0].eligible_rows) == (0, 0)
+            assert await run_filtered_search(db, query, params) == []
+        finally:
+            await savepoint.rollback()
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.services.ingestion_service.embedding_cache import (
+    DiskEmbeddingStore,
+    EmbeddingCache,
+)
+from src.services.ingestion_service.embedding_generator import EmbeddingGenerator
+
+
+def test_memory_tier_evicts_least_recently_used():
+    """The memory tier is bounded and evicts the least recently used entry."""
+    cache = EmbeddingCache("model|test", dimension=3, max_entries=2)
+    a, b, c = (cache.key(text) for text in ("a", "b", "c"))
+
+    cache.put(a, np.ones(3))
+    cache.put(b, np.zeros(3))
+    assert cache.get(a) is not None  # `a` is now the most recently used
+    cache.put(c, np.full(3, 2.0))
+
+    assert cache.get(b) is None
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2
+    assert stats["memory_evictions"] == 1
+    assert (stats["memory_hits"], stats["misses"]) == (1, 1)
+
+
+def test_keys_ignore_whitespace_but_not_namespace():
+    cache = EmbeddingCache("model|mean|normalize=True", dimension=3)
+    other = EmbeddingCache("model|mean|normalize=False", dimension=3)
+
+    assert cache.key("hello   world\n") == cache.key(" hello world")
+    assert cache.key("hello world") != other.key("hello world")
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Vectors written to the disk tier are found by a fresh cache instance."""
+    vector = np.arange(4, dtype=np.float32)
+    first = EmbeddingCache("model|disk", dimension=4, disk_dir=str(tmp_path))
+    first.put(first.key("persisted text"), vector)
+    first.flush()
+
+    second = EmbeddingCache("model|disk", dimension=4, disk_dir=str(tmp_path))
+    cached = second.get(second.key("persisted text"))
+
+    np.testing.assert_array_equal(cached, vector)
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_reuses_slots_when_full(tmp_path):
+    cache = EmbeddingCache(
+        "model|ring", dimension=2, max_entries=1, disk_dir=str(tmp_path), disk_entries=2
+    )
+    for text in ("one", "two", "three"):
+        cache.put(cache.key(text), np.ones(2))
+
+    stats = cache.stats()
+    assert stats["disk_entries"] == 2
+    assert stats["disk_evictions"] == 1
+    assert cache.get(cache.key("one")) is None
+
+
+@pytest.mark.asyncio
+async def test_generator_embeds_repeated_texts_once():
+    """Repeated texts, within and across calls, skip the model forward pass."""
+    generator = EmbeddingGenerator(batching_enabled=False)
+    texts = ["cached text", "other text", "cached   text"]
+
+    with patch.object(
+        generator, "_encode_uncached", wraps=generator._encode_uncached
+    ) as encode:
+        first = await generator.generate_embeddings(texts)
+        second = await generator.generate_embeddings(texts)
+
+    assert encode.call_count == 1
+    assert encode.call_args.args[0] == ["cached text", "other text"]
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(first[0], first[2])
+    assert generator.cache_stats()["memory_hits"] >= 3
+
+
+def test_disk_tier_sees_other_processes_writes(tmp_path):
+    """A store opened earlier finds vectors another store wrote later."""
+    reader = DiskEmbeddingStore(str(tmp_path), dimension=2, capacity=4)
+    writer = DiskEmbeddingStore(str(tmp_path), dimension=2, capacity=4)
+    digest = bytes([1]) * 32
+    writer.put(digest, np.full(2, 7.0))
+
+    np.testing.assert_array_equal(reader.get(digest), np.full(2, 7.0))
+
+
+def test_disk_tier_rewritten_slot_reads_as_miss(tmp_path):
+    """A slot rewritten by another process never returns the other text's vector."""
+    reader = DiskEmbeddingStore(str(tmp_path), dimension=2, capacity=1)
+    writer = DiskEmbeddingStore(str(tmp_path), dimension=2, capacity=1)
+    old, new = bytes([1]) * 32, bytes([2]) * 32
+    writer.put(old, np.ones(2))
+    assert reader.get(old) is not None
+
+    writer.put(new, np.zeros(2))  # Reuses the only slot
+    assert reader.get(old) is None
+    np.testing.assert_array_equal(reader.get(new), np.zeros(2))
+
+
+def test_disk_tier_torn_read_is_a_miss(tmp_path):
+    """A vector copied while its slot is being rewritten is discarded."""
+    store = DiskEmbeddingStore(str(tmp_path), dimension=2, capacity=1)
+    digest = bytes([1]) * 32
+    store.put(digest, np.ones(2))
+    vectors = store._vectors
+
+    class Rewriting:
+        """Simulates another process clearing the key while the vector is read."""
+
+        def __getitem__(self, slot):
+            store._keys[slot] = 0
+            return vectors[slot]
+
+    store._vectors = Rewriting()
+    assert store.get(digest) is None
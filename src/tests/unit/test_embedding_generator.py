@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock
 from src.services.ingestion_service.embedding_generator import EmbeddingGenerator
@@ -64,3 +65,42 @@ async def test_generate_embedding_mocked(embedding_generator):
         embedding = await embedding_generator.generate_embedding(text)
         assert isinstance(embedding, list)
         assert all(isinstance(val, float) for val in embedding)
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_returns_float32_matrix(embedding_generator):
+    """Batch embeddings should come back as one contiguous float32 array."""
+    texts = ["short", "a somewhat longer test document", ""]
+    embeddings = await embedding_generator.generate_embeddings(texts)
+    assert isinstance(embeddings, np.ndarray)
+    assert embeddings.dtype == np.float32
+    assert embeddings.shape == (3, 384)
+    assert embeddings.flags["C_CONTIGUOUS"]
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_preserves_order(embedding_generator):
+    """Length bucketing must not reorder results or change the vectors."""
+    texts = [
+        "This is a much longer test document about machine learning." * 5,
+        "tiny",
+        "A medium length test document.",
+    ]
+    embeddings = embedding_generator._encode_sync(texts, bucket_size=2)
+    for text, row in zip(texts, embeddings):
+        single = await embedding_generator.generate_embedding(text)
+        assert np.allclose(row, single, atol=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_empty_list(embedding_generator):
+    """An empty batch should return an empty (0, dim) array."""
+    embeddings = await embedding_generator.generate_embeddings([])
+    assert embeddings.shape == (0, 384)
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_is_unit_length(embedding_generator):
+    """Stored vectors are L2-normalized so inner product ranks like cosine."""
+    embedding = await embedding_generator.generate_embedding("Normalize me.")
+    assert np.isclose(np.linalg.norm(embedding), 1.0, atol=1e-5)
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from multiprocessing import Pipe, shared_memory
+from unittest.mock import MagicMock, patch
+from src.services.ingestion_service.embedding_generator import EmbeddingGenerator
+from src.services.ingestion_service.embedding_workers import (
+    EmbeddingWorkerError,
+    EmbeddingWorkerPool,
+    _AttachedBuffers,
+    _serve_connection,
+    ensure_private_directory,
+)
+from src.services.ingestion_service.inference_executor import InferenceExecutor
+from src.services.ingestion_service.model_registry import get_embedding_generator
+
+AUTHKEY = "test-authkey"
+
+
+@pytest.fixture(scope="module")
+def worker_pool(tmp_path_factory):
+    """One embedding worker process serving the configured model."""
+    socket_base = str(tmp_path_factory.mktemp("workers") / "embedding.sock")
+    with EmbeddingWorkerPool(
+        workers=1, socket_base=socket_base, authkey=AUTHKEY
+    ) as pool:
+        yield pool, socket_base
+
+
+@pytest.fixture(scope="module")
+def remote_generator(worker_pool):
+    _, socket_base = worker_pool
+    generator = EmbeddingGenerator(
+        batching_enabled=False,
+        cache_enabled=False,
+        workers=1,
+        worker_socket=socket_base,
+        worker_authkey=AUTHKEY,
+    )
+    yield generator
+    generator.remote.close()
+
+
+def test_remote_generator_holds_no_model(remote_generator):
+    assert remote_generator.model is None
+    assert remote_generator.memory_bytes() == 0
+    assert remote_generator.backend.name == "remote:torch"
+    assert remote_generator.dimension == get_embedding_generator().dimension
+
+
+async def test_remote_embeddings_match_local(remote_generator):
+    """Test that vectors from the worker pool equal in-process vectors."""
+    texts = ["Transformers use attention.", "BM25 ranks documents by terms."]
+    remote = await remote_generator.generate_embeddings(texts)
+    local = await get_embedding_generator().generate_embeddings(texts)
+
+    assert remote.dtype == np.float32 and remote.shape == local.shape
+    np.testing.assert_allclose(remote, local, atol=1e-5)
+    single = await remote_generator.generate_embedding(texts[0])
+    np.testing.assert_allclose(single, local[0], atol=1e-5)
+
+
+async def test_large_batch_grows_shared_buffer(remote_generator):
+    """Test results larger than the initial shared buffer (1 MiB)."""
+    texts = [f"document number {i}" for i in range(1000)]
+    vectors = await remote_generator.generate_embeddings(texts)
+
+    assert vectors.shape == (1000, remote_generator.dimension)
+    assert not np.allclose(vectors[0], vectors[1])
+    assert remote_generator.worker_stats()["texts"] >= 1000
+
+
+@pytest.mark.parametrize("name", ["../../tmp/target", "/a/b", "..", ".hidden", ""])
+def test_worker_rejects_buffer_names_outside_shm(name):
+    with pytest.raises(ValueError):
+        _AttachedBuffers().get(name)
+
+
+def test_pool_requires_authkey():
+    with pytest.raises(ValueError, match="EMBEDDING_WORKER_AUTHKEY"):
+        EmbeddingWorkerPool(workers=1, socket_base="/tmp/unused.sock", authkey=None)
+
+
+def test_socket_directory_must_be_private(tmp_path):
+    private = tmp_path / "sockets"
+    ensure_private_directory(str(private))
+    assert private.stat().st_mode & 0o777 == 0o700
+
+    private.chmod(0o755)
+    with pytest.raises(PermissionError):
+        ensure_private_directory(str(private))
+
+
+def test_worker_error_returns_connection_to_pool(remote_generator):
+    client = remote_generator.remote
+    client.encode(["warm up"])
+    idle = client.stats()["idle_connections"]
+
+    with pytest.raises(EmbeddingWorkerError):
+        client.encode([None])  # The worker's tokenizer rejects it
+
+    assert client.stats()["idle_connections"] == idle
+    assert client.encode(["still works"]).shape == (1, remote_generator.dimension)
+
+
+def test_transport_error_closes_connection_and_buffer(remote_generator):
+    client = remote_generator.remote
+    client.encode(["warm up"])  # The idle connection now owns a shared buffer
+    idle = client.stats()["idle_connections"]
+    used = []
+
+    def broken(connection, texts):
+        used.append((connection, connection.buffer.name if connection.buffer else None))
+        raise OSError("worker went away")
+
+    with patch.object(client, "_request", side_effect=broken):
+        with pytest.raises(OSError):
+            client.encode(["lost"])
+
+    assert client.stats()["idle_connections"] == idle - 1
+    for connection, buffer_name in used:
+        assert connection.buffer is None and connection.connection.closed
+        if buffer_name is not None:
+            assert not os.path.exists(f"/dev/shm/{buffer_name.lstrip('/')}")
+    assert client.encode(["recovers"]).shape == (1, remote_generator.dimension)
+
+
+def test_worker_connections_share_the_inference_executor():
+    """Test that concurrent clients of one worker run inference one executor slot at a time."""
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def encode(texts):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    generator = MagicMock(model_name="test-model", dimension=4, normalize=True)
+    generator.backend.name = "torch"
+    generator.memory_bytes.return_value = 0
+    generator._encode_uncached = encode
+    generator.executor = InferenceExecutor(workers=1, max_queue=8)
+
+    buffer = shared_memory.SharedMemory(create=True, size=1024)
+    clients, threads = [], []
+    try:
+        for _ in range(3):
+            client, server = Pipe()
+            thread = threading.Thread(
+                target=_serve_connection, args=(server, generator)
+            )
+            thread.start()
+            clients.append(client)
+            threads.append(thread)
+        for client in clients:
+            assert client.recv()[0] == "hello"
+            client.send(("embed", ["text"], buffer.name))
+        assert [client.recv() for client in clients] == [("ok", 1)] * 3
+    finally:
+        for client in clients:
+            client.close()
+        for thread in threads:
+            thread.join(timeout=5)
+        buffer.close()
+        buffer.unlink()
+
+    assert peak[0] == 1
+    assert generator.executor.stats()["completed"] == 3
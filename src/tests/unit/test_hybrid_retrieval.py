@@ -0,0 +1,223 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.backend.database.corpus_version import CorpusState
+from src.services.retrieval_service.fusion import (
+    fuse_hits,
+    reciprocal_rank_fusion,
+    text_rank_ranking,
+    weighted_score_fusion,
+)
+from src.services.retrieval_service.retrieval import (
+    RetrievalService,
+    build_chunk_search_query,
+    build_search_query,
+)
+from src.services.retrieval_service.schemas import ChunkHit, SearchHit
+
+
+VERSION = CorpusState(documents=3, selection=2)
+
+
+@pytest.fixture
+def retrieval_service():
+    """RetrievalService with the embedding model and corpus version mocked out."""
+    with (
+        patch(
+            "src.services.retrieval_service.retrieval.get_embedding_generator",
+            return_value=MagicMock(),
+        ),
+        patch(
+            "src.services.retrieval_service.retrieval.current_corpus_version",
+            AsyncMock(return_value=VERSION),
+        ),
+    ):
+        yield RetrievalService()
+
+
+def test_reciprocal_rank_fusion():
+    """Test RRF sums 1 / (k + rank) over both legs."""
+    scores = reciprocal_rank_fusion({1: 1, 2: 2}, {2: 1, 3: 2}, k=60)
+    assert scores[2] == pytest.approx(1 / 62 + 1 / 61)
+    assert scores[1] == pytest.approx(1 / 61)
+    assert scores[3] == pytest.approx(1 / 62)
+
+
+def test_weighted_score_fusion():
+    """Test min-max normalization and weighting of both legs."""
+    scores = weighted_score_fusion(
+        {1: 0.2, 2: 0.6}, {2: 4.0, 3: 2.0}, vector_weight=0.25
+    )
+    assert scores[1] == pytest.approx(0.25)  # Closest, no keyword match
+    assert scores[2] == pytest.approx(0.75)  # Farthest, best keyword match
+    assert scores[3] == pytest.approx(0.375)
+
+
+@pytest.mark.parametrize("fusion, expected", [("rrf", [2, 3]), ("weighted", [2, 1])])
+def test_fuse_hits_promotes_keyword_matches(fusion, expected):
+    """Test that a document found by both legs outranks single-leg matches."""
+    hits = [
+        SearchHit(document_id=1, distance=0.1),
+        SearchHit(document_id=2, distance=0.2),
+        SearchHit(document_id=3, distance=0.3),
+    ]
+    fused = fuse_hits(hits, [(2, 5.0), (3, 1.0)], top_k=2, fusion=fusion)
+    assert [hit.document_id for hit in fused] == expected
+    assert fused[0].score > fused[1].score
+
+
+def test_fuse_hits_chunks_share_document_rank():
+    """Test that chunk hits inherit the lexical rank of their document."""
+    hits = [
+        ChunkHit(
+            document_id=doc_id,
+            chunk_index=index,
+            start_char=0,
+            end_char=10,
+            distance=distance,
+        )
+        for doc_id, index, distance in [(1, 0, 0.1), (2, 0, 0.2), (2, 1, 0.3)]
+    ]
+    fused = fuse_hits(
+        hits,
+        [(2, 3.0)],
+        top_k=3,
+        fusion="rrf",
+        key=lambda hit: (hit.document_id, hit.chunk_index),
+    )
+    assert [(hit.document_id, hit.chunk_index) for hit in fused] == [
+        (2, 0),
+        (2, 1),
+        (1, 0),
+    ]
+
+
+def test_fuse_hits_unknown_fusion():
+    with pytest.raises(ValueError, match="Unknown fusion method"):
+        fuse_hits([], [], top_k=1, fusion="max")
+
+
+async def test_hybrid_search(retrieval_service):
+    """Test that hybrid search passes lexical matches into the vector query."""
+    retrieval_service.embed_query = AsyncMock(return_value=[0.1, 0.2])
+    retrieval_service.bm25_service.search = AsyncMock(return_value=[(7, 2.0)])
+    retrieval_service.search_by_embedding = AsyncMock(
+        return_value=[
+            SearchHit(document_id=1, distance=0.1),
+            SearchHit(document_id=7, distance=0.4),
+        ]
+    )
+
+    hits = await retrieval_service.search("BERT", top_k=1, mode="hybrid")
+
+    assert [hit.document_id for hit in hits] == [7]
+    # The version read once for the cache key is reused by the BM25 leg
+    retrieval_service.bm25_service.search.assert_awaited_once_with(
+        "BERT", 4, corpus_version=VERSION
+    )
+    _, kwargs = retrieval_service.search_by_embedding.call_args
+    assert kwargs["lexical_ids"] == [7]
+    assert retrieval_service.search_by_embedding.call_args.args[1] == 4
+
+
+async def test_hybrid_legs_run_concurrently(retrieval_service):
+    """Test that hybrid latency is close to the slower leg, not the sum."""
+
+    async def slow(value):
+        await asyncio.sleep(0.2)
+        return value
+
+    retrieval_service.embed_query = lambda question: slow([0.1])
+    retrieval_service.bm25_service.search = lambda question, top_k, **_: slow(
+        [(1, 1.0)]
+    )
+
+    started = time.perf_counter()
+    query_embedding, lexical = await retrieval_service.hybrid_legs("BERT", 20)
+    assert time.perf_counter() - started < 0.35
+    assert query_embedding == [0.1] and lexical == [(1, 1.0)]
+
+
+async def test_unknown_search_mode(retrieval_service):
+    with pytest.raises(ValueError, match="Unknown search mode"):
+        await retrieval_service.search("BERT", mode="keyword")
+
+
+def test_keyword_filter_sql():
+    """Test that keyword-constrained search stays one statement with ts_rank."""
+    sql = str(build_search_query("<->", include_snippets=False, keywords=True))
+    assert "k.search_vector @@ websearch_to_tsquery('english', :keywords)" in sql
+    assert "ts_rank(d.search_vector" in sql
+    assert "LEFT JOIN documents d" in sql
+    assert "UNION" not in sql
+
+
+def test_postgres_lexical_leg_sql():
+    """Test that the full-text leg ranks candidates inside the chunk statement."""
+    sql = str(build_chunk_search_query("<->", lexical="postgres"))
+    assert "UNION" in sql
+    assert "ORDER BY ts_rank(t.search_vector" in sql
+    assert "AS text_rank" in sql
+    assert ":lexical_ids" not in sql
+
+
+async def test_postgres_lexical_leg_queries_the_question(retrieval_service):
+    """Test that keywords only filter: the lexical leg binds the question."""
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(all=MagicMock(return_value=[]))
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=db)
+    session.__aexit__ = AsyncMock(return_value=None)
+    db.begin = MagicMock(return_value=session)
+    with patch(
+        "src.services.retrieval_service.retrieval.AsyncSessionLocal",
+        return_value=session,
+    ):
+        await retrieval_service.search_chunks_by_embedding(
+            [0.1], fulltext="How does BERT pre-train?", keywords="masked"
+        )
+    statement, params = db.execute.await_args.args
+    assert params["text_query"] == "How does BERT pre-train?"
+    assert params["keywords"] == "masked"
+    assert "t.search_vector @@ websearch_to_tsquery('english', :text_query)" in str(
+        statement
+    )
+
+
+def test_text_rank_ranking():
+    """Test that ts_rank values become a per-document lexical ranking."""
+    hits = [
+        ChunkHit(
+            document_id=doc_id,
+            chunk_index=index,
+            start_char=0,
+            end_char=1,
+            distance=0.1,
+            text_rank=rank,
+        )
+        for doc_id, index, rank in [(1, 0, 0.1), (2, 0, 0.5), (1, 1, 0.3), (3, 0, 0)]
+    ]
+    assert text_rank_ranking(hits) == [(2, 0.5), (1, 0.3)]
+
+
+async def test_hybrid_search_postgres_leg(retrieval_service):
+    """Test that the Postgres leg skips BM25 and fuses on ts_rank."""
+    retrieval_service.embed_query = AsyncMock(return_value=[0.1, 0.2])
+    retrieval_service.bm25_service.search = AsyncMock()
+    retrieval_service.search_by_embedding = AsyncMock(
+        return_value=[
+            SearchHit(document_id=1, distance=0.1),
+            SearchHit(document_id=7, distance=0.2, text_rank=0.4),
+        ]
+    )
+
+    hits = await retrieval_service.search(
+        "BERT", top_k=1, mode="hybrid", lexical="postgres", keywords="bert"
+    )
+
+    assert [hit.document_id for hit in hits] == [7]
+    retrieval_service.bm25_service.search.assert_not_awaited()
+    _, kwargs = retrieval_service.search_by_embedding.call_args
+    assert kwargs["fulltext"] == "BERT"
+    assert kwargs["keywords"] == "bert"
@@ -0,0 +1,23 @@
+import pytest
+from src.services.ingestion_service.inference_backends import create_backend
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        create_backend("tensorrt", "any-model", ["input_ids"], "/tmp")
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_backend_parity(backend, tmp_path, monkeypatch):
+    """ONNX output must keep the 384-dim contract and stay close to torch."""
+    pytest.importorskip("onnxruntime")
+    monkeypatch.setattr(
+        "src.services.ingestion_service.embedding_generator.EMBEDDING_ONNX_CACHE_DIR",
+        str(tmp_path),
+    )
+    from src.services.ingestion_service.onnx_parity import check_parity
+
+    report = check_parity(backend)
+
+    assert report["dimension"] == 384
+    assert report["max_cosine_drift"] < (0.05 if backend == "onnx-int8" else 1e-4)
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+import pytest
+import torch
+from unittest.mock import AsyncMock, patch
+from src.services.ingestion_service.inference_backends import configure_torch_threads
+from src.services.ingestion_service.model_registry import get_embedding_generator
+from src.services.ingestion_service.inference_executor import (
+    InferenceExecutor,
+    InferenceOverloadedError,
+)
+
+
+def blocking(release: threading.Event, seconds: float = 0.0):
+    """Blocking job: waits for `release`, then works for `seconds`."""
+    release.wait(5)
+    time.sleep(seconds)
+    return threading.current_thread().name
+
+
+async def test_runs_on_dedicated_threads():
+    executor = InferenceExecutor(workers=1, max_queue=1)
+    release = threading.Event()
+    release.set()
+    assert (await executor.run(blocking, release)).startswith("inference")
+
+
+async def test_rejects_when_queue_is_full():
+    """Test admission control: workers + max_queue jobs admitted, then 503-style errors."""
+    executor = InferenceExecutor(workers=1, max_queue=1)
+    release = threading.Event()
+
+    admitted = [asyncio.create_task(executor.run(blocking, release)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    with pytest.raises(InferenceOverloadedError):
+        await executor.run(blocking, release)
+    assert executor.stats()["running"] == 1 and executor.stats()["queued"] == 1
+
+    release.set()
+    await asyncio.gather(*admitted)
+    stats = executor.stats()
+    assert (stats["completed"], stats["rejected"], stats["queued"]) == (2, 1, 0)
+    await executor.run(blocking, release)  # Capacity is back
+
+
+async def test_queue_wait_is_measured_apart_from_compute():
+    executor = InferenceExecutor(workers=1, max_queue=4)
+    release = threading.Event()
+    release.set()
+
+    await asyncio.gather(*(executor.run(blocking, release, 0.05) for _ in range(3)))
+
+    stats = executor.stats()
+    assert stats["compute_ms"]["mean"] == pytest.approx(50, abs=25)
+    assert stats["queue_wait_ms"]["p99"] >= 90  # The third job waited for two
+
+
+async def test_cancelled_caller_frees_its_slot():
+    executor = InferenceExecutor(workers=1, max_queue=0)
+    release = threading.Event()
+
+    running = asyncio.create_task(executor.run(blocking, release))
+    await asyncio.sleep(0.05)
+    running.cancel()
+    release.set()
+    with pytest.raises(asyncio.CancelledError):
+        await running
+    await asyncio.sleep(0.05)
+
+    assert executor.stats()["running"] == 0
+    await executor.run(blocking, release)
+
+
+def test_configure_torch_threads():
+    threads = torch.get_num_threads()
+    configure_torch_threads(1, None)
+    try:
+        assert torch.get_num_threads() == 1
+    finally:
+        configure_torch_threads(threads, None)
+
+
+async def test_overload_maps_to_503(async_client, qna_service):
+    with patch.object(
+        qna_service,
+        "retrieve",
+        AsyncMock(side_effect=InferenceOverloadedError("Inference queue is full")),
+    ):
+        response = await async_client.post("/qna/ask", json={"question": "What is AI?"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+async def test_batched_query_embeddings_are_admission_controlled():
+    """Overloading generate_embedding with batching enabled fails fast with 503s."""
+    generator = get_embedding_generator()
+    assert generator.batcher is not None
+    release = threading.Event()
+
+    def slow_batch(texts):
+        release.wait(5)
+        return [[0.0]] * len(texts)
+
+    with (
+        patch.object(generator.batcher, "batch_fn", slow_batch),
+        patch.object(generator.batcher, "max_queue", 4),
+    ):
+        calls = [
+            asyncio.ensure_future(generator.generate_embedding(f"overload {i}"))
+            for i in range(20)
+        ]
+        await asyncio.sleep(0.1)
+        release.set()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+    rejected = [r for r in results if isinstance(r, InferenceOverloadedError)]
+    assert rejected and len(rejected) < len(results)
+    assert generator.batching_stats()["rejected"] >= len(rejected)
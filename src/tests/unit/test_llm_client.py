@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from src.services.qna_service.llm import (
+    LLMError,
+    LLMTimeoutError,
+    OpenAIChatClient,
+    StubLLMClient,
+    create_llm_client,
+)
+from src.tests.fake_llm import FakeLLMServer
+
+MESSAGES = [
+    {"role": "system", "content": "Answer from the context."},
+    {"role": "user", "content": "Context:\nAI text\n\nQuestion: What is AI?\nAnswer:"},
+]
+
+
+def make_client(server: FakeLLMServer, **kwargs) -> OpenAIChatClient:
+    """Client pointed at the fake server, with fast retries."""
+    kwargs.setdefault("retry_base", 0.01)
+    kwargs.setdefault("hedge_after", None)
+    return OpenAIChatClient("test-key", api_base=server.api_base, **kwargs)
+
+
+async def test_complete_retries_transient_errors():
+    """Test that 503s are retried and the request then succeeds."""
+    with FakeLLMServer(["An ", "answer"], failures=2) as server:
+        client = make_client(server, max_retries=2)
+        try:
+            assert await client.complete(MESSAGES) == "An answer"
+        finally:
+            await client.aclose()
+
+    assert len(server.requests) == 3
+    assert client.snapshot()["retries"] == 2
+
+
+async def test_complete_gives_up_after_max_retries():
+    with FakeLLMServer(["An answer"], failures=5) as server:
+        client = make_client(server, max_retries=1)
+        try:
+            with pytest.raises(LLMError, match="503"):
+                await client.complete(MESSAGES)
+        finally:
+            await client.aclose()
+
+    assert len(server.requests) == 2
+
+
+async def test_deadline_raises_timeout():
+    """Test that a slow upstream turns into LLMTimeoutError at the deadline."""
+    with FakeLLMServer(["An answer"], latencies=[5, 5]) as server:
+        client = make_client(server, timeout=0.2)
+        try:
+            with pytest.raises(LLMTimeoutError):
+                await client.complete(MESSAGES)
+            with pytest.raises(LLMTimeoutError):
+                async for _ in client.stream(MESSAGES, timeout=0.2):
+                    pass
+        finally:
+            await client.aclose()
+
+    assert client.snapshot()["timeouts"] == 2
+    assert client.snapshot()["in_flight"] == 0
+
+
+async def test_concurrency_cap():
+    """Test that no more than `max_concurrency` requests reach the upstream."""
+    with FakeLLMServer(["An answer"], latencies=[0.1] * 6) as server:
+        client = make_client(server, max_concurrency=2)
+        try:
+            answers = await asyncio.gather(
+                *(client.complete(MESSAGES) for _ in range(6))
+            )
+        finally:
+            await client.aclose()
+
+    assert answers == ["An answer"] * 6
+    assert server.max_in_flight == 2
+
+
+async def test_hedge_wins_over_slow_request():
+    """Test that a hedged request answers when the first one stalls."""
+    with FakeLLMServer(["An answer"], latencies=[5, 0]) as server:
+        client = make_client(server, hedge_after=0.1)
+        try:
+            answer = await asyncio.wait_for(client.complete(MESSAGES), 2)
+        finally:
+            await client.aclose()
+
+    assert answer == "An answer"
+    assert client.snapshot()["hedges"] == 1
+    assert client.snapshot()["hedge_wins"] == 1
+
+
+async def test_hedges_stay_within_concurrency_cap():
+    """Test that a hedge needs a free slot of its own and is skipped otherwise."""
+    with FakeLLMServer(["An answer"], latencies=[0.3] * 4) as server:
+        client = make_client(server, max_concurrency=2, hedge_after=0.05)
+        try:
+            answers = await asyncio.gather(
+                *(client.complete(MESSAGES) for _ in range(2))
+            )
+        finally:
+            await client.aclose()
+
+    assert answers == ["An answer"] * 2
+    assert server.max_in_flight == 2
+    assert client.snapshot()["hedges"] == 0
+    assert client.snapshot()["hedges_skipped"] == 2
+    assert client.snapshot()["in_flight"] == 0
+
+
+async def test_stub_client_is_deterministic():
+    client = StubLLMClient()
+    answer = await client.complete(MESSAGES)
+    tokens = [token async for token in client.stream(MESSAGES)]
+
+    assert answer == "".join(tokens) == await StubLLMClient().complete(MESSAGES)
+    assert answer.startswith("Stub answer ") and answer.endswith("What is AI?")
+
+
+def test_create_llm_client_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown LLM backend"):
+        create_llm_client("llama", api_key="x")
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.services.ingestion_service.inference_executor import InferenceOverloadedError
+from src.services.ingestion_service.micro_batcher import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_are_coalesced():
+    """Concurrent callers should share one batch and get their own results back."""
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=16, max_wait_ms=50)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    assert results == [i * 2 for i in range(10)]
+    assert len(calls) == 1
+    assert sorted(calls[0]) == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_batches_respect_max_batch_size():
+    """No batch handed to batch_fn may exceed max_batch_size."""
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=20)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    assert results == list(range(10))
+    assert max(sizes) <= 4
+    assert sum(sizes) == 10
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_propagates_to_every_caller():
+    """An exception raised by batch_fn should reach every caller in the batch."""
+
+    def batch_fn(items):
+        raise RuntimeError("model failure")
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=20)
+    results = await asyncio.gather(
+        *(batcher.submit(i) for i in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_short_result_fails_every_caller():
+    """A batch_fn returning too few results must not leave any caller hanging."""
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=8, max_wait_ms=20)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True),
+        timeout=1,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert "2 results for 3 items" in str(results[0])
+
+
+@pytest.mark.asyncio
+async def test_stats_report_histogram_and_latency():
+    """Stats should count batches, items and bucket batch sizes."""
+    batcher = MicroBatcher(lambda items: items, max_batch_size=8, max_wait_ms=20)
+    await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["items"] == 3
+    assert stats["queue_depth"] == 0
+    assert stats["batch_size_histogram"]["<=4"] == 1
+    assert stats["batch_latency_ms"]["p50"] >= 0
+
+
+def test_invalid_max_batch_size():
+    with pytest.raises(ValueError, match="max_batch_size must be at least 1"):
+        MicroBatcher(lambda items: items, max_batch_size=0)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_overload():
+    """Beyond max_queue waiting items, submit fails fast instead of queueing."""
+    release = threading.Event()
+
+    def batch_fn(items):
+        release.wait(5)
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=1, max_queue=3)
+    first = asyncio.ensure_future(batcher.submit(0))
+    await asyncio.sleep(0.05)  # The first batch is now running
+    waiting = [asyncio.ensure_future(batcher.submit(i)) for i in range(1, 4)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(InferenceOverloadedError):
+        await batcher.submit(99)
+    release.set()
+
+    assert await asyncio.gather(first, *waiting) == [0, 1, 2, 3]
+    stats = batcher.stats()
+    assert stats["rejected"] == 1
+    assert stats["queue_wait_ms"]["p99"] > 0
+
+
+@pytest.mark.asyncio
+async def test_batches_run_concurrently_up_to_limit():
+    """Several batches run at once, so more than one executor thread is used."""
+    running, peak = 0, 0
+    lock = threading.Lock()
+
+    def batch_fn(items):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=1, max_concurrency=2)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+
+    assert results == list(range(6))
+    assert peak == 2
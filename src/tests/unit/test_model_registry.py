@@ -0,0 +1,64 @@
+import threading
+from unittest.mock import patch, MagicMock
+from src.services.ingestion_service.model_registry import ModelRegistry
+
+
+def test_model_loaded_once_per_name():
+    """The registry should hand out the same instance for repeated lookups."""
+    registry = ModelRegistry()
+
+    with patch(
+        "src.services.ingestion_service.embedding_generator.EmbeddingGenerator"
+    ) as mock_generator_cls:
+        mock_generator_cls.return_value = MagicMock(memory_bytes=lambda: 1024)
+
+        first = registry.get_embedding_generator("model-a")
+        second = registry.get_embedding_generator("model-a")
+
+        assert first is second
+        mock_generator_cls.assert_called_once_with("model-a")
+
+
+def test_concurrent_first_use_loads_once():
+    """Threads racing on the first lookup must not load the model twice."""
+    registry = ModelRegistry()
+    results = []
+
+    with patch(
+        "src.services.ingestion_service.embedding_generator.EmbeddingGenerator"
+    ) as mock_generator_cls:
+        mock_generator_cls.return_value = MagicMock(memory_bytes=lambda: 1024)
+
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    registry.get_embedding_generator("model-a")
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert mock_generator_cls.call_count == 1
+        assert all(result is results[0] for result in results)
+
+
+def test_stats_reported_per_model():
+    """Each loaded model should report its load time and memory usage."""
+    registry = ModelRegistry()
+
+    with patch(
+        "src.services.ingestion_service.embedding_generator.EmbeddingGenerator"
+    ) as mock_generator_cls:
+        mock_generator_cls.return_value = MagicMock(memory_bytes=lambda: 2048)
+
+        registry.get_embedding_generator("model-a")
+        registry.get_embedding_generator("model-b")
+
+    stats = {entry.model_name: entry for entry in registry.stats()}
+    assert set(stats) == {"model-a", "model-b"}
+    assert stats["model-a"].parameter_bytes == 2048
+    assert stats["model-a"].load_seconds >= 0
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import signal
+import time
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from src.backend.core.prefork import serve_prefork
+from src.main import after_fork, preload_models
+from src.services.ingestion_service.inference_executor import InferenceExecutor
+from src.services.ingestion_service.model_registry import (
+    get_embedding_generator,
+    model_registry,
+)
+from src.services.monitoring_service.memory_report import memory_report, process_memory
+
+
+def run_sync(coroutine):
+    """Runs a coroutine on a private loop, leaving the test session's loop alone."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def run_in_fork(fn, timeout: int = 30) -> int:
+    """Runs `fn` in a forked child; returns its exit code (nonzero on error or hang)."""
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(timeout)  # A deadlocked child gets killed instead of hanging
+        try:
+            fn()
+            os._exit(0)
+        except BaseException:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def test_process_memory_orders_uss_pss_rss():
+    memory = process_memory(os.getpid())
+    assert 0 < memory["uss"] <= memory["pss"] <= memory["rss"]
+
+
+def test_report_shows_pages_shared_with_forked_worker():
+    """Test that a forked child's untouched pages count as shared, not private."""
+    shared = np.ones(32 * 2**20, dtype=np.uint8)  # 32 MiB written before the fork
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(write)
+        os.read(read, 1)  # Keep the pages mapped until measured
+        os._exit(0)
+    try:
+        time.sleep(0.2)
+        report = memory_report(os.getpid())
+        worker = next(worker for worker in report["workers"] if worker["pid"] == pid)
+        assert worker["shared"] >= shared.nbytes
+        assert worker["uss"] < shared.nbytes
+        assert report["total_pss"] < report["total_rss"]
+    finally:
+        os.close(write)
+        os.waitpid(pid, 0)
+
+
+def test_executor_works_after_fork():
+    """Test that a child gets fresh inference threads instead of the parent's."""
+    executor = InferenceExecutor(workers=1, max_queue=1)
+    run_sync(executor.run(sum, [1, 2]))  # The parent's thread now exists
+
+    def child():
+        assert asyncio.run(executor.run(sum, [1, 2])) == 3
+        assert executor.stats()["completed"] == 1
+
+    assert run_in_fork(child) == 0
+
+
+def test_preloaded_model_embeds_in_forked_worker():
+    generator = get_embedding_generator()
+    assert generator.fork_safe
+    generator.freeze()
+    texts = ["Workers share the preloaded weights."]
+    expected = generator._encode_uncached(texts)
+
+    def child():
+        # Bypasses the embedding cache inherited from the parent
+        vectors = asyncio.run(generator.executor.run(generator._encode_uncached, texts))
+        assert np.allclose(vectors, expected, atol=1e-5)
+
+    assert run_in_fork(child) == 0
+
+
+def test_crashing_worker_stops_server_after_backoff():
+    """Test that a worker dying on startup is restarted with backoff, then gives up."""
+    read, write = os.pipe()
+
+    def crash():
+        os.write(write, b"x")  # One byte per worker start
+        os._exit(3)
+
+    def master():
+        started = time.monotonic()
+        with pytest.raises(RuntimeError, match="restarts"):
+            serve_prefork(
+                app=None,
+                host="127.0.0.1",
+                port=0,
+                workers=1,
+                after_fork=crash,
+                max_restarts=3,
+                restart_backoff=0.05,
+            )
+        # Backoffs of 0.05, 0.1 and 0.2s before the 2nd, 3rd and 4th start
+        assert time.monotonic() - started >= 0.35
+
+    assert run_in_fork(master) == 0
+    os.close(write)
+    assert len(os.read(read, 64)) == 4  # First start + max_restarts, no more
+    os.close(read)
+
+
+def test_preload_skips_backends_that_cannot_fork():
+    """Test that a worker pool client is never loaded in the prefork master."""
+    with (
+        patch("src.main.EMBEDDING_WORKERS", 2),
+        patch("src.main.get_embedding_generator") as load,
+    ):
+        preload_models()
+    load.assert_not_called()
+
+
+def test_preload_drops_generator_that_is_not_fork_safe():
+    generator = MagicMock(fork_safe=False)
+    with (
+        patch("src.main.EMBEDDING_BACKEND", "torch"),
+        patch("src.main.EMBEDDING_WORKERS", 0),
+        patch("src.main.get_embedding_generator", return_value=generator),
+        patch.object(model_registry, "clear") as clear,
+    ):
+        preload_models()
+    clear.assert_called_once()
+    generator.freeze.assert_not_called()
+
+
+def test_worker_drops_inherited_generator_that_is_not_fork_safe():
+    def child():
+        model_registry._generators["inherited"] = MagicMock(fork_safe=False)
+        after_fork()
+        assert model_registry.generators() == {}
+
+    assert run_in_fork(child) == 0
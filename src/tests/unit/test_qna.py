@@ -1,8 +1,9 @@
 import pytest
-import os
 from unittest.mock import patch, AsyncMock
 from src.services.qna_service.service import QnAService
-from src.services.qna_service.schemas import QueryRequest
+from src.services.qna_service.llm import create_llm_client
+from src.services.qna_service.schemas import QueryRequest, RetrievedContext
+from src.services.retrieval_service.schemas import ChunkHit
 
 
 @pytest.mark.asyncio
@@ -10,36 +11,48 @@ async def test_get_answer_valid_query():
     service = QnAService()
     request = QueryRequest(question="What is AI?", top_k=3)
 
-    # Patch the retrieval service to return mock document IDs and texts.
+    # Patch the retrieval service to return mock hits carrying document texts.
     with (
         patch.object(
-            service.retrieval_service, "retrieve_relevant_docs", new_callable=AsyncMock
-        ) as mock_retrieve_docs,
+            service.retrieval_service, "embed_query", new_callable=AsyncMock
+        ) as mock_embed,
         patch.object(
-            service.retrieval_service, "get_document_texts", new_callable=AsyncMock
-        ) as mock_get_texts,
-        patch("openai.ChatCompletion.acreate", new_callable=AsyncMock) as mock_openai,
+            service.retrieval_service,
+            "search_chunks_by_embedding",
+            new_callable=AsyncMock,
+        ) as mock_search,
+        patch.object(service.llm, "complete", new_callable=AsyncMock) as mock_llm,
     ):
-        mock_retrieve_docs.return_value = [1, 2, 3]
-        mock_get_texts.return_value = [
-            "Document 1 text",
-            "Document 2 text",
-            "Document 3 text",
+        mock_embed.return_value = [0.1, 0.2, 0.3]
+        mock_search.return_value = [
+            ChunkHit(
+                document_id=i,
+                chunk_index=0,
+                start_char=0,
+                end_char=15,
+                distance=0.1 * i,
+                text=f"Document {i} text",
+            )
+            for i in (1, 2, 3)
         ]
-        mock_openai.return_value = {
-            "choices": [
-                {
-                    "message": {
-                        "content": "AI is the simulation of human intelligence in machines."
-                    }
-                }
-            ]
-        }
+        mock_llm.return_value = (
+            "AI is the simulation of human intelligence in machines."
+        )
 
         response = await service.get_answer(request)
         assert (
             response.answer == "AI is the simulation of human intelligence in machines."
         )
+        assert [source.document_id for source in response.sources] == [1, 2, 3]
+        assert {"embedding", "search", "packing", "generation", "total"} <= set(
+            response.timings_ms
+        )
+        assert response.context.packed_chunks == 3
+        assert response.context.packed_tokens > 0
+        mock_embed.assert_awaited_once()
+        mock_search.assert_awaited_once()
+        prompt = mock_llm.call_args.args[0][1]["content"]
+        assert "Document 1 text\n\nDocument 2 text\n\nDocument 3 text" in prompt
 
 
 @pytest.mark.asyncio
@@ -47,27 +60,67 @@ async def test_get_answer_no_relevant_docs():
     service = QnAService()
     request = QueryRequest(question="What is AI?", top_k=3)
 
-    # Patch the retrieval service to return no document IDs.
+    # Patch the retrieval service to return no hits.
     with (
         patch.object(
-            service.retrieval_service, "retrieve_relevant_docs", new_callable=AsyncMock
-        ) as mock_retrieve_docs,
+            service.retrieval_service, "embed_query", new_callable=AsyncMock
+        ) as mock_embed,
         patch.object(
-            service.retrieval_service, "get_document_texts", new_callable=AsyncMock
-        ) as mock_get_texts,
-        patch("openai.ChatCompletion.acreate", new_callable=AsyncMock) as mock_openai,
+            service.retrieval_service,
+            "search_chunks_by_embedding",
+            new_callable=AsyncMock,
+        ) as mock_search,
+        patch.object(service.llm, "complete", new_callable=AsyncMock) as mock_llm,
     ):
-        mock_retrieve_docs.return_value = []
-        mock_get_texts.return_value = []
-        mock_openai.return_value = {
-            "choices": [{"message": {"content": "No relevant documents found."}}]
-        }
+        mock_embed.return_value = [0.1, 0.2, 0.3]
+        mock_search.return_value = []
+        mock_llm.return_value = "No relevant documents found."
 
         response = await service.get_answer(request)
         assert response.answer == "No relevant documents found."
 
 
+@pytest.mark.asyncio
+async def test_get_answer_reuses_retrieved_context():
+    """Answer generation must not embed or search again when given a context."""
+    service = QnAService()
+    request = QueryRequest(question="What is AI?", top_k=1)
+    retrieved = RetrievedContext(
+        hits=[
+            ChunkHit(
+                document_id=4,
+                chunk_index=2,
+                start_char=512,
+                end_char=519,
+                distance=0.2,
+                text="AI text",
+            )
+        ],
+        timings_ms={"embedding": 1.0, "search": 2.0},
+    )
+
+    with (
+        patch.object(
+            service.retrieval_service, "embed_query", new_callable=AsyncMock
+        ) as mock_embed,
+        patch.object(
+            service.retrieval_service,
+            "search_chunks_by_embedding",
+            new_callable=AsyncMock,
+        ) as mock_search,
+        patch.object(service.llm, "complete", new_callable=AsyncMock) as mock_llm,
+    ):
+        mock_llm.return_value = "An answer"
+
+        response = await service.get_answer(request, retrieved)
+
+    mock_embed.assert_not_awaited()
+    mock_search.assert_not_awaited()
+    assert response.sources[0].document_id == 4
+    assert response.sources[0].chunk_index == 2
+    assert response.timings_ms["search"] == 2.0
+
+
 def test_qna_service_missing_api_key():
-    with patch.dict(os.environ, {"OPENAI_API_KEY": ""}):
-        with pytest.raises(ValueError, match="OpenAI API key is missing"):
-            QnAService()
+    with pytest.raises(ValueError, match="OpenAI API key is missing"):
+        create_llm_client("openai", api_key="")
@@ -0,0 +1,162 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.services.qna_service.llm import OpenAIChatClient
+from src.services.qna_service.schemas import QueryRequest, RetrievedContext
+from src.services.qna_service.streaming import answer_events, sse_event
+from src.services.retrieval_service.schemas import ChunkHit
+from src.tests.fake_llm import FakeLLMServer
+
+RETRIEVED = RetrievedContext(
+    hits=[
+        ChunkHit(
+            document_id=i,
+            chunk_index=0,
+            start_char=0,
+            end_char=15,
+            distance=0.1 * i,
+            text=f"Document {i} text",
+        )
+        for i in (1, 2)
+    ],
+    timings_ms={"embedding": 1.0, "search": 2.0},
+)
+
+
+def parse_events(body: str) -> list[tuple[str, dict]]:
+    """Splits an SSE body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@asynccontextmanager
+async def serving(server: FakeLLMServer, qna_service):
+    """Runs `server` with the Q&A service's LLM client pointed at it."""
+    with server:
+        client = OpenAIChatClient("test-key", api_base=server.api_base)
+        try:
+            with patch.object(qna_service, "llm", client):
+                yield server
+        finally:
+            await client.aclose()
+
+
+@pytest.fixture
+async def fake_llm(qna_service):
+    """Fake LLM server used by the Q&A service for the duration of a test."""
+    async with serving(
+        FakeLLMServer(["AI ", "is ", "simulated ", "intelligence."]), qna_service
+    ) as server:
+        yield server
+
+
+def test_sse_event():
+    assert (
+        sse_event("token", {"text": "hi"}) == 'event: token\ndata: {"text": "hi"}\n\n'
+    )
+
+
+async def test_stream_answer_from_fake_llm(fake_llm, qna_service):
+    """Test token streaming against a real HTTP server."""
+    request = QueryRequest(question="What is AI?")
+    packed = qna_service.pack_context(request.question, RETRIEVED)
+    tokens = [token async for token in qna_service.stream_answer(request, packed)]
+
+    assert "".join(tokens) == "AI is simulated intelligence."
+    assert fake_llm.requests[0]["stream"] is True
+    assert "Document 1 text" in fake_llm.requests[0]["messages"][1]["content"]
+
+
+async def test_ask_stream_route(async_client, fake_llm, qna_service):
+    """Test that sources come first, then tokens, then timings."""
+    with patch.object(qna_service, "retrieve", AsyncMock(return_value=RETRIEVED)):
+        response = await async_client.post(
+            "/qna/ask/stream", json={"question": "What is AI?"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+
+    context = events[0][1].pop("context")
+    assert events[0] == (
+        "sources",
+        {
+            "documents": [1, 2],
+            "sources": [
+                source.model_dump() for source in qna_service.sources(RETRIEVED)
+            ],
+            "timings_ms": RETRIEVED.timings_ms,
+        },
+    )
+    assert context["packed_chunks"] == 2 and context["dropped_tokens"] == 0
+    assert "".join(data["text"] for event, data in events if event == "token") == (
+        "AI is simulated intelligence."
+    )
+    assert events[-1][0] == "done"
+    assert {
+        "embedding",
+        "search",
+        "packing",
+        "generation",
+        "first_token",
+        "total",
+    } <= set(events[-1][1]["timings_ms"])
+
+
+async def test_ask_stream_no_documents(async_client, qna_service):
+    """Test that an empty retrieval is a 404 before any event is sent."""
+    with patch.object(
+        qna_service, "retrieve", AsyncMock(return_value=RetrievedContext())
+    ):
+        response = await async_client.post(
+            "/qna/ask/stream", json={"question": "What is AI?"}
+        )
+    assert response.status_code == 404
+
+
+async def test_client_disconnect_closes_upstream(qna_service):
+    """Test that a client disconnect stops generation at the fake LLM."""
+    server = FakeLLMServer([f"token{i} " for i in range(100)], delay=0.05)
+    async with serving(server, qna_service):
+        http_request = MagicMock()
+        http_request.is_disconnected = AsyncMock(side_effect=[False, False, True])
+
+        events = [
+            event
+            async for event in answer_events(
+                http_request, qna_service, QueryRequest(question="Q"), RETRIEVED
+            )
+        ]
+
+        assert len(events) == 3  # sources + two tokens, no "done"
+        assert await asyncio.to_thread(server.disconnected.wait, 5)
+
+
+async def test_cancellation_closes_upstream(qna_service):
+    """Test that cancelling the response task also closes the upstream stream."""
+    server = FakeLLMServer([f"token{i} " for i in range(100)], delay=0.05)
+    async with serving(server, qna_service):
+        http_request = MagicMock()
+        http_request.is_disconnected = AsyncMock(return_value=False)
+        first_token = asyncio.Event()
+
+        async def consume():
+            async for event in answer_events(
+                http_request, qna_service, QueryRequest(question="Q"), RETRIEVED
+            ):
+                if event.startswith("event: token"):
+                    first_token.set()
+
+        task = asyncio.create_task(consume())
+        await asyncio.wait_for(first_token.wait(), 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert await asyncio.to_thread(server.disconnected.wait, 5)
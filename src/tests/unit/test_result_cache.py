@@ -0,0 +1,101 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.backend.core.cache import TTLCache
+from src.backend.database.config import AsyncSessionLocal
+from src.backend.database.corpus_version import (
+    bump_corpus_version,
+    current_corpus_version,
+)
+from src.services.retrieval_service.retrieval import RetrievalService
+from src.services.retrieval_service.schemas import SearchHit
+
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache(max_entries=2, ttl_seconds=10)
+    with patch("src.backend.core.cache.time.monotonic", return_value=100.0):
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("c", 3)  # Evicts "a"
+    with patch("src.backend.core.cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+    with patch("src.backend.core.cache.time.monotonic", return_value=111.0):
+        assert cache.get("c") is None  # Expired
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["evictions"], stats["expirations"]) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_repeated_search_skips_model_and_database():
+    """A cache hit must not embed the question or touch the database."""
+    mock_embedding_generator = MagicMock()
+    mock_embedding_generator.generate_embedding = AsyncMock(return_value=[0.1, 0.2])
+
+    with patch(
+        "src.services.retrieval_service.retrieval.get_embedding_generator",
+        return_value=mock_embedding_generator,
+    ):
+        service = RetrievalService()
+
+    hits = [SearchHit(document_id=5, distance=0.3)]
+    with patch.object(
+        service, "search_by_embedding", new_callable=AsyncMock, return_value=hits
+    ) as mock_search:
+        first = await service.search("What is  Python?", 2)
+        second = await service.search("What is Python?", 2)
+
+    assert first == second == hits
+    mock_embedding_generator.generate_embedding.assert_awaited_once()
+    mock_search.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_corpus_change_invalidates_cached_results():
+    mock_embedding_generator = MagicMock()
+    mock_embedding_generator.generate_embedding = AsyncMock(return_value=[0.1, 0.2])
+
+    with patch(
+        "src.services.retrieval_service.retrieval.get_embedding_generator",
+        return_value=mock_embedding_generator,
+    ):
+        service = RetrievalService()
+
+    with patch.object(
+        service,
+        "search_by_embedding",
+        new_callable=AsyncMock,
+        side_effect=[
+            [SearchHit(document_id=1, distance=0.1)],
+            [SearchHit(document_id=2, distance=0.1)],
+        ],
+    ):
+        before = await service.search("question", 1)
+        # e.g. another worker process (de)selected or ingested a document
+        async with AsyncSessionLocal() as db, db.begin():
+            await bump_corpus_version(db, selection=True)
+        after = await service.search("question", 1)
+
+    assert [hit.document_id for hit in before] == [1]
+    assert [hit.document_id for hit in after] == [2]
+
+
+@pytest.mark.asyncio
+async def test_corpus_version_changes_only_on_commit():
+    """Test that the shared version moves with the write's transaction."""
+    before = await current_corpus_version()
+
+    async with AsyncSessionLocal() as db:
+        transaction = await db.begin()
+        await bump_corpus_version(db, documents=True)
+        assert await current_corpus_version() == before  # Not visible before commit
+        await transaction.rollback()
+    assert await current_corpus_version() == before
+
+    async with AsyncSessionLocal() as db, db.begin():
+        await bump_corpus_version(db, documents=True)
+    after = await current_corpus_version()
+    assert (after.documents, after.selection) == (
+        before.documents + 1,
+        before.selection,
+    )
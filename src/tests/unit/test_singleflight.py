@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.backend.core.singleflight import SingleFlight
+from src.backend.database.corpus_version import CorpusState
+from src.services.qna_service.schemas import QueryRequest, RetrievedContext
+from src.services.qna_service.service import answer_flights
+from src.services.retrieval_service.retrieval import RetrievalService
+from src.services.retrieval_service.schemas import ChunkHit, SearchHit
+
+
+def counting(result, delay: float = 0.05):
+    """Returns an async function recording how often it actually ran."""
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+
+    return fn, calls
+
+
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight("test")
+    fn, calls = counting("result")
+
+    results = await asyncio.gather(*(flights.do("key", fn) for _ in range(10)))
+    other = await flights.do("other", fn)
+
+    assert results == ["result"] * 10 and other == "result"
+    assert len(calls) == 2
+    stats = flights.stats()
+    assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (2, 9, 0)
+
+
+async def test_exception_is_shared_and_not_remembered():
+    flights = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        *(flights.do("key", fail) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    fn, calls = counting("recovered", delay=0)
+    assert await flights.do("key", fn) == "recovered"  # A new execution
+
+
+async def test_cancelled_caller_does_not_cancel_others():
+    flights = SingleFlight("test")
+    fn, calls = counting("result", delay=0.1)
+
+    first = asyncio.create_task(flights.do("key", fn))
+    second = asyncio.create_task(flights.do("key", fn))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "result"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert len(calls) == 1
+
+
+async def test_disabled_runs_every_call():
+    flights = SingleFlight("test", enabled=False)
+    fn, calls = counting("result")
+    await asyncio.gather(*(flights.do("key", fn) for _ in range(3)))
+    assert len(calls) == 3
+
+
+async def test_identical_searches_embed_once():
+    """Test that concurrent identical searches share one embedding and query."""
+    generator = MagicMock()
+
+    async def slow_embedding(question):
+        await asyncio.sleep(0.05)
+        return [0.1, 0.2]
+
+    generator.generate_embedding = AsyncMock(side_effect=slow_embedding)
+    with patch(
+        "src.services.retrieval_service.retrieval.get_embedding_generator",
+        return_value=generator,
+    ):
+        service = RetrievalService()
+    service.search_by_embedding = AsyncMock(
+        return_value=[SearchHit(document_id=1, distance=0.1)]
+    )
+
+    with patch(
+        "src.services.retrieval_service.retrieval.current_corpus_version",
+        AsyncMock(return_value=CorpusState(documents=1, selection=1)),
+    ):
+        results = await asyncio.gather(
+            *(service.search("What is a coalesced search?", 1) for _ in range(5))
+        )
+
+    assert all(hits[0].document_id == 1 for hits in results)
+    generator.generate_embedding.assert_awaited_once()
+    service.search_by_embedding.assert_awaited_once()
+
+
+async def test_identical_questions_call_llm_once(async_client, qna_service):
+    """Test that concurrent identical /qna/ask requests share one LLM call."""
+    retrieved = RetrievedContext(
+        hits=[
+            ChunkHit(
+                document_id=1,
+                chunk_index=0,
+                start_char=0,
+                end_char=7,
+                distance=0.1,
+                text="AI text",
+            )
+        ]
+    )
+
+    async def slow_retrieve(request: QueryRequest, corpus_version=None):
+        await asyncio.sleep(0.05)
+        return retrieved
+
+    coalesced_before = answer_flights.stats()["coalesced"]
+    with (
+        patch.object(qna_service, "retrieve", side_effect=slow_retrieve) as retrieve,
+        patch.object(
+            qna_service.llm, "complete", new_callable=AsyncMock, return_value="Answer"
+        ) as complete,
+    ):
+        responses = await asyncio.gather(
+            *(
+                async_client.post("/qna/ask", json={"question": "What is AI?"})
+                for _ in range(8)
+            )
+        )
+
+    assert [response.status_code for response in responses] == [200] * 8
+    assert {response.json()["answer"] for response in responses} == {"Answer"}
+    assert retrieve.call_count == 1
+    complete.assert_awaited_once()
+    assert answer_flights.stats()["coalesced"] - coalesced_before == 7
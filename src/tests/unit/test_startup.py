@@ -0,0 +1,69 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+from src.backend.core.warmup import Warmup
+from src.config import EMBEDDING_MODEL_NAME
+from src.services.monitoring_service.import_benchmark import measure_import
+
+# Cold `import src.main` budget; loading torch and the model took ~5s before
+IMPORT_BUDGET_SECONDS = 3.0
+
+
+def test_api_import_is_light():
+    """Guard against heavy libraries or model loads creeping back into import."""
+    result = measure_import("src.main", repeat=1)
+    assert result["heavy_modules"] == []
+    assert result["models_loaded"] == []
+    assert result["median_seconds"] < IMPORT_BUDGET_SECONDS
+
+
+async def test_warmup_records_failure():
+    async def fail():
+        raise RuntimeError("no model")
+
+    warmup = Warmup(fail)
+    await warmup.run()
+    assert not warmup.ready
+    assert warmup.stats()["state"] == "failed" and warmup.stats()["error"] == "no model"
+
+
+async def test_ready_flips_after_warmup(async_client):
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+
+    warmup = Warmup(load)
+    with patch("src.main.warmup", warmup):
+        assert (await async_client.get("/health")).status_code == 200
+        task = warmup.start()
+        await asyncio.sleep(0)
+        response = await async_client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming"
+
+        release.set()
+        await task
+        response = await async_client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["warmup"]["state"] == "ready"
+
+
+async def test_ready_after_failed_warmup_once_model_loads(async_client):
+    """Test that a failed warmup does not keep the process unready forever."""
+
+    async def fail():
+        raise RuntimeError("no model")
+
+    warmup = Warmup(fail)
+    await warmup.run()
+    with (
+        patch("src.main.warmup", warmup),
+        patch("src.main.model_registry.generators", return_value={}) as generators,
+    ):
+        response = await async_client.get("/ready")
+        assert response.status_code == 503
+
+        generators.return_value = {EMBEDDING_MODEL_NAME: MagicMock()}  # Lazy load
+        response = await async_client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["warmup"]["state"] == "failed"
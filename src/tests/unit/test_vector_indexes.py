@@ -0,0 +1,119 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+from pydantic import ValidationError
+from src.services.index_service.schemas import IndexCreateRequest, IndexInfo
+from src.services.index_service.service import (
+    VectorIndexService,
+    build_create_index_sql,
+    index_name,
+)
+from src.services.retrieval_service.retrieval import search_settings
+
+
+def test_hnsw_create_sql():
+    request = IndexCreateRequest(
+        table="embeddings",
+        method="hnsw",
+        metric="inner_product",
+        m=24,
+        ef_construction=128,
+    )
+    sql = build_create_index_sql(request)
+    assert sql.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS")
+    assert "ix_embeddings_vector_ip_hnsw ON embeddings" in sql
+    assert "USING hnsw (vector vector_ip_ops)" in sql
+    assert "WITH (m = 24, ef_construction = 128)" in sql
+
+
+def test_ivfflat_create_sql():
+    request = IndexCreateRequest(method="ivfflat", metric="cosine", lists=250)
+    sql = build_create_index_sql(request)
+    assert "ix_chunks_vector_cosine_ivfflat ON chunks" in sql  # Chunks by default
+    assert "USING ivfflat (vector vector_cosine_ops) WITH (lists = 250)" in sql
+
+
+def test_index_name_convention():
+    assert index_name("hnsw", "l2") == "ix_chunks_vector_l2_hnsw"
+    assert index_name("hnsw", "l2", "embeddings") == "ix_embeddings_vector_l2_hnsw"
+    with pytest.raises(ValueError):
+        index_name("hnsw", "l2", "documents")
+
+
+def test_ef_construction_must_cover_twice_m():
+    with pytest.raises(ValidationError, match="ef_construction"):
+        IndexCreateRequest(method="hnsw", m=32, ef_construction=32)
+    IndexCreateRequest(method="hnsw", m=32, ef_construction=64)
+    IndexCreateRequest(method="ivfflat", m=32, ef_construction=32)  # Unused
+
+
+@pytest.mark.asyncio
+async def test_create_rejects_narrow_ef_construction(async_client):
+    response = await async_client.post(
+        "/indexes/", json={"method": "hnsw", "m": 32, "ef_construction": 40}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_chunk_indexes_are_managed():
+    service = VectorIndexService()
+    index = await service.get_index("ix_chunks_vector_l2_hnsw")
+    assert index.table == "chunks" and index.method == "hnsw"
+
+
+def invalid_then_valid(name: str, table: str = "chunks"):
+    info = dict(name=name, table=table, method="hnsw", definition="", size_bytes=0)
+    return [IndexInfo(**info, is_valid=False), IndexInfo(**info, is_valid=True)]
+
+
+@pytest.mark.asyncio
+async def test_create_rebuilds_invalid_index():
+    """Test that the leftover of a failed concurrent build is dropped and rebuilt."""
+    service = VectorIndexService()
+    name = "ix_chunks_vector_cosine_hnsw"
+    with (
+        patch.object(service, "get_index", side_effect=invalid_then_valid(name)),
+        patch.object(service, "_build_in_progress", return_value=False),
+        patch.object(service, "_execute_autocommit", return_value=1.0) as ddl,
+    ):
+        index = await service.create_index(IndexCreateRequest(metric="cosine"))
+    assert index.is_valid
+    statements = [call.args[0] for call in ddl.await_args_list]
+    assert statements[0] == f"DROP INDEX CONCURRENTLY IF EXISTS {name}"
+    assert statements[1].startswith(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}")
+
+
+@pytest.mark.asyncio
+async def test_create_conflicts_with_running_build(async_client):
+    name = "ix_chunks_vector_cosine_hnsw"
+    with (
+        patch.object(
+            VectorIndexService, "get_index", side_effect=invalid_then_valid(name)
+        ),
+        patch.object(VectorIndexService, "_build_in_progress", return_value=True),
+        patch.object(VectorIndexService, "_execute_autocommit") as ddl,
+    ):
+        response = await async_client.post("/indexes/", json={"metric": "cosine"})
+    assert response.status_code == 409
+    ddl.assert_not_called()
+
+
+def test_search_settings():
+    assert search_settings(None, None) == []
+    assert search_settings(100, 10) == [
+        "SET LOCAL hnsw.ef_search = 100",
+        "SET LOCAL ivfflat.probes = 10",
+    ]
+    with pytest.raises(ValueError):
+        search_settings(0, None)
+    with pytest.raises(ValueError):
+        search_settings("1; DROP TABLE embeddings", None)
+
+
+@pytest.mark.asyncio
+async def test_drop_rejects_unexpected_names():
+    service = VectorIndexService()
+    with patch.object(service, "_execute_autocommit", new_callable=AsyncMock) as ddl:
+        with pytest.raises(ValueError, match="Invalid index name"):
+            await service.drop_index("ix; DROP TABLE documents")
+        ddl.assert_not_awaited()